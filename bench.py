@@ -0,0 +1,939 @@
+from network_utils import serverclass
+from network_utils import protocol_pb2 as proto
+from network_utils import timestep
+from network_utils.reliable import AckManager
+from gameplay.weapons import NadeProjectile, BlasterProjectile, spread
+from player.cvec2 import cvec2 as vec2
+from player.movement import PyMovement, cMovement
+from collision.caabb import cAABB as AABB, Line
+from collision.quadtree import QuadTree
+from collision.grid import StaticGrid, reach
+from collision import sap
+from maps.map import Map, chunks, chunk
+from maps import mapcompiler
+from timeit import default_timer as time
+import glob
+import math
+import os
+import random
+import struct
+import sys
+try:
+    from player.cvec2 import allocations
+except ImportError:
+    #cvec2 built without COUNT_ALLOCATIONS
+    allocations = None
+
+#the graphics package imports pyglet, its model compiler does not
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'graphics'))
+import modelcompiler
+import parsedae
+
+"""usage: python bench.py [name ...]
+micro benchmarks for the server hot paths, run from the repository root"""
+
+
+class Transport(object):
+    """stands in for the udp transport and counts outgoing traffic"""
+    def __init__(self):
+        super(Transport, self).__init__()
+        self.datagrams = 0
+        self.bytes = 0
+
+    def write(self, datagram, address):
+        self.datagrams += 1
+        self.bytes += len(datagram)
+
+    def reset(self):
+        self.datagrams = 0
+        self.bytes = 0
+
+
+def make_server(num_players):
+    server = serverclass.GameServer()
+    server.transport = Transport()
+    server.projectiles.receive_send(server.transport.write)
+    server.ackman.receive_send(server.transport.write)
+    server.snapshots.receive_send(server.transport.write)
+    for i in range(num_players):
+        msg = proto.Message()
+        msg.type = proto.newPlayer
+        msg.player.chat = 'bot'
+        msg.input.name = 'blue'
+        server.datagramReceived(msg.SerializeToString(),
+                                ('127.0.0.1', 10000 + i))
+    #bypass the duel limit of the gamestate
+    for id in server.specs.keys():
+        server.join_player(id)
+    server.transport.reset()
+    return server
+
+
+def quadtree(rects):
+    """the QuadTree over rects the map used to build"""
+    max_x = max(rect.pos.x + rect.width for rect in rects)
+    max_y = max(rect.pos.y + rect.height for rect in rects)
+    tree = QuadTree(0, AABB(0, 0, max_x, max_y), server=True)
+    for rect in rects:
+        tree.insert(rect)
+    return tree
+
+
+def timed(func, ticks):
+    start = time()
+    for i in range(ticks):
+        func()
+    return (time() - start) / ticks
+
+
+def snapshot(ticks=200):
+    """cost of one send_all tick over the number of connected players"""
+    print '%8s %12s %12s %10s %12s' % ('players', 'us/tick', 'us/player',
+                                       'dgrams', 'bytes')
+    for num in (2, 4, 8, 16, 32, 64):
+        server = make_server(num)
+        dt = timed(server.send_all, ticks)
+        tr = server.transport
+        print '%8i %12.1f %12.2f %10i %12i' % (
+            num, dt * 10**6, dt * 10**6 / num, tr.datagrams / ticks,
+            tr.bytes / ticks)
+
+def move(server, tick, lag):
+    """feeds one input per player, every other player idles. clients
+    acknowledge the snapshot from lag ticks ago, None never acknowledges"""
+    msg = proto.Message()
+    msg.type = proto.playerUpdate
+    for id, player in server.players.items():
+        msg.input.id = id
+        msg.input.right = id % 2 == 0
+        msg.input.time = (tick + 1) * 16000 if id % 2 == 0 else 16000
+        msg.baseline = 0 if lag is None else max(
+            0, server.snapshots.sequence - lag)
+        server.datagramReceived(msg.SerializeToString(), player.address)
+
+
+def delta(ticks=200, lag=6):
+    """snapshot traffic per tick, full snapshots against deltas"""
+    print '%8s %12s %12s %12s' % ('players', 'full bytes', 'delta bytes',
+                                  'us/tick')
+    for num in (2, 4, 8, 16, 32, 64):
+        result = []
+        for ack in (None, lag):
+            server = make_server(num)
+            duration = 0
+            for tick in range(ticks):
+                move(server, tick, ack)
+                server.run_inputs()
+                server.transport.reset()
+                duration += timed(server.send_all, 1)
+            result.append((server.transport.bytes, duration / ticks))
+        print '%8i %12i %12i %12.1f' % (num, result[0][0], result[1][0],
+                                        result[1][1] * 10**6)
+
+def scatter(server, tick, width):
+    """places the players on a grid over a width x width / 2 area and
+    lets them drift to the right"""
+    rows = int(len(server.players) ** .5) or 1
+    for i, (id, player) in enumerate(sorted(server.players.items())):
+        x = (i % rows + .5) * width / rows + tick
+        y = (i // rows + .5) * width / 2 / rows
+        player.state.pos.x, player.state.pos.y = x, y
+        player.rect.update(x, y)
+        player.time = tick
+        server.player_to_pack(id)
+    server.broadphase.update()
+
+
+def interest(ticks=100, lag=6):
+    """snapshot traffic per tick on a large map, without and with interest
+    management"""
+    print '%8s %12s %12s %12s' % ('players', 'all bytes', 'aoi bytes',
+                                  'us/tick')
+    for num in (16, 32, 64, 128):
+        result = []
+        for filtered in (False, True):
+            server = make_server(num)
+            duration = 0
+            for tick in range(ticks):
+                scatter(server, tick, 10000)
+                for player in server.players.itervalues():
+                    player.baseline = max(0, server.snapshots.sequence - lag)
+                server.transport.reset()
+                start = time()
+                server.interest.update()
+                if filtered:
+                    server.send_all()
+                else:
+                    server.snapshots.send_all(
+                        server.allgen(), server.players_pack, server.players,
+                        lambda id: None)
+                duration += time() - start
+            result.append((server.transport.bytes, duration / ticks))
+        print '%8i %12i %12i %12.1f' % (num, result[0][0], result[1][0],
+                                        result[1][1] * 10**6)
+
+def jitter(ticks=200):
+    """cost of a server tick with clients whose inputs arrive in bursts of
+    0 to 3 per tick, one on average"""
+    print '%8s %12s %12s %12s' % ('players', 'us/tick', 'max us/tick',
+                                  'queued')
+    rand = random.Random(1)
+    for num in (2, 8, 32, 64):
+        server = make_server(num)
+        sent = dict.fromkeys(server.players, 0)
+        msg = proto.Message()
+        msg.type = proto.playerUpdate
+        times = []
+        for tick in range(ticks):
+            for id, player in server.players.items():
+                due = tick + 1 - sent[id]
+                for i in range(rand.choice((0, 0, 1, 2, 3)) if due < 6
+                               else due):
+                    sent[id] += 1
+                    msg.input.id = id
+                    msg.input.right = True
+                    msg.input.time = sent[id] * int(timestep * 1000000)
+                    server.datagramReceived(msg.SerializeToString(),
+                                            player.address)
+            times.append(timed(lambda: server.tick(timestep), 1))
+        queued = sum(len(p.inputs) for p in server.players.itervalues())
+        print '%8i %12.1f %12.1f %12.2f' % (
+            num, sum(times) / ticks * 10**6, max(times) * 10**6,
+            float(queued) / num)
+
+def route(rounds=100):
+    """datagramReceived throughput for inputs of players and spectators"""
+    print '%8s %12s %12s' % ('sessions', 'us/packet', 'packets/s')
+    for num in (32, 64, 128):
+        server = make_server(num)
+        #half of the sessions spectate
+        for id in server.players.keys()[::2]:
+            server.spec_player(id)
+        packets = []
+        for player in server.allgen():
+            msg = proto.Message()
+            msg.type = proto.playerUpdate
+            msg.input.id = player.id
+            msg.input.time = 1
+            packets.append((msg.SerializeToString(), player.address))
+
+        def receive():
+            for datagram, address in packets:
+                server.datagramReceived(datagram, address)
+        dt = timed(receive, rounds) / num
+        print '%8i %12.2f %12i' % (num, dt * 10**6, 1 / dt)
+
+def reliable(ticks=180):
+    """AckManager.update with many messages in flight, peers acknowledge
+    every message but the first one of each peer after 50ms. 16 messages
+    per peer, the window takes no more"""
+    print '%8s %12s %12s %12s %12s' % ('messages', 'us/update', 'retrans',
+                                       'expired', 'inflight')
+    for num in (1000, 5000, 20000):
+        ackman = AckManager()
+        ackman.receive_send(Transport().write)
+        msg = proto.Message()
+        msg.type = proto.chat
+        peers = num // 16
+        for i in range(num):
+            address = ('127.0.0.1', 10000 + i % peers)
+            ackman.send_rel(msg, address)
+        ack = proto.Message()
+        ack.type = proto.ackResponse
+        duration = 0
+        for tick in range(ticks):
+            if tick == 3:
+                for i in range(peers):
+                    address = ('127.0.0.1', 10000 + i)
+                    latest = ackman.sequences[address]
+                    while latest > 1:
+                        ack.ackLatest = latest
+                        ack.ackBits = (1 << min(32, latest - 2)) - 1
+                        ackman.receive_acks(ack, address)
+                        latest -= 33
+            duration += timed(lambda: ackman.update(1 / 60.), 1)
+        print '%8i %12.1f %12i %12i %12i' % (
+            num, duration / ticks * 10**6, ackman.retransmits,
+            ackman.expired, ackman.inflight)
+
+def acks(ticks=400):
+    """reliable messages from server to client, every 4th datagram is
+    duplicated. the client sends an input every third tick"""
+    print '%8s %10s %10s %10s %10s %10s' % ('msg/tick', 'reliable',
+                                            'processed', 'dropped',
+                                            'ack dgrams', 'inflight')
+    for rate in (.25, 1, 4):
+        server, client = AckManager(), AckManager()
+        wire = []
+        count = [0]
+
+        def transmit(datagram, address):
+            count[0] += 1
+            wire.append(datagram)
+            if count[0] % 4 == 0:
+                wire.append(datagram)
+        server.receive_send(transmit)
+        acks = Transport()
+        client.receive_send(lambda datagram, address: (
+            acks.write(datagram, address),
+            server.receive_acks(parse(datagram), 'client')))
+        msg = proto.Message()
+        msg.type = proto.chat
+        processed = sent = 0
+        for tick in range(ticks):
+            for i in range(int((tick + 1) * rate) - int(tick * rate)):
+                server.send_rel(msg, 'client')
+                sent += 1
+            for datagram in wire:
+                if client.receive(parse(datagram), 'server'):
+                    processed += 1
+            del wire[:]
+            if tick % 3 == 0:
+                data = client.piggyback('server')
+                if data:
+                    server.receive_acks(parse(msg.SerializeToString() + data),
+                                        'client')
+            client.update(timestep)
+            server.update(timestep)
+        print '%8.2f %10i %10i %10i %10i %10i' % (
+            rate, sent, processed, client.duplicates, acks.datagrams,
+            len(server.acks))
+
+
+def projectiles(ticks=120):
+    """projectile datagrams per second with grenades and blaster shots
+    spawned every tick, against sending every projectile every tick"""
+    print '%8s %10s %12s %12s' % ('players', 'in flight', 'streamed/s',
+                                  'events/s')
+    rand = random.Random(1)
+    for num in (2, 8, 32):
+        server = make_server(num)
+        streamed = 0
+        inflight = 0
+        for tick in range(ticks):
+            for i in range(2):
+                cls = (NadeProjectile, BlasterProjectile)[i]
+                direc = vec2(rand.uniform(-1, 1), rand.uniform(0, 1))
+                direc = direc / direc.mag()
+                proj = cls(id=1, x=rand.uniform(200, 2600),
+                           y=rand.uniform(100, 900), width=15, height=10,
+                           vel=(1000, 1200)[i], direc=direc,
+                           lifetime=(2.5, 10)[i])
+                proj.dispatch_proj = server.projectiles.add_projectile
+                server.projectiles.add_projectile(proj)
+            server.projectiles.update(timestep)
+            inflight += len(server.projectiles)
+            streamed += len(server.projectiles) * num
+        seconds = ticks * timestep
+        print '%8i %10i %12i %12i' % (
+            num, inflight / ticks, streamed / seconds,
+            server.transport.datagrams / seconds)
+
+
+def synthetic(num, rand):
+    """num platforms and walls on a map that grows with num"""
+    side = 600 * num ** .5
+    rects = []
+    for i in range(num):
+        if rand.random() < .7:
+            width, height = rand.uniform(100, 800), rand.uniform(20, 60)
+        else:
+            width, height = rand.uniform(20, 60), rand.uniform(100, 600)
+        rects.append(AABB(rand.uniform(0, side), rand.uniform(0, side / 2),
+                          width, height))
+    return rects
+
+
+def grid(queries=20000):
+    """map candidates for player sized rects, QuadTree.retrieve against
+    StaticGrid.retrieve and the allocation free StaticGrid.query"""
+    print '%10s %8s %10s %10s %10s %10s %10s' % (
+        'map', 'rects', 'tree us', 'tree cand', 'grid us', 'grid cand',
+        'query us')
+    rand = random.Random(1)
+    maps = [('phrantic', Map('phrantic', server=True).solids)]
+    maps += [('synth%i' % num, synthetic(num, rand))
+             for num in (250, 1000, 4000)]
+    for name, rects in maps:
+        max_x = max(rect.pos.x + rect.width for rect in rects)
+        max_y = max(rect.pos.y + rect.height for rect in rects)
+        min_y = min(rect.pos.y for rect in rects)
+        tree = quadtree(rects)
+        index = StaticGrid(rects)
+        probes = [AABB(rand.uniform(0, max_x), rand.uniform(min_y, max_y),
+                       32, 72) for i in range(queries)]
+        tree_cand = sum(len(tree.retrieve([], p)) for p in probes)
+        grid_cand = sum(len(index.retrieve([], p)) for p in probes)
+        start = time()
+        for probe in probes:
+            tree.retrieve([], probe)
+        tree_us = (time() - start) / queries * 10**6
+        start = time()
+        for probe in probes:
+            index.retrieve([], probe)
+        grid_us = (time() - start) / queries * 10**6
+        bounds = [(p.pos.x - reach, p.pos.y - reach, p.pos.x + 32 + reach,
+                   p.pos.y + 72 + reach) for p in probes]
+        query = index.query
+        start = time()
+        for x0, y0, x1, y1 in bounds:
+            query(x0, y0, x1, y1)
+        query_us = (time() - start) / queries * 10**6
+        print '%10s %8i %10.2f %10.1f %10.2f %10.1f %10.2f' % (
+            name, len(rects), tree_us, float(tree_cand) / queries, grid_us,
+            float(grid_cand) / queries, query_us)
+
+
+def sweep_each(rect, rects, dt):
+    """what Player.collide did before sweep_all, a sweep per rect and
+    scans for the earliest contacts"""
+    cols = [col for col in [rect.sweep(obj, dt) for obj in rects] if col]
+    try:
+        xt = min(col[1] for col in cols if col[0].x != 0)
+        xnorm, yt_ent = [(col[0].x, col[2]) for col in cols
+                         if col[1] == xt and col[0].x != 0][0]
+    except ValueError:
+        xt, xnorm, yt_ent = dt, 0., 0.
+    try:
+        yt = min(col[1] for col in cols if col[0].y != 0)
+        ynorm, xt_ent = [(col[0].y, col[2]) for col in cols
+                         if col[1] == yt and col[0].y != 0][0]
+    except ValueError:
+        yt, ynorm, xt_ent = dt, 0., 0.
+    return xt, xnorm, yt_ent, yt, ynorm, xt_ent
+
+
+def sweep(queries=5000):
+    """player collision against map candidates from the grid and other
+    players, a sweep call per candidate against one sweep_all call"""
+    print '%8s %10s %12s %12s %8s %10s' % ('players', 'candidates',
+                                           'each us', 'all us', 'speedup',
+                                           'same')
+    rand = random.Random(1)
+    index = Map('phrantic', server=True).grid
+    for num in (2, 8, 32):
+        cases = []
+        for i in range(queries):
+            rect = AABB(rand.uniform(100, 2700), rand.uniform(0, 1000), 32,
+                        72, isplayer=True)
+            rect.vel = vec2(rand.uniform(-500, 500), rand.uniform(-900, 700))
+            rects = [AABB(rect.pos.x + rand.uniform(-300, 300),
+                          rect.pos.y + rand.uniform(-300, 300), 32, 72,
+                          isplayer=True) for j in range(num - 1)]
+            cases.append((rect, index.retrieve(rects, rect)))
+        same = all(sweep_each(rect, rects, timestep) ==
+                   rect.sweep_all(rects, timestep) for rect, rects in cases)
+        start = time()
+        for rect, rects in cases:
+            sweep_each(rect, rects, timestep)
+        each = (time() - start) / queries
+        start = time()
+        for rect, rects in cases:
+            rect.sweep_all(rects, timestep)
+        both = (time() - start) / queries
+        print '%8i %10.1f %12.2f %12.2f %8.1f %10s' % (
+            num, sum(len(c[1]) for c in cases) / float(queries),
+            each * 10**6, both * 10**6, each / both, same)
+
+
+def broadphase(ticks=50):
+    """candidates for player movement, projectiles and item pickups with
+    players spread 300px apart, every entity against every player against
+    the broadphase"""
+    print '%8s %10s %10s %10s %10s %10s' % (
+        'players', 'brute us', 'sap us', 'update us', 'brute cand',
+        'sap cand')
+    rand = random.Random(1)
+    for num in (8, 32, 128, 512):
+        server = make_server(num)
+        scatter(server, 0, 300 * num ** .5 * 2 ** .5)
+        players = server.players.values()
+        items = list(server.map.items)
+        projs = [BlasterProjectile(id=0, x=player.rect.center.x +
+                                   rand.uniform(-200, 200),
+                                   y=player.rect.center.y +
+                                   rand.uniform(-200, 200), width=15,
+                                   height=10, vel=1200, direc=vec2(1, 0))
+                 for player in players]
+
+        def brute():
+            cand = 0
+            for player in players:
+                cand += len([other.rect for other in players
+                             if other is not player])
+            for proj in projs:
+                cand += len(list(server.players.itervalues()))
+            for player in players:
+                cand += len([item for item in items
+                             if player.rect.overlaps(item)])
+            return cand
+
+        def swept():
+            cand = 0
+            for player in players:
+                cand += len(server.broadphase.near([], player.rect,
+                                                   sap.players,
+                                                   exclude=player))
+            for proj in projs:
+                cand += len(list(server.projectiles.near(proj)))
+            cand += len(server.broadphase.pairs(sap.players, sap.items))
+            return cand
+        print '%8i %10.1f %10.1f %10.1f %10i %10i' % (
+            num, timed(brute, ticks) * 10**6, timed(swept, ticks) * 10**6,
+            timed(server.broadphase.update, ticks) * 10**6, brute(),
+            swept())
+
+
+def collide_walk(line, quadtree, players, id):
+    """what Line.collide did before the raycaster, walks the quadtree nodes
+    along the line until one holds a map hit and sweeps every player"""
+    mapcolls = []
+    rect = AABB(*line.pos, width=0, height=0)
+    bnd = quadtree.retrieve_bound(rect)
+    while len(mapcolls) == 0:
+        for rct in quadtree.retrieve([], rect):
+            response = line.sweep(rct)
+            if response:
+                mapcolls.append(response[0])
+        if len(mapcolls) == 0:
+            try:
+                enter, exit = line.sweep(bnd)
+            except TypeError:
+                break
+            rect.pos += line.unit * (exit + 1)
+            bound = quadtree.retrieve_bound(rect)
+            if bound == bnd:
+                break
+            bnd = bound
+    mapcoll = min(mapcolls) if mapcolls else float('Inf')
+    p_resp = [(line.sweep(pl.rect), pl.id) for pl in players if pl.id != id]
+    try:
+        playercoll = min(p[0][0] for p in p_resp if p[0] is not False)
+    except ValueError:
+        playercoll = float('Inf')
+    coll = min(mapcoll, playercoll)
+    if coll == float('Inf'):
+        return False
+    elif mapcoll < playercoll:
+        return mapcoll, False
+    return playercoll, [r[1] for r in p_resp if r[0] and
+                        r[0][0] == playercoll][0]
+
+
+def collide_all(line, rects, players, shooter):
+    """reference hit, every map rect and player swept"""
+    mapcoll = min([col[0] for col in map(line.sweep, rects) if col] +
+                  [line.length])
+    hit = None
+    for player in players:
+        col = line.sweep(player.rect)
+        if player is not shooter and col and col[0] <= mapcoll:
+            mapcoll, hit = col[0], player
+    return mapcoll, hit
+
+
+def hitscan(shots=2000):
+    """lightning gun rays and shotgun fans of 6 pellets, the quadtree walk
+    with a sweep per player against the raycaster. same compares the
+    raycaster to sweeping every map rect and player"""
+    print '%8s %10s %10s %12s %10s %8s' % ('players', 'walk us', 'cast us',
+                                          'pellets us', 'fan us', 'same')
+    rand = random.Random(1)
+    for num in (2, 16, 64):
+        server = make_server(num)
+        rects = server.map.solids
+        players = server.players.values()
+        for player in players:
+            x, y = rand.uniform(100, 2700), rand.uniform(0, 1000)
+            player.state.pos.x, player.state.pos.y = x, y
+            player.rect.update(x, y)
+        server.broadphase.update()
+        tree = quadtree(rects)
+        caster = server.projectiles.raycaster
+        shots_, lines, fans = [], [], []
+        for i in range(shots):
+            shooter = rand.choice(players)
+            pos = shooter.rect.center
+            dx, dy = rand.uniform(-1, 1), rand.uniform(-1, 1)
+            dirs = [(dx, dy_) for dy_ in spread(dx, dy, angle=0.1, num=6)]
+            shots_.append((shooter, pos, dirs))
+            lines.append((shooter, Line(pos.x, pos.y, dx, dy, 800)))
+            fans.append((shooter, [Line(pos.x, pos.y, dx_, dy_, 3000)
+                                   for dx_, dy_ in dirs]))
+        #the grid keeps the rect edges as floats, distances differ slightly
+        same = True
+        for shooter, line in lines:
+            dist, hit = caster.cast(line.pos.x, line.pos.y, line.dir.x,
+                                    line.dir.y, 800, shooter)
+            ref = collide_all(line, rects, players, shooter)
+            same = same and hit is ref[1] and abs(dist - ref[0]) < 1e-3
+        for (shooter, pos, dirs), (shooter, pellets) in zip(shots_, fans):
+            dists, hits = caster.fan(pos.x, pos.y, dirs, 3000, shooter)
+            refs = [collide_all(line, rects, players, shooter)
+                    for line in pellets]
+            same = same and all(abs(dist - ref[0]) < 1e-3
+                                for dist, ref in zip(dists, refs))
+            hit = set(r[1] for r in refs if r[1])
+            same = same and set(hits) == hit and all(
+                hits[h][0] == [r[1] for r in refs].count(h) and
+                abs(hits[h][1] - min(r[0] for r in refs if r[1] is h)) < 1e-3
+                for h in hit)
+        start = time()
+        for shooter, line in lines:
+            collide_walk(line, tree, players, shooter.id)
+        walk = (time() - start) / shots
+        start = time()
+        for shooter, line in lines:
+            caster.cast(line.pos.x, line.pos.y, line.dir.x, line.dir.y, 800,
+                        shooter)
+        cast = (time() - start) / shots
+        start = time()
+        for shooter, pellets in fans:
+            for line in pellets:
+                collide_walk(line, tree, players, shooter.id)
+        pellets = (time() - start) / shots
+        start = time()
+        for shooter, pos, dirs in shots_:
+            caster.fan(pos.x, pos.y, dirs, 3000, shooter)
+        fan = (time() - start) / shots
+        print '%8i %10.2f %10.2f %12.2f %10.2f %8s' % (
+            num, walk * 10**6, cast * 10**6, pellets * 10**6, fan * 10**6,
+            same)
+
+
+def integrate(ticks=40):
+    """tick time of the projectile update with grenades and blaster shots
+    in flight among 8 players, and the time per projectile"""
+    print '%10s %10s %10s' % ('in flight', 'tick us', 'proj us')
+    for num in (16, 64, 256, 1024):
+        rand = random.Random(1)
+        random.seed(1)
+        server = make_server(8)
+        scatter(server, 0, 2000)
+        manager = server.projectiles
+        for i in range(num):
+            cls = (NadeProjectile, BlasterProjectile)[i % 2]
+            direc = vec2(rand.uniform(-1, 1), rand.uniform(0, 1))
+            direc = direc / direc.mag()
+            proj = cls(id=1, x=rand.uniform(200, 2600),
+                       y=rand.uniform(100, 900), width=15, height=10,
+                       vel=(1000, 1200)[i % 2], direc=direc, lifetime=5)
+            proj.dispatch_proj = manager.add_projectile
+            manager.add_projectile(proj)
+        duration, flying = 0, 0
+        for tick in range(ticks):
+            flying += len(manager)
+            duration += timed(lambda: manager.update(timestep), 1)
+        print '%10i %10.1f %10.2f' % (num, duration / ticks * 10**6,
+                                      duration / flying * 10**6)
+
+
+def physics(steps=4000):
+    """physics steps per second of a player running and jumping around the
+    map, as the server runs inputs, with the snapshot entry packed, and as
+    the client replays moves, with a copy of the state per step"""
+    print '%12s %12s' % ('server /s', 'replay /s')
+    server = make_server(1)
+    id, player = server.players.items()[0]
+    inputs = []
+    for i in range(steps):
+        inpt = proto.Input()
+        inpt.id = id
+        inpt.time = (i + 1) * int(timestep * 1000000)
+        inpt.right = i % 160 < 100
+        inpt.left = i % 160 >= 120
+        inpt.up = i % 20 < 8
+        inputs.append(inpt)
+    start = time()
+    for inpt in inputs:
+        server.run_input(id, inpt)
+    serve = steps / (time() - start)
+    state = player.state.copy()
+    start = time()
+    for inpt in inputs:
+        player.update(timestep, server.map.grid.retrieve([], player.rect),
+                      state, inpt)
+        state = state.copy()
+    replay = steps / (time() - start)
+    print '%12i %12i' % (serve, replay)
+
+
+def record(steps, seed):
+    """input stream of a player mashing keys at a jittered frame rate, with
+    deaths, holds and wall contacts thrown in like the gameplay sets them"""
+    rand = random.Random(seed)
+    stream, keys = [], (False, False, False)
+    for i in range(steps):
+        if rand.random() < .1:
+            keys = (rand.random() < .5, rand.random() < .3,
+                    rand.random() < .4)
+        inpt = proto.Input()
+        inpt.right, inpt.left, inpt.up = keys
+        event = None
+        if rand.random() < .02:
+            event = rand.choice(('isDead', 'alive', 'hold', 'onLeftWall',
+                                 'onRightWall'))
+        stream.append((timestep * rand.uniform(.5, 1.5), inpt, event))
+    return stream
+
+
+def replay(movement, stream, direction):
+    """steps a fresh player through the stream with movement, returns the
+    steps per second and the packed pos, vel and conditions of every step"""
+    random.seed(1)
+    server = make_server(1)
+    id, player = server.players.items()[0]
+    player.move = movement(*player.state.pos)
+    state = player.state
+    state.conds.direction = direction
+    trace, duration = [], 0
+    for dt, inpt, event in stream:
+        if event == 'isDead':
+            state.isDead = True
+        elif event == 'alive':
+            state.isDead = False
+        elif event == 'hold':
+            state.conds.hold = True
+        elif event:
+            state.set_cond(event)
+        rectgen = server.rectgen(id)
+        start = time()
+        player.move.advance(dt, state, inpt, player.rect, rectgen)
+        duration += time() - start
+        trace.append(struct.pack('4fI', state.pos.x, state.pos.y,
+                                 state.vel.x, state.vel.y, state.conds.bits))
+    return len(stream) / duration, trace
+
+
+def kernel(steps=3000, streams=8):
+    """the compiled movement against PyMovement over recorded input streams
+    in all four gravity directions. pos, vel and conditions have to match
+    bit for bit after every step, exits with 1 at the first that does not
+    or when cmovement is not built"""
+    if cMovement is None:
+        print 'cmovement is not built'
+        sys.exit(1)
+    print '%8s %10s %10s %8s' % ('stream', 'python /s', 'kernel /s',
+                                 'speedup')
+    for seed in range(streams):
+        stream = record(steps, seed)
+        ref, ref_trace = replay(PyMovement, stream, seed % 4)
+        fast, trace = replay(cMovement, stream, seed % 4)
+        for step, (want, got) in enumerate(zip(ref_trace, trace)):
+            if want != got:
+                print 'stream %i diverges at step %i: %r != %r' % (
+                    seed, step, struct.unpack('4fI', got),
+                    struct.unpack('4fI', want))
+                sys.exit(1)
+        print '%8i %10i %10i %8.1f' % (seed, ref, fast, fast / ref)
+
+
+def garbage(ticks=400):
+    """cvec2 created per server tick with 8 players running, jumping and
+    firing the weapons in turn, and per replayed prediction step. counts
+    only with cvec2 built with COUNT_ALLOCATIONS=1, see build_libs.py"""
+    if allocations is None:
+        print 'cvec2 counts nothing, rebuild it with COUNT_ALLOCATIONS=1'
+        return
+    print '%8s %12s %12s %12s' % ('players', 'vecs/tick', 'us/tick',
+                                  'vecs/step')
+    random.seed(1)
+    server = make_server(8)
+    scatter(server, 0, 1200)
+    msg = proto.Message()
+    msg.type = proto.playerUpdate
+    created, duration = 0, 0
+    for tick in range(ticks):
+        for id, player in server.players.items():
+            msg.input.id = id
+            msg.input.time = (tick + 1) * int(timestep * 1000000)
+            msg.input.right = (tick + id * 20) % 160 < 100
+            msg.input.left = (tick + id * 20) % 160 >= 120
+            msg.input.up = (tick + id) % 20 < 8
+            msg.input.att = tick % 4 == 0
+            msg.input.mx, msg.input.my = player.state.pos.x + 300, 200
+            msg.input.switch = (tick // 40 + id) % 5 + 1 if (
+                tick % 40 == 0) else proto.no_switch
+            server.datagramReceived(msg.SerializeToString(), player.address)
+        start, count = time(), allocations()
+        server.tick(timestep)
+        created += allocations() - count
+        duration += time() - start
+    id, player = server.players.items()[0]
+    state, count = player.state.copy(), allocations()
+    for tick in range(ticks):
+        player.predict_step(timestep, server.rectgen(id), state, msg.input)
+    print '%8i %12.1f %12.1f %12.1f' % (
+        len(server.players), float(created) / ticks,
+        duration / ticks * 10**6, float(allocations() - count) / ticks)
+
+
+def tiled(boxes, size):
+    """boxes cut into tiles of at most size, like a map drawn in tiles"""
+    tiles = []
+    for x, y, width, height in boxes:
+        for i in range(int(-(-width // size))):
+            for j in range(int(-(-height // size))):
+                tiles.append((x + i * size, y + j * size,
+                              min(size, width - i * size),
+                              min(size, height - j * size)))
+    return tiles
+
+
+def compact(queries=20000):
+    """collision rects of every map in maps/ as drawn and merged into
+    solids, with the grid candidates of player sized rects. the tiled rows
+    draw phrantic in 50px tiles"""
+    print '%14s %8s %8s %10s %10s %10s' % ('map', 'rects', 'solids',
+                                           'cand', 'merged', 'merge ms')
+    rand = random.Random(1)
+    maps = []
+    for path in sorted(glob.glob(os.path.join('maps', '*.svg'))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        rects = Map(name, server=True).rects
+        maps.append((name, [(r.pos.x, r.pos.y, r.width, r.height)
+                            for r in rects]))
+    maps.append(('phrantic/50', tiled(dict(maps)['phrantic'], 50)))
+    for name, boxes in maps:
+        if not boxes:
+            print '%14s %8i' % (name, 0)
+            continue
+        start = time()
+        merged = mapcompiler.merge(boxes)
+        duration = time() - start
+        before = [AABB(*box) for box in boxes]
+        after = [AABB(*box) for box in merged]
+        min_x, min_y, max_x, max_y = mapcompiler.bounds(before)
+        probes = [AABB(rand.uniform(min_x, max_x), rand.uniform(min_y, max_y),
+                       32, 72) for i in range(queries)]
+        cand = [sum(len(index.retrieve([], p)) for p in probes)
+                for index in (StaticGrid(before), StaticGrid(after))]
+        print '%14s %8i %8i %10.2f %10.2f %10.2f' % (
+            name, len(boxes), len(merged), float(cand[0]) / queries,
+            float(cand[1]) / queries, duration * 1000)
+
+
+def repeated(boxes, times):
+    """boxes copied times by times side by side, a large custom map"""
+    min_x, min_y, max_x, max_y = mapcompiler.bounds([AABB(*b) for b in boxes])
+    width, height = max_x - min_x, max_y - min_y
+    return [(x + i * width, y + j * height, w, h) for x, y, w, h in boxes
+            for i in range(times) for j in range(times)]
+
+
+def cull(frames=5000):
+    """map rects drawn per frame without culling and from the chunks the
+    view overlaps, for cameras all over each map at scale 1 and the closest
+    zoom. the 4x4 row is phrantic repeated into a map 16 times as large"""
+    half_height = 800 * math.tan(30 * math.pi / 360.) + 100
+    half_width = (half_height - 100) * 16 / 9. + 100
+    print '%12s %8s %8s %10s %10s %10s' % ('map', 'rects', 'chunks',
+                                           'drawn', 'chunks/f', 'query us')
+    rand = random.Random(1)
+    maps = []
+    for path in sorted(glob.glob(os.path.join('maps', '*.svg'))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        rects = Map(name, server=True).rects
+        maps.append((name, [(r.pos.x, r.pos.y, r.width, r.height)
+                            for r in rects]))
+    maps.append(('phrantic4x4', repeated(dict(maps)['phrantic'], 4)))
+    for name, boxes in maps:
+        if not boxes:
+            print '%12s %8i' % (name, 0)
+            continue
+        groups = chunks(boxes)
+        grid = StaticGrid([AABB(*box) for members, box in groups], chunk)
+        min_x, min_y, max_x, max_y = mapcompiler.bounds(
+            [AABB(*box) for box in boxes])
+        views = []
+        for i in range(frames):
+            x, y = rand.uniform(min_x, max_x), rand.uniform(min_y, max_y)
+            views.append((x - half_width, y - half_height,
+                          x + half_width, y + half_height))
+        drawn = submitted = 0
+        start = time()
+        for view in views:
+            submitted += grid.query(*view)
+        duration = time() - start
+        for view in views:
+            n = grid.query(*view)
+            drawn += sum(len(groups[grid.found[i]][0]) for i in range(n))
+        print '%12s %8i %8i %10.1f %10.2f %10.2f' % (
+            name, len(boxes), len(groups), float(drawn) / frames,
+            float(submitted) / frames, duration / frames * 10**6)
+
+
+def mapload(loads=20):
+    """Map load time of every map in maps/, compiling the svg and writing
+    maps/name.mapc, against loading the compiled file. same compares the
+    rects, solids, spawns, items and grid index of both"""
+    print '%10s %12s %12s %8s %8s' % ('map', 'svg ms', 'mapc ms',
+                                      'speedup', 'same')
+    for path in sorted(glob.glob(os.path.join('maps', '*.svg'))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        compiled = os.path.splitext(path)[0] + '.mapc'
+        maps, times = [], []
+        for cached in (False, True):
+            duration = 0
+            for i in range(loads):
+                if not cached and os.path.exists(compiled):
+                    os.remove(compiled)
+                start = time()
+                maps.append(Map(name, server=True))
+                duration += time() - start
+            times.append(duration / loads * 1000)
+        same = len(set(repr((
+            [tuple(r.pos) + (r.width, r.height) for r in m.rects],
+            [tuple(r.pos) + (r.width, r.height) for r in m.solids],
+            [tuple(s) for s in getattr(m, 'spawns', [])],
+            [(type(i).__name__, tuple(i.pos), i.width, i.height)
+             for i in m.items.items],
+            m.grid and (list(m.grid.index()[0]), list(m.grid.index()[1]))))
+            for m in maps)) == 1
+        print '%10s %12.2f %12.2f %8.1f %8s' % (name, times[0], times[1],
+                                                times[0] / times[1], same)
+
+
+def modelload(loads=10):
+    """load time of the player model, parsing metatest.dae against loading
+    graphics/metatest.daec. same compares every array of both and the
+    joint hierarchy"""
+    path = os.path.join('graphics', 'metatest.dae')
+    compiled = os.path.splitext(path)[0] + '.daec'
+    if os.path.exists(compiled):
+        os.remove(compiled)
+    models, times = [], []
+    for load in (parsedae.parse_dae, modelcompiler.load):
+        start = time()
+        for i in range(loads):
+            models.append(load(path, 0.94))
+        times.append((time() - start) / loads * 1000)
+    same = len(set(repr(model[:4] + model[5:] + (
+        [(j.index, j.len) for j in modelcompiler.preorder(model[4])], ))
+        for model in models)) == 1
+    print '%12s %12s %8s %10s %8s' % ('dae ms', 'daec ms', 'speedup',
+                                      'daec kb', 'same')
+    print '%12.2f %12.2f %8.1f %10.1f %8s' % (
+        times[0], times[1], times[0] / times[1],
+        os.path.getsize(compiled) / 1024., same)
+
+
+def parse(datagram):
+    msg = proto.Message()
+    msg.ParseFromString(datagram)
+    return msg
+
+benches = {'snapshot': snapshot, 'delta': delta, 'interest': interest,
+           'jitter': jitter, 'route': route, 'reliable': reliable,
+           'acks': acks, 'projectiles': projectiles, 'grid': grid,
+           'sweep': sweep, 'broadphase': broadphase,
+           'hitscan': hitscan, 'integrate': integrate,
+           'physics': physics, 'kernel': kernel,
+           'garbage': garbage, 'compact': compact,
+           'mapload': mapload, 'modelload': modelload, 'cull': cull}
+
+if __name__ == '__main__':
+    for name in sys.argv[1:] or sorted(benches):
+        print name
+        benches[name]()
@@ -0,0 +1,241 @@
+from twisted.internet import reactor
+from twisted.internet.protocol import DatagramProtocol
+from twisted.internet.task import LoopingCall
+from network_utils import protocol_pb2 as proto
+from network_utils import timestep
+from network_utils.reliable import AckManager
+from network_utils.snapshot import SnapshotReceiver
+from time import time
+import argparse
+import random
+
+"""usage: python bots.py [-h] [--port PORT] [-n NUM] [--pattern PATTERN]
+                         [--join] [--rate RATE] [--report SECONDS] [--each]
+                         [host]
+headless clients that put load on a running server.py, no gl needed.
+prints per client snapshot rate, loss, bandwidth, round trip time and the
+latency from sending an input to receiving the update that includes it"""
+
+
+def idle(bot, t):
+    pass
+
+
+def strafe(bot, t):
+    inpt = bot.input
+    inpt.right = int(t + bot.num * .3) % 2 == 0
+    inpt.left = not inpt.right
+    inpt.up = int(t * 3) % 4 == 0
+    inpt.mx, inpt.my = bot.aim(t)
+
+
+def chaos(bot, t):
+    """new random keys every half second, shooting now and then"""
+    if t - bot.changed < .5:
+        return
+    bot.changed = t
+    rand = bot.rand
+    inpt = bot.input
+    inpt.right = rand.random() < .4
+    inpt.left = not inpt.right and rand.random() < .6
+    inpt.up = rand.random() < .3
+    inpt.down = rand.random() < .1
+    inpt.att = rand.random() < .3
+    inpt.mx, inpt.my = bot.aim(t)
+
+patterns = {'idle': idle, 'strafe': strafe, 'random': chaos}
+
+
+class Bot(DatagramProtocol):
+    """headless client. connects, joins if asked to, and sends inputs every
+    timestep while playing and its view every 6 timesteps while
+    spectating, like the real client"""
+    def __init__(self, num, host, pattern, join, rand):
+        self.num = num
+        self.host = host
+        self.pattern = pattern
+        self.join = join
+        self.rand = rand
+        self.ackman = AckManager()
+        self.snapshots = SnapshotReceiver()
+        self.input = proto.Input()
+        self.id = None
+        self.playing = False
+        self.time = 0
+        self.ticks = 0
+        self.changed = 0
+        #input time: wall clock time it was sent at
+        self.sent = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.received = set()
+        self.latencies = []
+
+    def startProtocol(self):
+        self.ackman.receive_send(self.write)
+
+    def write(self, datagram, address):
+        self.bytes_out += len(datagram)
+        self.transport.write(datagram, address)
+
+    def connect(self):
+        msg = proto.Message()
+        msg.type = proto.newPlayer
+        msg.player.chat = 'bot%i' % self.num
+        msg.input.name = self.rand.choice(('blue', 'red', 'green'))
+        msg.input.time = 0
+        self.ackman.send_rel(msg, self.host)
+
+    def state_update(self, state):
+        msg = proto.Message()
+        msg.type = proto.stateUpdate
+        msg.player.id = self.id
+        msg.gameState = state
+        msg.input.id = self.id
+        self.ackman.send_rel(msg, self.host)
+
+    def datagramReceived(self, datagram, address):
+        self.bytes_in += len(datagram)
+        msg = proto.Message()
+        msg.ParseFromString(datagram)
+        if msg.HasField('ackLatest'):
+            self.ackman.receive_acks(msg, address)
+        if msg.HasField('ack') and not self.ackman.receive(msg, address):
+            return
+        if msg.type == proto.connectResponse and self.id is None:
+            self.id = msg.player.id
+            if self.join:
+                self.state_update(proto.wantsJoin)
+        elif msg.type == proto.stateUpdate and msg.player.id == self.id:
+            if msg.gameState == proto.wantsJoin:
+                self.playing = True
+                self.state_update(proto.isReady)
+            elif msg.gameState == proto.goesSpec:
+                self.playing = False
+        elif msg.type == proto.snapshot:
+            self.received.add(msg.sequence)
+            for entry in self.snapshots.receive(msg):
+                if entry.player.id == self.id:
+                    sent = self.sent.pop(entry.player.time, None)
+                    if sent is not None:
+                        self.latencies.append(time() - sent)
+
+    def aim(self, t):
+        return 500 + 400 * self.rand.random(), 300 + 200 * self.rand.random()
+
+    def tick(self, t):
+        self.ackman.update(timestep)
+        if self.id is None:
+            return
+        self.ticks += 1
+        if not self.playing and self.ticks % 6:
+            return
+        self.time += int(timestep * 1000000.)
+        msg = proto.Message()
+        msg.type = proto.playerUpdate
+        if self.playing:
+            self.pattern(self, t)
+            msg.input.CopyFrom(self.input)
+            self.sent[self.time] = time()
+            if len(self.sent) > 200:
+                for key in sorted(self.sent)[:100]:
+                    del self.sent[key]
+        else:
+            msg.input.follow = 0
+            msg.input.mx, msg.input.my = self.aim(t)
+        msg.input.id = self.id
+        msg.input.time = self.time
+        msg.baseline = self.snapshots.baseline
+        self.write(msg.SerializeToString() + self.ackman.piggyback(self.host),
+                   self.host)
+
+    def stats(self, seconds):
+        """snapshots/s, loss, kB/s in and out, rtt and latency in ms"""
+        got = self.received
+        expected = max(got) - min(got) + 1 if got else 0
+        loss = 1 - float(len(got)) / expected if expected else 0
+        peer = self.ackman.peers.get(self.host)
+        rtt = peer[0] * 1000 if peer else 0
+        lat = self.latencies
+        latency = sum(lat) / len(lat) * 1000 if lat else 0
+        return (len(got) / seconds, loss * 100,
+                self.bytes_in / 1024. / seconds,
+                self.bytes_out / 1024. / seconds, rtt, latency)
+
+
+class Swarm(object):
+    """runs the bots and reports every few seconds"""
+    def __init__(self, bots, report, each):
+        super(Swarm, self).__init__()
+        self.bots = bots
+        self.report_t = report
+        self.each = each
+        self.start = time()
+        self.last = self.start
+
+    def tick(self):
+        t = time() - self.start
+        for bot in self.bots:
+            bot.tick(t)
+
+    def report(self):
+        now = time()
+        seconds = now - self.last
+        self.last = now
+        header = '%6s %8s %8s %8s %8s %8s %8s' % (
+            'bot', 'snap/s', 'loss %', 'kB/s in', 'kB/s out', 'rtt ms',
+            'lat ms')
+        rows = [(bot, bot.stats(seconds)) for bot in self.bots if bot.id]
+        for bot in self.bots:
+            bot.reset_stats()
+        playing = sum(1 for bot, row in rows if bot.playing)
+        print '%.0fs: %i/%i connected, %i playing' % (
+            now - self.start, len(rows), len(self.bots), playing)
+        if not rows:
+            return
+        print header
+        if self.each:
+            for bot, row in rows:
+                print '%6i %8.1f %8.2f %8.1f %8.1f %8.1f %8.1f' % (
+                    (bot.num, ) + row)
+        columns = zip(*[row for bot, row in rows])
+        for name, func in (('min', min), ('max', max),
+                           ('mean', lambda c: sum(c) / len(c))):
+            print '%6s %8.1f %8.2f %8.1f %8.1f %8.1f %8.1f' % (
+                (name, ) + tuple(func(column) for column in columns))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='headless load generator')
+    parser.add_argument('host', nargs='?', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8961)
+    parser.add_argument('-n', '--num', type=int, default=16,
+                        help='number of bots')
+    parser.add_argument('--pattern', choices=sorted(patterns),
+                        default='random', help='input pattern')
+    parser.add_argument('--join', action='store_true',
+                        help='ask to join the game, the server takes two')
+    parser.add_argument('--rate', type=float, default=20,
+                        help='connects per second, 0 for all at once')
+    parser.add_argument('--report', type=float, default=5,
+                        help='seconds between reports')
+    parser.add_argument('--each', action='store_true',
+                        help='a line per bot in the report')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rand = random.Random(args.seed)
+    host = (args.host, args.port)
+    bots = []
+    for num in range(args.num):
+        bot = Bot(num, host, patterns[args.pattern], args.join,
+                  random.Random(rand.random()))
+        reactor.listenUDP(0, bot)
+        reactor.callLater(num / args.rate if args.rate else 0, bot.connect)
+        bots.append(bot)
+    swarm = Swarm(bots, args.report, args.each)
+    LoopingCall(swarm.tick).start(timestep)
+    LoopingCall(swarm.report).start(args.report, now=False)
+    reactor.run()
@@ -1,19 +1,50 @@
 from distutils.core import setup
 from Cython.Build import cythonize
-from os import path
+from os import path, environ
 
-"""usage: python build_libs.py build_ext --inplace"""
+"""usage: python build_libs.py build_ext --inplace
+with COUNT_ALLOCATIONS=1 in the environment cvec2 counts the vectors it
+creates, for bench.py garbage"""
 
-# cvec2
+count = environ.get('COUNT_ALLOCATIONS', '0') != '0'
+
+# cvec2, always cythonized, the flag is not among what cythonize compares
 setup(
     name="cvec2",
-    ext_modules=cythonize(path.join('player', 'cvec2.pyx')))
+    ext_modules=cythonize(path.join('player', 'cvec2.pyx'),
+                          compile_time_env={'COUNT_ALLOCATIONS': count},
+                          force=True))
+
+# cmstate
+setup(
+    name="cmstate",
+    ext_modules=cythonize(path.join('player', 'cmstate.pyx')))
+
+# cmovement
+setup(
+    name="cmovement",
+    ext_modules=cythonize(path.join('player', 'cmovement.pyx')))
 
 # caabb
 setup(
     name="caabb",
     ext_modules=cythonize(path.join('collision', 'caabb.pyx')))
 
+# grid
+setup(
+    name="grid",
+    ext_modules=cythonize(path.join('collision', 'grid.pyx')))
+
+# sap
+setup(
+    name="sap",
+    ext_modules=cythonize(path.join('collision', 'sap.pyx')))
+
+# raycast
+setup(
+    name="raycast",
+    ext_modules=cythonize(path.join('collision', 'raycast.pyx')))
+
 # vec3
 setup(
     name="vec3",
@@ -0,0 +1,6 @@
+from player.cvec2 cimport cvec2
+
+cdef class cAABB:
+    cdef public cvec2 pos, vel, center
+    cdef public float width, height, hwidth, hheight
+    cdef public object color, isplayer
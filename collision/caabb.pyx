@@ -1,21 +1,18 @@
-from player.cvec2 cimport cvec2
+from player.cvec2 cimport cvec2, new_cvec2
 cimport cython
-from libc.math cimport copysign
+from libc.math cimport copysign, INFINITY
 
 cdef class cAABB:
-    cdef public cvec2 pos, vel, center
-    cdef public float width, height, hwidth, hheight
-    cdef public object color, isplayer
-
     def __init__(self, float x=0, float y=0, float width=0, float height=0,
                  color=(1., 1., 1.), isplayer=False, batch=None):
-        self.pos = cvec2(x, y)
-        self.vel = cvec2(0, 0)
+        self.pos = new_cvec2(x, y)
+        self.vel = new_cvec2(0, 0)
         self.width = width
         self.height = height
         self.hwidth = width / 2.
         self.hheight = height / 2.
-        self.center = cvec2(self.pos.x + self.hwidth, self.pos.y + self.hheight)
+        self.center = new_cvec2(self.pos.x + self.hwidth,
+                                self.pos.y + self.hheight)
         self.color = color
         self.isplayer = isplayer
 
@@ -43,88 +40,40 @@ cdef class cAABB:
         pass
 
     def overlaps(self, cAABB aabb):
-        cdef float distancey, yovr
-        cdef float distancex = self.center.x - aabb.center.x
-        cdef float xovr = abs(distancex) - self.hwidth - aabb.hwidth
-        if xovr < 0:
-            distancey = self.center.y - aabb.center.y
-            yovr = abs(distancey) - self.hheight - aabb.hheight
-            if yovr < 0:
-                return xovr, yovr
+        cdef float xovr, yovr
+        if overlap(self, aabb, &xovr, &yovr):
+            return xovr, yovr
         return False
 
     def collides(self, aabb):
         return self.overlaps(aabb)
 
-    @cython.cdivision(True)
     def sweep(self, cAABB obj, float dt):
-        ovrtest = self.overlaps(obj)
-        if ovrtest:
-            x, y = ovrtest
-            norm = cvec2(float(x > y), -float(y > x))
-            if not obj.isplayer:
-                if norm.x and self.vel.x:
-                    return norm, x / self.vel.x, dt
-                elif norm.y and self.vel.y:
-                    return norm, -y / self.vel.y, dt
-                else:
-                    return norm, -dt, dt
-            elif not self.isplayer:
-                return norm, dt, dt
-        else:
-            #find distance for entry and exit
-            if self.vel.x > 0:
-                xdist_ent = obj.pos.x - self.pos.x - self.width
-                xdist_ext = obj.pos.x + obj.width - self.pos.x
-            else:
-                xdist_ent = obj.pos.x + obj.width - self.pos.x
-                xdist_ext = obj.pos.x - self.pos.x - self.width
-            if self.vel.y > 0:
-                ydist_ent = obj.pos.y - self.pos.y - self.height
-                ydist_ext = obj.pos.y + obj.height - self.pos.y
-            else:
-                ydist_ent = obj.pos.y + obj.height - self.pos.y
-                ydist_ext = obj.pos.y - self.pos.y - self.height
-            #find time for entry and exit
-            if -0.0001 < self.vel.x < 0.0001:
-                xt_ent = -float('Inf')
-                xt_ext = float('Inf')
-                if xdist_ent * xdist_ext >= 0:
-                    return False
-            else:
-                xt_ent = xdist_ent / self.vel.x
-                xt_ext = xdist_ext / self.vel.x
-            if -0.0001 < self.vel.y < 0.0001:
-                yt_ent = -float('Inf')
-                yt_ext = float('Inf')
-                if ydist_ent * ydist_ext >= 0:
-                    return False
-            else:
-                yt_ent = ydist_ent / self.vel.y
-                yt_ext = ydist_ext / self.vel.y
-            enter = max(xt_ent, yt_ent)
-            exit = min(xt_ext, yt_ext)
-            #no coll
-            if enter > exit or (xt_ent < 0
-                                and yt_ent < 0) or xt_ent > dt or yt_ent > dt:
-                return False
-            #normal
-            if xt_ent > yt_ent:
-                if xdist_ent >= 0 and self.vel.x > 0 and yt_ent != 0:
-                    normal = cvec2(1., 0.)
-                elif xdist_ent <= 0 and self.vel.x < 0 and yt_ent != 0:
-                    normal = cvec2(-1., 0.)
-                else:
-                    normal = cvec2(copysign(1., self.vel.x), 0.)
-            else:
-                if ydist_ent < 0:
-                    normal = cvec2(0., -1.)
-                elif ydist_ent > 0:
-                    normal = cvec2(0., 1.)
-                else:
-                    normal = cvec2(0., copysign(1., self.vel.y))
-            # return normal, enter, dt - enter
-            return normal, enter, min(xt_ent, yt_ent)
+        cdef Hit hit
+        if not sweep_hit(self, obj, dt, &hit):
+            return False
+        return new_cvec2(hit.nx, hit.ny), hit.t, hit.t2
+
+    def sweep_all(self, rects, double dt):
+        """sweeps against all rects at once. returns the earliest contact
+        along x and along y as xt, xnorm, xt2, yt, ynorm, yt2 where t2 is
+        the second time sweep returns. without contact on an axis its time
+        is dt and its normal 0"""
+        cdef cAABB obj
+        cdef Hit hit
+        cdef float fdt = dt
+        cdef double xt = dt, xt2 = 0, yt = dt, yt2 = 0
+        cdef float xnorm = 0, ynorm = 0
+        cdef bint xhit = False, yhit = False
+        for obj in rects:
+            if not sweep_hit(self, obj, fdt, &hit):
+                continue
+            #the first of equally early contacts wins, like min did
+            if hit.nx != 0 and (not xhit or hit.t < xt):
+                xt, xnorm, xt2, xhit = hit.t, hit.nx, hit.t2, True
+            if hit.ny != 0 and (not yhit or hit.t < yt):
+                yt, ynorm, yt2, yhit = hit.t, hit.ny, hit.t2, True
+        return xt, xnorm, xt2, yt, ynorm, yt2
 
     def sign_of(self, vec):
         if not isinstance(vec, cvec2):
@@ -133,15 +82,115 @@ cdef class cAABB:
             else:
                 return vec / abs(vec)
         else:
-            return cvec2(self.sign_of(vec.x), self.sign_of(vec.y))
+            return new_cvec2(self.sign_of(vec.x), self.sign_of(vec.y))
 
     def copy(self):
         rct = cAABB(x=self.pos.x, y=self.pos.y, height=self.height,
                    width=self.width, isplayer=self.isplayer, color=self.color)
-        rct.vel = cvec2(*self.vel)
+        rct.vel = self.vel.copy()
         return rct
 
 
+cdef struct Hit:
+    float nx, ny
+    double t, t2
+
+
+cdef inline bint overlap(cAABB a, cAABB b, float *xovr, float *yovr):
+    cdef float distancey
+    cdef float distancex = a.center.x - b.center.x
+    xovr[0] = abs(distancex) - a.hwidth - b.hwidth
+    if xovr[0] < 0:
+        distancey = a.center.y - b.center.y
+        yovr[0] = abs(distancey) - a.hheight - b.hheight
+        if yovr[0] < 0:
+            return True
+    return False
+
+
+@cython.cdivision(True)
+cdef inline bint sweep_hit(cAABB self, cAABB obj, float dt, Hit *hit):
+    """whether self moving with its vel hits obj within dt, fills hit with
+    the normal, the time of entry and the earlier of the axis entry times.
+    distances are floats and times doubles, the same as sweep always
+    computed them"""
+    cdef float x, y, xdist_ent, xdist_ext, ydist_ent, ydist_ext
+    cdef double xt_ent, xt_ext, yt_ent, yt_ext, enter, exit
+    if overlap(self, obj, &x, &y):
+        hit.nx = 1. if x > y else 0.
+        hit.ny = -1. if y > x else -0.
+        if not obj.isplayer:
+            if hit.nx and self.vel.x:
+                hit.t = <double>x / self.vel.x
+            elif hit.ny and self.vel.y:
+                hit.t = -<double>y / self.vel.y
+            else:
+                hit.t = -dt
+            hit.t2 = dt
+            return True
+        elif not self.isplayer:
+            hit.t = hit.t2 = dt
+            return True
+        return False
+    #find distance for entry and exit
+    if self.vel.x > 0:
+        xdist_ent = obj.pos.x - self.pos.x - self.width
+        xdist_ext = obj.pos.x + obj.width - self.pos.x
+    else:
+        xdist_ent = obj.pos.x + obj.width - self.pos.x
+        xdist_ext = obj.pos.x - self.pos.x - self.width
+    if self.vel.y > 0:
+        ydist_ent = obj.pos.y - self.pos.y - self.height
+        ydist_ext = obj.pos.y + obj.height - self.pos.y
+    else:
+        ydist_ent = obj.pos.y + obj.height - self.pos.y
+        ydist_ext = obj.pos.y - self.pos.y - self.height
+    #find time for entry and exit
+    if -0.0001 < self.vel.x < 0.0001:
+        xt_ent = -INFINITY
+        xt_ext = INFINITY
+        if <double>xdist_ent * xdist_ext >= 0:
+            return False
+    else:
+        xt_ent = <double>xdist_ent / self.vel.x
+        xt_ext = <double>xdist_ext / self.vel.x
+    if -0.0001 < self.vel.y < 0.0001:
+        yt_ent = -INFINITY
+        yt_ext = INFINITY
+        if <double>ydist_ent * ydist_ext >= 0:
+            return False
+    else:
+        yt_ent = <double>ydist_ent / self.vel.y
+        yt_ext = <double>ydist_ext / self.vel.y
+    #max and min keep the first argument on ties, like the builtins
+    enter = yt_ent if yt_ent > xt_ent else xt_ent
+    exit = yt_ext if yt_ext < xt_ext else xt_ext
+    #no coll
+    if enter > exit or (xt_ent < 0
+                        and yt_ent < 0) or xt_ent > dt or yt_ent > dt:
+        return False
+    #normal
+    if xt_ent > yt_ent:
+        hit.ny = 0.
+        if xdist_ent >= 0 and self.vel.x > 0 and yt_ent != 0:
+            hit.nx = 1.
+        elif xdist_ent <= 0 and self.vel.x < 0 and yt_ent != 0:
+            hit.nx = -1.
+        else:
+            hit.nx = copysign(1., self.vel.x)
+    else:
+        hit.nx = 0.
+        if ydist_ent < 0:
+            hit.ny = -1.
+        elif ydist_ent > 0:
+            hit.ny = 1.
+        else:
+            hit.ny = copysign(1., self.vel.y)
+    hit.t = enter
+    hit.t2 = yt_ent if yt_ent < xt_ent else xt_ent
+    return True
+
+
 cdef class Line:
     """line is in principle aabb with width = 0"""
     cdef public cvec2 pos, dir, unit
@@ -192,49 +241,6 @@ cdef class Line:
 
         return enter, exit
 
-    def collide(self, quadtree, playergen, int id):
-        mapcolls = []
-        cdef cAABB bnd, rect
-        rect = cAABB(*self.pos, width=0, height=0)
-        bnd = quadtree.retrieve_bound(rect)
-        while len(mapcolls) == 0:
-            mapgen = (rect_ for rect_ in quadtree.retrieve([], rect))
-            for rct in mapgen:
-                #print rct.pos.x
-                response = self.sweep(rct)
-                if response:
-                    enter, exit = response
-                    mapcolls.append(enter)
-            if len(mapcolls) == 0:
-                #bound = quadtree.retrieve_bound(rect)
-                try:
-                    enter, exit = self.sweep(bnd)
-                except TypeError:
-                    break
-                rect.pos += self.unit * (exit + 1)
-                bound = quadtree.retrieve_bound(rect)
-                if bound == bnd:
-                    break
-                bnd = bound
-        if mapcolls:
-            mapcoll = min(mapcolls)
-        else:
-            mapcoll = float('Inf')
-        p_resp = [(self.sweep(pl.rect), pl.id)
-                  for pl in playergen if pl.id != id]
-        try:
-            playercoll = min((p[0][0] for p in p_resp if p[0] is not False))
-        except ValueError:
-            playercoll = float('Inf')
-        coll = min(mapcoll, playercoll)
-        if coll == float('Inf'):
-            return False
-        elif mapcoll < playercoll:
-            return mapcoll, False
-        else:
-            return playercoll, [r[1]
-                                for r in p_resp if r[0][0] == playercoll][0]
-
     def update(self, float x, float y, float mx, float my):
         cdef float dx, dy
         dx = mx - x
@@ -0,0 +1,44 @@
+from libc.math cimport INFINITY
+
+
+cdef class StaticGrid:
+    cdef public list rects
+    cdef public float x, y, size
+    cdef public int cols, rows
+    cdef float[:] minx, miny, maxx, maxy
+    cdef int[:] start, items, stamps
+    cdef public int[:] found
+    cdef int stamp
+
+    cdef void cell_range(self, float x0, float y0, float x1, float y1,
+                         int *cx0, int *cy0, int *cx1, int *cy1)
+    cpdef int query(self, float x0, float y0, float x1, float y1)
+    cpdef double ray(self, double x, double y, double ux, double uy,
+                     double length)
+
+
+cdef inline bint slab(double x, double y, double ux, double uy, double minx,
+                      double miny, double maxx, double maxy, double *enter):
+    """whether the ray from x, y along the unit vector ux, uy enters the box,
+    with the distance of entry in enter. it is negative if the ray starts
+    inside"""
+    cdef double xent, xext, yent, yext, ext
+    if ux == 0:
+        if x < minx or x > maxx:
+            return False
+        xent, xext = -INFINITY, INFINITY
+    elif ux > 0:
+        xent, xext = (minx - x) / ux, (maxx - x) / ux
+    else:
+        xent, xext = (maxx - x) / ux, (minx - x) / ux
+    if uy == 0:
+        if y < miny or y > maxy:
+            return False
+        yent, yext = -INFINITY, INFINITY
+    elif uy > 0:
+        yent, yext = (miny - y) / uy, (maxy - y) / uy
+    else:
+        yent, yext = (maxy - y) / uy, (miny - y) / uy
+    enter[0] = yent if yent > xent else xent
+    ext = yext if yext < xext else xext
+    return enter[0] <= ext and ext >= 0
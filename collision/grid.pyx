@@ -0,0 +1,193 @@
+cimport cython
+from cpython cimport array
+import array
+from libc.math cimport floor, INFINITY
+
+#cells are square with this side length
+cell = 128.
+#distance a rect can move in one step, queries grow the rect by it
+reach = 128.
+
+
+cdef class StaticGrid:
+    """uniform grid over static map geometry, built once. the bounds of the
+    rects and the rect indices of every cell are kept in flat arrays, cell c
+    holds items[start[c]:start[c + 1]]. a query writes the indices of the
+    rects overlapping an area into the found buffer, without duplicates and
+    in map order, and returns their number. nothing is allocated per query"""
+
+    def __init__(self, rects, float size=cell, index=None):
+        """index, the start and items arrays of StaticGrid.index for the
+        same rects, saves sorting them into the cells again"""
+        self.rects = list(rects)
+        cdef int n = len(self.rects)
+        cdef int i, c, cx, cy, cx0, cy0, cx1, cy1
+        self.size = size
+        template = array.array('f')
+        self.minx = array.clone(template, n, zero=True)
+        self.miny = array.clone(template, n, zero=True)
+        self.maxx = array.clone(template, n, zero=True)
+        self.maxy = array.clone(template, n, zero=True)
+        for i, rect in enumerate(self.rects):
+            self.minx[i] = rect.pos.x
+            self.miny[i] = rect.pos.y
+            self.maxx[i] = rect.pos.x + rect.width
+            self.maxy[i] = rect.pos.y + rect.height
+        if n:
+            self.x = min(self.minx)
+            self.y = min(self.miny)
+            self.cols = int((max(self.maxx) - self.x) / size) + 1
+            self.rows = int((max(self.maxy) - self.y) / size) + 1
+        else:
+            self.x = self.y = 0
+            self.cols = self.rows = 1
+        itemplate = array.array('i')
+        self.stamps = array.clone(itemplate, n, zero=True)
+        self.found = array.clone(itemplate, n, zero=True)
+        self.stamp = 0
+        if index is not None:
+            start, items = index
+            if (len(start) == self.cols * self.rows + 1 and
+                    start[len(start) - 1] == len(items)):
+                self.start, self.items = start, items
+                return
+        self.start = array.clone(itemplate, self.cols * self.rows + 1,
+                                 zero=True)
+        #count the rects per cell, then place them, counting sort
+        for i in range(n):
+            self.cell_range(self.minx[i], self.miny[i], self.maxx[i],
+                            self.maxy[i], &cx0, &cy0, &cx1, &cy1)
+            for cy in range(cy0, cy1 + 1):
+                for cx in range(cx0, cx1 + 1):
+                    self.start[cy * self.cols + cx + 1] += 1
+        for c in range(self.cols * self.rows):
+            self.start[c + 1] += self.start[c]
+        self.items = array.clone(itemplate, self.start[self.cols * self.rows],
+                                 zero=True)
+        fill = array.clone(itemplate, self.cols * self.rows, zero=True)
+        cdef int[:] filled = fill
+        for i in range(n):
+            self.cell_range(self.minx[i], self.miny[i], self.maxx[i],
+                            self.maxy[i], &cx0, &cy0, &cx1, &cy1)
+            for cy in range(cy0, cy1 + 1):
+                for cx in range(cx0, cx1 + 1):
+                    c = cy * self.cols + cx
+                    self.items[self.start[c] + filled[c]] = i
+                    filled[c] += 1
+
+    def index(self):
+        """the start and items arrays of the cells"""
+        return self.start.base, self.items.base
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef void cell_range(self, float x0, float y0, float x1, float y1,
+                         int *cx0, int *cy0, int *cx1, int *cy1):
+        """cells touched by an area, clamped to the grid"""
+        cx0[0] = max(<int>floor((x0 - self.x) / self.size), 0)
+        cy0[0] = max(<int>floor((y0 - self.y) / self.size), 0)
+        cx1[0] = min(<int>floor((x1 - self.x) / self.size), self.cols - 1)
+        cy1[0] = min(<int>floor((y1 - self.y) / self.size), self.rows - 1)
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cpdef int query(self, float x0, float y0, float x1, float y1):
+        """number of rects overlapping x0, y0 to x1, y1, their indices are
+        in found"""
+        cdef int cx0, cy0, cx1, cy1, cx, cy, c, k, i, j, n = 0
+        self.cell_range(x0, y0, x1, y1, &cx0, &cy0, &cx1, &cy1)
+        self.stamp += 1
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                c = cy * self.cols + cx
+                for k in range(self.start[c], self.start[c + 1]):
+                    i = self.items[k]
+                    if self.stamps[i] == self.stamp:
+                        continue
+                    self.stamps[i] = self.stamp
+                    if (self.minx[i] < x1 and self.maxx[i] > x0 and
+                            self.miny[i] < y1 and self.maxy[i] > y0):
+                        #insertion keeps map order, there are only a few
+                        j = n
+                        while j and self.found[j - 1] > i:
+                            self.found[j] = self.found[j - 1]
+                            j -= 1
+                        self.found[j] = i
+                        n += 1
+        return n
+
+    def retrieve(self, list lst, rect, float margin=reach):
+        """appends the rects rect can touch within a step to lst, drop in
+        for QuadTree.retrieve"""
+        cdef float x = rect.pos.x, y = rect.pos.y
+        cdef int i, n = self.query(x - margin, y - margin,
+                                   x + rect.width + margin,
+                                   y + rect.height + margin)
+        for i in range(n):
+            lst.append(self.rects[self.found[i]])
+        return lst
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.cdivision(True)
+    cpdef double ray(self, double x, double y, double ux, double uy,
+                     double length):
+        """distance along the unit vector ux, uy from x, y to the first rect
+        entered within length, inf without one. walks the cells the ray
+        crosses in order, dda style, and stops at the end of the first cell
+        that holds a hit, so only the rects near the ray are tested"""
+        cdef double t, enter, best = INFINITY
+        cdef double tmaxx = INFINITY, tmaxy = INFINITY
+        cdef double tdeltax = 0, tdeltay = 0
+        cdef int cx, cy, c, k, i, stepx = 0, stepy = 0
+        #start where the ray enters the grid
+        if not slab(x, y, ux, uy, self.x, self.y,
+                    self.x + self.cols * self.size,
+                    self.y + self.rows * self.size, &t):
+            return best
+        if t < 0:
+            t = 0
+        if t > length:
+            return best
+        cx = <int>floor((x + ux * t - self.x) / self.size)
+        cy = <int>floor((y + uy * t - self.y) / self.size)
+        cx = min(max(cx, 0), self.cols - 1)
+        cy = min(max(cy, 0), self.rows - 1)
+        if ux > 0:
+            stepx, tdeltax = 1, self.size / ux
+            tmaxx = (self.x + (cx + 1) * self.size - x) / ux
+        elif ux < 0:
+            stepx, tdeltax = -1, -self.size / ux
+            tmaxx = (self.x + cx * self.size - x) / ux
+        if uy > 0:
+            stepy, tdeltay = 1, self.size / uy
+            tmaxy = (self.y + (cy + 1) * self.size - y) / uy
+        elif uy < 0:
+            stepy, tdeltay = -1, -self.size / uy
+            tmaxy = (self.y + cy * self.size - y) / uy
+        self.stamp += 1
+        while True:
+            c = cy * self.cols + cx
+            for k in range(self.start[c], self.start[c + 1]):
+                i = self.items[k]
+                if self.stamps[i] == self.stamp:
+                    continue
+                self.stamps[i] = self.stamp
+                if (slab(x, y, ux, uy, self.minx[i], self.miny[i],
+                         self.maxx[i], self.maxy[i], &enter) and
+                        enter <= length and enter < best):
+                    best = enter
+            #later cells only hold hits beyond the end of this one
+            t = tmaxx if tmaxx < tmaxy else tmaxy
+            if best <= t or t > length:
+                return best
+            if tmaxx < tmaxy:
+                cx += stepx
+                tmaxx += tdeltax
+                if cx < 0 or cx >= self.cols:
+                    return best
+            else:
+                cy += stepy
+                tmaxy += tdeltay
+                if cy < 0 or cy >= self.rows:
+                    return best
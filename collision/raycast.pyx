@@ -0,0 +1,93 @@
+cimport cython
+from libc.stdlib cimport malloc, free
+from libc.math cimport sqrt, INFINITY
+from collision.caabb cimport cAABB
+from collision.grid cimport StaticGrid, slab
+from collision import sap
+
+
+cdef class Raycaster:
+    """hitscan against the map and the players. the map part walks the
+    cells of the static grid along every ray, the players are taken from
+    the broadphase once for the box around all rays, shortened to where they
+    hit the map. a fan of rays is cast in one call, every candidate is
+    tested against all of its rays"""
+    cdef StaticGrid grid
+    cdef object broadphase
+    cdef public int mask
+
+    def __init__(self, StaticGrid grid, broadphase, int mask=sap.players):
+        self.grid = grid
+        self.broadphase = broadphase
+        self.mask = mask
+
+    def cast(self, float x, float y, float dx, float dy, double length,
+             exclude=None):
+        """first hit of the ray from x, y along dx, dy as the distance and
+        the object hit. the object is None if the ray ends in the map or
+        runs out at length"""
+        dists, hits = self.fan(x, y, [(dx, dy)], length, exclude)
+        for obj in hits:
+            return dists[0], obj
+        return dists[0], None
+
+    @cython.boundscheck(False)
+    @cython.cdivision(True)
+    def fan(self, float x, float y, dirs, double length, exclude=None):
+        """casts a ray from x, y along every dx, dy in dirs. returns the
+        distance every ray travels and a dict of the objects hit to the
+        number of rays that hit them and the distance of the nearest"""
+        cdef int n = len(dirs), i
+        cdef float dx, dy, mag
+        cdef double d, enter, x0 = x, y0 = y, x1 = x, y1 = y
+        cdef double *ux = <double *>malloc(n * 3 * sizeof(double))
+        cdef double *uy = ux + n
+        cdef double *dist = uy + n
+        cdef cAABB rect
+        cdef list cands, dists = [], near = []
+        cdef dict hits = {}
+        if ux == NULL:
+            raise MemoryError
+        try:
+            for i in range(n):
+                dx, dy = dirs[i]
+                #float like cvec2.normalize
+                mag = sqrt(dx * dx + dy * dy)
+                ux[i] = dx / mag
+                uy[i] = dy / mag
+                d = self.grid.ray(x, y, ux[i], uy[i], length)
+                dist[i] = d if d < length else length
+                x0 = min(x0, x + ux[i] * dist[i])
+                x1 = max(x1, x + ux[i] * dist[i])
+                y0 = min(y0, y + uy[i] * dist[i])
+                y1 = max(y1, y + uy[i] * dist[i])
+                near.append(None)
+            #grown by a pixel for rays along the edge of a rect
+            cands = self.broadphase.query([], x0 - 1, y0 - 1, x1 + 1, y1 + 1,
+                                          self.mask)
+            for obj in cands:
+                if obj is exclude:
+                    continue
+                rect = obj.rect
+                for i in range(n):
+                    #a player is hit before a wall at the same distance
+                    if (slab(x, y, ux[i], uy[i], rect.pos.x, rect.pos.y,
+                             rect.pos.x + rect.width,
+                             rect.pos.y + rect.height, &enter) and
+                            enter <= dist[i] and
+                            (near[i] is None or enter < dist[i])):
+                        dist[i] = enter
+                        near[i] = obj
+            for i in range(n):
+                dists.append(dist[i])
+                obj = near[i]
+                if obj is None:
+                    continue
+                if obj in hits:
+                    hits[obj][0] += 1
+                    hits[obj][1] = min(hits[obj][1], dist[i])
+                else:
+                    hits[obj] = [1, dist[i]]
+        finally:
+            free(ux)
+        return dists, hits
@@ -0,0 +1,216 @@
+cimport cython
+from libc.stdlib cimport realloc, free
+from collision.caabb cimport cAABB
+
+#groups of proxies, queries and pairs take a mask of them
+players = 1
+items = 2
+#distance an entity can move in one step, near grows the rect by it
+reach = 128.
+
+
+cdef class SweepAndPrune:
+    """broadphase for the entities that move or come and go. every entity
+    has a proxy with the bounds of its rect and a group, the proxies are
+    kept sorted by their left edge. move and the per tick update restore
+    the order by insertion sort, which is cheap because entities move
+    little between ticks. a query bisects to the first proxy that can reach
+    into the area, by the widest proxy, and scans until the left edges pass
+    it. pairs sweeps the whole order once, so both cost about the number of
+    actual overlaps instead of every entity against every other"""
+    cdef int count, used, capacity
+    cdef float *minx
+    cdef float *miny
+    cdef float *maxx
+    cdef float *maxy
+    cdef int *group
+    #slots sorted by minx and the position of every slot in it
+    cdef int *order
+    cdef int *index
+    cdef list objs, rects, free
+    cdef dict slots
+    cdef public float width
+
+    def __cinit__(self):
+        self.count = self.used = self.capacity = 0
+        self.minx = self.miny = self.maxx = self.maxy = NULL
+        self.group = self.order = self.index = NULL
+
+    def __init__(self):
+        self.objs = []
+        self.rects = []
+        self.free = []
+        self.slots = {}
+        self.width = 0
+
+    def __dealloc__(self):
+        free(self.minx)
+        free(self.miny)
+        free(self.maxx)
+        free(self.maxy)
+        free(self.group)
+        free(self.order)
+        free(self.index)
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, obj):
+        return id(obj) in self.slots
+
+    cdef grow(self):
+        cdef int capacity = max(16, self.capacity * 2)
+        cdef size_t floats = capacity * sizeof(float)
+        cdef size_t ints = capacity * sizeof(int)
+        self.minx = <float *>realloc(self.minx, floats)
+        self.miny = <float *>realloc(self.miny, floats)
+        self.maxx = <float *>realloc(self.maxx, floats)
+        self.maxy = <float *>realloc(self.maxy, floats)
+        self.group = <int *>realloc(self.group, ints)
+        self.order = <int *>realloc(self.order, ints)
+        self.index = <int *>realloc(self.index, ints)
+        if (self.minx == NULL or self.miny == NULL or self.maxx == NULL or
+                self.maxy == NULL or self.group == NULL or
+                self.order == NULL or self.index == NULL):
+            raise MemoryError
+        self.capacity = capacity
+
+    cdef void bounds(self, int slot):
+        cdef cAABB rect = self.rects[slot]
+        self.minx[slot] = rect.pos.x
+        self.miny[slot] = rect.pos.y
+        self.maxx[slot] = rect.pos.x + rect.width
+        self.maxy[slot] = rect.pos.y + rect.height
+        if rect.width > self.width:
+            self.width = rect.width
+
+    @cython.boundscheck(False)
+    cdef void sift(self, int pos, bint right=True):
+        """moves the proxy at pos in order to where its left edge belongs,
+        only to the left for an insertion sort"""
+        cdef int slot = self.order[pos]
+        cdef float x = self.minx[slot]
+        while pos > 0 and self.minx[self.order[pos - 1]] > x:
+            self.order[pos] = self.order[pos - 1]
+            self.index[self.order[pos]] = pos
+            pos -= 1
+        while (right and pos < self.count - 1 and
+               self.minx[self.order[pos + 1]] < x):
+            self.order[pos] = self.order[pos + 1]
+            self.index[self.order[pos]] = pos
+            pos += 1
+        self.order[pos] = slot
+        self.index[slot] = pos
+
+    def add(self, obj, cAABB rect, int group):
+        """adds obj, which covers rect and belongs to group"""
+        cdef int slot
+        if id(obj) in self.slots:
+            self.remove(obj)
+        if self.free:
+            slot = self.free.pop()
+            self.objs[slot] = obj
+            self.rects[slot] = rect
+        else:
+            if self.used == self.capacity:
+                self.grow()
+            slot = self.used
+            self.used += 1
+            self.objs.append(obj)
+            self.rects.append(rect)
+        self.slots[id(obj)] = slot
+        self.group[slot] = group
+        self.bounds(slot)
+        self.order[self.count] = slot
+        self.count += 1
+        self.sift(self.count - 1)
+
+    def remove(self, obj):
+        cdef int slot = self.slots.pop(id(obj), -1)
+        cdef int pos
+        if slot < 0:
+            return
+        for pos in range(self.index[slot], self.count - 1):
+            self.order[pos] = self.order[pos + 1]
+            self.index[self.order[pos]] = pos
+        self.count -= 1
+        self.objs[slot] = self.rects[slot] = None
+        self.free.append(slot)
+
+    def move(self, obj):
+        """rereads the bounds of obj after its rect moved"""
+        cdef int slot = self.slots[id(obj)]
+        self.bounds(slot)
+        self.sift(self.index[slot])
+
+    def update(self):
+        """rereads all bounds and restores the order"""
+        cdef int pos
+        self.width = 0
+        for pos in range(self.count):
+            self.bounds(self.order[pos])
+        for pos in range(1, self.count):
+            self.sift(pos, False)
+
+    @cython.boundscheck(False)
+    @cython.cdivision(True)
+    cdef int first(self, float x):
+        """position of the first proxy in order with minx >= x"""
+        cdef int lo = 0, hi = self.count, mid
+        while lo < hi:
+            mid = (lo + hi) / 2
+            if self.minx[self.order[mid]] < x:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    @cython.boundscheck(False)
+    cpdef list query(self, list lst, float x0, float y0, float x1, float y1,
+                     int mask):
+        """appends the objects of group mask overlapping x0, y0 to x1, y1"""
+        cdef int pos, slot
+        for pos in range(self.first(x0 - self.width), self.count):
+            slot = self.order[pos]
+            if self.minx[slot] >= x1:
+                break
+            if (self.group[slot] & mask and self.maxx[slot] > x0 and
+                    self.miny[slot] < y1 and self.maxy[slot] > y0):
+                lst.append(self.objs[slot])
+        return lst
+
+    def near(self, list lst, cAABB rect, int mask, float margin=reach,
+             exclude=None):
+        """the objects of group mask rect can touch within a step, except
+        exclude"""
+        cdef int start = len(lst), i
+        self.query(lst, rect.pos.x - margin, rect.pos.y - margin,
+                   rect.pos.x + rect.width + margin,
+                   rect.pos.y + rect.height + margin, mask)
+        if exclude is not None:
+            for i in range(start, len(lst)):
+                if lst[i] is exclude:
+                    del lst[i]
+                    break
+        return lst
+
+    @cython.boundscheck(False)
+    def pairs(self, int mask_a, int mask_b):
+        """overlapping objects as (a, b) with a in group mask_a and b in
+        group mask_b"""
+        cdef int i, j, s, t
+        cdef list out = []
+        for i in range(self.count):
+            s = self.order[i]
+            for j in range(i + 1, self.count):
+                t = self.order[j]
+                if self.minx[t] >= self.maxx[s]:
+                    break
+                if not (self.miny[s] < self.maxy[t] and
+                        self.miny[t] < self.maxy[s]):
+                    continue
+                if self.group[s] & mask_a and self.group[t] & mask_b:
+                    out.append((self.objs[s], self.objs[t]))
+                elif self.group[t] & mask_a and self.group[s] & mask_b:
+                    out.append((self.objs[t], self.objs[s]))
+        return out
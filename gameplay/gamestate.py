@@ -1,5 +1,6 @@
 from network_utils import protocol_pb2 as proto
 from random import choice
+from collision import sap
 
 
 def duel_calc_score(killed, killer):
@@ -11,7 +12,8 @@ def duel_calc_score(killed, killer):
 
 class GamestateManager(object):
     """docstring for GamestateManager"""
-    def __init__(self, allgenfunc, ackman, players, spawns, items, send_spec):
+    def __init__(self, allgenfunc, ackman, players, spawns, items, send_spec,
+                 broadphase):
         super(GamestateManager, self).__init__()
         #function which return generator of all players and specs
         self.all = allgenfunc
@@ -29,21 +31,23 @@ class GamestateManager(object):
         self.ticks = 0
         self.send_spec = send_spec
         self.dueltime = 300
+        #pairs of players and the items they touch
+        self.broadphase = broadphase
 
     def update(self, dt):
         self.ticks += dt
+        if not self.gamestate == proto.countDown:
+            for player, item in self.broadphase.pairs(sap.players, sap.items):
+                if (not player.state.isDead and not item.inactive and
+                        player.rect.overlaps(item)):
+                    if self.items.apply(player, item):
+                        self.send_mapupdate(item, player)
         for player in self.ingame.itervalues():
             if player.state.isDead:
                 player.state.isDead -= dt
                 if player.state.isDead <= 0.0 or (player.state.isDead < 4
                                                   and player.input.att):
                     self.spawn(player)
-            else:
-                if not self.gamestate == proto.countDown:
-                    for item in self.items:
-                        if player.rect.overlaps(item):
-                            if self.items.apply(player, item):
-                                self.send_mapupdate(item, player)
             if self.ticks >= 1:
                 self.tick(player)
         for spawn in self.spawns:
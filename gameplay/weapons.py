@@ -1,9 +1,13 @@
 from collision.caabb import cAABB as Rectangle, Line
 from player.cvec2 import cvec2 as vec2
 from network_utils import protocol_pb2 as proto
+from collision import sap
+from collision.raycast import Raycaster
 import math
 
 phext = vec2(16, 54)
+#knockback of the shotgun on its shooter in the air
+recoil = vec2(150, 300)
 
 
 def spread(dx, dy, angle, num):
@@ -235,14 +239,6 @@ class NoAmmoError(Exception):
         pass
 
 
-class ProjContainer(list):
-    """docstring for ProjContainer"""
-    def __init__(self, time, ind):
-        super(ProjContainer, self).__init__()
-        self.time = time
-        self.ind = ind
-
-
 class Projectile(Rectangle):
     """docstring for Projectile"""
     #x and y are center positions for convenience
@@ -321,8 +317,8 @@ class Projectile(Rectangle):
         return self.resolve_sweep(dt_, id, norm)
 
     def resolve_sweep(self, dt, id, norm):
-        pos = self.pos + self.vel * dt
-        self.update(*pos)
+        pos = self.pos.iadd_mul(self.vel, dt)
+        self.update(pos.x, pos.y)
         if not id:
             return False
         elif id == self.id and self.canthurt:
@@ -355,7 +351,8 @@ class MeleeProjectile(Projectile):
         return [plr for plr in playergen if self.overlaps(plr.rect)], 0
 
     def updateproj(self, dt, mapgen, playergen):
-        self.update(*(vec2(*self.ppos) + self.offset + self.rectoffset))
+        pos = self.pos.set(*self.ppos).iadd(self.offset).iadd(self.rectoffset)
+        self.update(pos.x, pos.y)
         self.lifetime -= dt
         return self.collide(dt, mapgen, playergen)
 
@@ -393,6 +390,9 @@ class BlasterProjectile(Projectile):
 
 class NadeProjectile(Projectile):
     """docstring for NadeProjectile"""
+    gravity = 1500
+    fall = vec2(0, gravity)
+
     def __init__(self, *args, **kwargs):
         super(NadeProjectile, self).__init__(*args, **kwargs)
         self.type = proto.gl
@@ -433,9 +433,9 @@ class NadeProjectile(Projectile):
 
     def resolve_sweep(self, dt, id, norm):
         if not id == -1:
-            self.vel -= vec2(0, 1500) * dt
-        pos = self.pos + self.vel * dt
-        self.update(*pos)
+            self.vel.isub_mul(self.fall, dt)
+        pos = self.pos.iadd_mul(self.vel, dt)
+        self.update(pos.x, pos.y)
         if not id:
             return False
         elif id == self.id and self.canthurt:
@@ -488,6 +488,10 @@ class HitScanLine(Line):
         self.id = id
         self.type = typ
 
+    def collide(self, raycaster, shooter):
+        return raycaster.cast(self.pos.x, self.pos.y, self.dir.x, self.dir.y,
+                              self.length, shooter)
+
     def on_hit(self, dmg_func, player):
         dmg_func(player, self)
         player.state.vel += self.unit * self.knockback
@@ -504,39 +508,36 @@ class ShotGunPellets(object):
         self.id = id
         self.type = typ
         spread_dy = spread(dx, dy, angle=0.1, num=pnum)
-        self.pellets = [HitScanLine(x, y, dx, spread_dy[i], plength, pdmg, pkb,
-                        id, 0) for i in range(pnum)]
+        self.pos = vec2(x, y)
+        self.dirs = [(dx, dy_) for dy_ in spread_dy]
         self.dir = vec2(dx, dy)
         self.unit = self.dir.normalize()
 
-    def collide(self, quadtree, playergen, id):
-        colls = [line.collide(quadtree, playergen(), id)
-                 for line in self.pellets]
-        colls = [coll for coll in colls if coll is not False]
-        playerids = [coll[1] for coll in colls if coll[1] is not False]
-        if len(playerids) == 0:
-            return False
-        dct = {}
-        for id in set(playerids):
-            count = 0
-            for ind in playerids:
-                if ind == id:
-                    count += 1
-            dct[id] = count
-        return dct
-
-    def on_hit(self, dmg_func, players):
-        for player in players:
-            self.dmg = self.pdmg * player.hitcount
+    def collide(self, raycaster, shooter):
+        """players hit to the number of pellets that hit them"""
+        dists, hits = raycaster.fan(self.pos.x, self.pos.y, self.dirs,
+                                    self.plength, shooter)
+        return dict((player, hit[0]) for player, hit in hits.iteritems())
+
+    def on_hit(self, dmg_func, hits):
+        for player, count in hits.iteritems():
+            self.dmg = self.pdmg * count
             dmg_func(player, self)
-            player.state.vel += self.unit * self.pkb * player.hitcount
+            player.state.vel += self.unit * self.pkb * count
 
 
 class ProjectileManager(object):
-    """docstring for ProjectileManager"""
-    def __init__(self, players, _map, dmg_func, allgen):
+    """simulates the projectiles. clients simulate their flight themselves,
+    so projectiles are only sent when they spawn, bounce or get deleted, and
+    as a correction every correction seconds. events go to everyone,
+    corrections through the interest management. melee follows its player
+    and is sent every tick."""
+    def __init__(self, players, _map, dmg_func, allgen, sees, broadphase):
         super(ProjectileManager, self).__init__()
         self.projs = []
+        self.time = 0
+        self.correction = .5
+        self.streamed = (proto.melee, )
         self.todelete = []
         self.send_ = None
         self.proj_num = 0
@@ -545,7 +546,12 @@ class ProjectileManager(object):
         #for collisions
         self.players = players
         self.map = _map
+        self.broadphase = broadphase
+        #hitscan weapons
+        self.raycaster = Raycaster(_map.grid, broadphase)
         self.allgen = allgen
+        #interest management, whether a recipient gets updates at a position
+        self.sees = sees
         self.damage_player = dmg_func
 
     def __iter__(self):
@@ -557,11 +563,17 @@ class ProjectileManager(object):
     def __len__(self):
         return len(self.projs)
 
+    def near(self, proj):
+        """players proj can hit this tick. a generator so the query runs
+        when updateproj collides, after melee moved with its player"""
+        for player in self.broadphase.near([], proj, sap.players):
+            yield player
+
     def update(self, dt):
+        self.time += dt
         for proj in self.projs:
-            mapgen = (rect for rect in self.map.quad_tree.retrieve([], proj))
-            playergen = (player for player in self.players.itervalues())
-            coll = proj.updateproj(dt, mapgen, playergen)
+            mapgen = self.map.grid.retrieve([], proj)
+            coll = proj.updateproj(dt, mapgen, self.near(proj))
             if coll:
                 coll, norm = coll
                 try:
@@ -572,6 +584,8 @@ class ProjectileManager(object):
                     #in case of explosions coll: list of players in expl radius
                     player = coll
                 self.resolve_collision(proj, player, norm)
+                #bounces change the trajectory
+                proj.event = True
             if proj.lifetime < 0:
                 if proj.on_runout():
                     self.todelete.append(proj)
@@ -597,6 +611,7 @@ class ProjectileManager(object):
         if isinstance(proj, Projectile):
             proj.damage_player = self.damage_player
             proj.playerId = proj.id
+            proj.event = True
             self.projs.append(proj)
         elif isinstance(proj, HitScanLine):
             self.process_hitscan(proj)
@@ -605,9 +620,11 @@ class ProjectileManager(object):
             #knockback
             cond = self.players[proj.id].state.conds
             if cond.ascending or cond.descending:
-                self.players[proj.id].state.vel -= proj.unit * vec2(150, 300)
+                self.players[proj.id].state.vel.isub_mul(proj.unit, recoil)
 
-    def send(self, proj, toDelete=False):
+    def send(self, proj, toDelete=False, event=True):
+        proj.event = False
+        proj.sent = self.time
         projectile = proto.Projectile()
         projectile.projId = proj.projId
         projectile.playerId = proj.id
@@ -615,27 +632,30 @@ class ProjectileManager(object):
         projectile.posx, projectile.posy = proj.pos.x, proj.pos.y
         projectile.velx, projectile.vely = proj.vel.x, proj.vel.y
         projectile.toDelete = toDelete
+        projectile.time = self.time
         self.message.projectile.CopyFrom(projectile)
+        msg = self.message.SerializeToString()
         for player in self.allgen():
-            self.send_(self.message.SerializeToString(), player.address)
+            if event or self.sees(player.id, proj.pos):
+                self.send_(msg, player.address)
 
     def send_all(self):
         for proj in self.projs:
-            self.send(proj)
+            if proj.event:
+                self.send(proj)
+            elif (proj.type in self.streamed or
+                  self.time - proj.sent >= self.correction):
+                self.send(proj, event=False)
 
     def receive_send(self, func):
         self.send_ = func
 
     def process_hitscan(self, line):
-        playergen = (player for player in self.players.itervalues())
-        coll = line.collide(self.map.quad_tree, playergen, line.id)
-        if not coll:
-            length, pl = line.length, False
-        else:
-            length, pl = coll
-        #TODO: hitting players
-        if pl:
-            line.on_hit(self.damage_player, self.players[pl])
+        length, player = line.collide(self.raycaster,
+                                      self.players.get(line.id))
+        pl = player.id if player else False
+        if player:
+            line.on_hit(self.damage_player, player)
         proj = proto.Projectile()
         proj.type = line.type
         proj.playerId = line.id
@@ -648,18 +668,10 @@ class ProjectileManager(object):
             self.send_(self.message.SerializeToString(), player.address)
 
     def process_hitscan_mul(self, pellets):
-        def pgen():
-            return (player for player in self.players.itervalues())
-        coldict = pellets.collide(self.map.quad_tree, pgen, pellets.id)
-        if not coldict:
-            pl = False
-        else:
-            players = []
-            pl = True
-            for id, count in coldict.iteritems():
-                self.players[id].hitcount = count
-                players.append(self.players[id])
-            pellets.on_hit(self.damage_player, players)
+        hits = pellets.collide(self.raycaster, self.players.get(pellets.id))
+        pl = bool(hits)
+        if hits:
+            pellets.on_hit(self.damage_player, hits)
         proj = proto.Projectile()
         proj.type = pellets.type
         proj.playerId = pellets.id
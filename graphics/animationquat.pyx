@@ -207,6 +207,40 @@ cdef class AnimatedModel:
                 self.vertices[i][j] = self.curr_verts[i][j]
 
 
+    def instance(self):
+        """a model for one more player, sharing the vertex, skin and
+        keyframe data of this one with a pose of its own"""
+        cdef AnimatedModel model = AnimatedModel.__new__(AnimatedModel)
+        model.lv, model.lf, model.la = self.lv, self.lf, self.la
+        model.scale = self.scale
+        model.vertices = self.vertices
+        model.normals = self.normals
+        model.curr_verts = self.curr_verts
+        model.curr_norms = self.curr_norms
+        model.face_data = self.face_data
+        model.weights = self.weights
+        model.times = self.times
+        model.animlen = self.animlen
+        model.vcounts = self.vcounts
+        model.bone_weight_ids = self.bone_weight_ids
+        model.weight_inds = self.weight_inds
+        model.joint_worldData = self.joint_worldData
+        model.inverse = self.inverse
+        model.keyframes = self.keyframes
+        model.joints = self.joints
+
+        #per player pose
+        cdef int l = self.joint_currData.shape[0]
+        cyarr = array(shape=(l,), itemsize=sizeof(Transform), format=t_form)
+        model.joint_currData = cyarr
+        cyarr = array(shape=(self.la,), itemsize=sizeof(Transform),
+                      format=t_form)
+        model.skin_matrix = cyarr
+        model.angles[0] = 0.
+        model.angles[2] = -1.570796326794
+        model._set_bind_pose(model.joints, 0)
+        return model
+
     def get_bindpose(self):
         cdef int i
         transout = [(vector((self.skin_matrix[i].q.x,
@@ -4,6 +4,7 @@ from player.cvec2 import cvec2 as vec2
 from player import player
 from matrix import Matrix
 from shader import Shader
+from math import tan, pi
 
 pext = player.phext
 
@@ -59,6 +60,15 @@ class Camera(Events):
         self.shader.push()
         return mvp
 
+    def visible(self, margin=0):
+        """x, y, right, top of the part of the scene in view, in scaled
+        coordinates and grown by margin"""
+        height = 800 * self.scale.x * tan(self.zoom * pi / 360.)
+        width = height * 16 / 9. + margin
+        height += margin
+        return (self.campos.x - width, self.campos.y - height,
+                self.campos.x + width, self.campos.y + height)
+
     def set_static(self):
         self.shader.pop()
 
@@ -1,8 +1,8 @@
 import pyglet
 from pyglet.gl import *
-import parsedae
+import modelcompiler
 from animationquat import AnimatedModel
-from shader import Shader
+from shader import Shader, vector
 from math import copysign, acos
 
 
@@ -68,67 +68,96 @@ class Mesh(object):
             w_bone_ids.extend(w_bone_ids_[v] + [0] * (4 - cts))
 
         self.length = len(self.verts) / 3
+        #the color is a uniform, so players with other colors share the
+        #vertex list
         self.vertex_list = batch.add_indexed(
             self.length, self.mode, group,
-            indices, *[('0g3f/stream', self.verts),
-                       ('1g4f/stream', self.norms),
-                       ('2g4f/static', self.color * self.length),
+            indices, *[('0g3f/static', self.verts),
+                       ('1g4f/static', self.norms),
                        ('3g4f/static', weights), ('4g1i/static', w_lens),
                        ('5g4i/static', w_bone_ids)])
 
 
-class Model(object):
-    """docstring for Model"""
+class ModelAsset(object):
+    """everything players with the same model have in common: the parsed
+    file, the meshes in one batch, the keyframes and the skinning program.
+    built once per file and scale by get_asset"""
     def __init__(self, filename, scale):
-        super(Model, self).__init__()
-        p_data = parsedae.parse_dae(filename, scale)
+        super(ModelAsset, self).__init__()
+        p_data = modelcompiler.load(filename, scale)
         verts, norms, facedata, jd, js, skn, anm, fsc = p_data
+        self.animdata = anm
         self.maxtime = max(anm[0][0])
-        _anim = AnimatedModel(*p_data)
-        self.anim = AnimationUpdater(anm, _anim)
+        self.anim = AnimatedModel(*p_data)
         self.meshes = []
         self.batch = pyglet.graphics.Batch()
         for faces in facedata:
             color = faces[0]
             facearr = [(vert, faces[2][i]) for i, vert in enumerate(faces[1])]
             self.meshes.append(Mesh(verts, facearr, norms, color, skn))
-        self.tarr = [[None for j in range(len(facedata[i][1])*3)]
-                     for i in range(len(facedata))]
-        self.add(self.batch)
-        self.quats, self.vecs = _anim.get_bindpose()
+        for mesh in self.meshes:
+            mesh.data_to_batch(self.batch)
+        self.colors = [vector(mesh.color[:4]) for mesh in self.meshes]
+        #poses at the origin by pose_key, shared by all instances
+        self.poses = {}
         self.shader = Shader('skinning')
-        self.shader.set('quats', self.quats)
-        self.shader.set('vecs', self.vecs)
         self.shader.set('scale', fsc)
 
-    def add(self, batch):
-        for mesh in self.meshes:
-            mesh.data_to_batch(batch)
+assets = {}
+
+
+def get_asset(filename, scale):
+    try:
+        return assets[filename, scale]
+    except KeyError:
+        asset = assets[filename, scale] = ModelAsset(filename, scale)
+        return asset
+
+
+class Model(object):
+    """one player's instance of a model asset: pose, animation state and
+    colors are its own, meshes and program are shared"""
+    def __init__(self, filename, scale):
+        super(Model, self).__init__()
+        self.asset = get_asset(filename, scale)
+        self.maxtime = self.asset.maxtime
+        _anim = self.asset.anim.instance()
+        self.anim = AnimationUpdater(self.asset.animdata, _anim,
+                                     self.asset.poses)
+        self.colors = list(self.asset.colors)
+        self.quats, self.vecs = _anim.get_bindpose()
+        self.offset = vector((0., 0., 0., 0.))
 
     def remove(self):
-        for mesh in self.meshes:
-            mesh.vertex_list.delete()
+        #the meshes stay with the asset for the next player
+        self.anim = None
 
     def update(self, dt, state):
         self.quats, self.vecs = self.anim.update(dt, state)
-        self.shader.set('quats', self.quats)
-        self.shader.set('vecs', self.vecs)
+
+    def place(self, pos):
+        """moves the model without posing it again"""
+        self.offset = vector((pos.x, pos.y, 0., 0.))
 
     def start_attack(self):
         self.anim.start_attack()
 
     def draw(self, mvp):
-        self.shader.set('mvp', mvp)
-        with self.shader:
-            self.batch.draw()
+        shader = self.asset.shader
+        shader.set('mvp', mvp)
+        shader.set('quats', self.quats)
+        shader.set('vecs', self.vecs)
+        shader.set('offset', self.offset)
+        with shader:
+            for mesh, color in zip(self.asset.meshes, self.colors):
+                shader.set('color', color)
+                mesh.vertex_list.draw(mesh.mode)
 
     def change_color(self, color):
-        self.meshes[1].vertex_list._set_attribute_data(
-            2, color[:4] * self.meshes[1].length)
+        self.colors[1] = vector(color[:4])
 
     def update_weapon(self, color):
-        self.meshes[2].vertex_list._set_attribute_data(
-            2, color[:4] * self.meshes[2].length)
+        self.colors[2] = vector(color[:4])
 
 animations = {'run': 0, 'stand': 1}
 conditions = {0: ('onGround',), 1: ('onGround',),
@@ -136,11 +165,27 @@ conditions = {0: ('onGround',), 1: ('onGround',),
               3: ('descending',), 4: ('landing',)}
 timescales = {0: 3, 1: 1, 2: 2, 3: 2.5, 4: 1, 5: 2, 6: 1.3}
 loops = {0: 1, 1: 1, 2: 0, 3: 0, 4: 0, 5: 0, 6: 1}
+#steps poses are cached at, per unit of weight, second and radian
+steps = (64, 240, 128)
+max_poses = 1024
+origin = (0., 0.)
+
+
+def pose_key(direc, weights, times, angle, attl):
+    """the inputs of set_keyframe rounded to steps. players whose keys
+    are equal get the same pose"""
+    wstep, tstep, astep = steps
+    return (int(round(direc * wstep)), int(round(angle * astep)),
+            tuple((key, int(round(weight * wstep)),
+                   int(round(times[key] * tstep)))
+                  for key, weight in sorted(weights.iteritems())),
+            int(round(attl[1] * tstep)) if attl[2] else 0,
+            int(round(attl[2] * wstep)))
 
 
 class AnimationUpdater(object):
     """docstring for AnimationUpdater"""
-    def __init__(self, animdata, animator):
+    def __init__(self, animdata, animator, poses=None):
         super(AnimationUpdater, self).__init__()
         self.animdata = animdata
         self.metas = []
@@ -151,6 +196,7 @@ class AnimationUpdater(object):
             else:
                 self.metas.append(AttackMeta(i, max(times)))
         self.animator = animator
+        self.poses = {} if poses is None else poses
         self.weights = {}
         self.times = {}
 
@@ -191,10 +237,19 @@ class AnimationUpdater(object):
         cosangle = state.mpos.normalize()
         angle = copysign(acos(cosangle.x), cosangle.y)
         frc = angle / 3.1415926535897
+        key = pose_key(self.dir, self.weights, self.times, angle, attl)
+        try:
+            return self.poses[key]
+        except KeyError:
+            pass
         pikdict = {1: angle / 6, 2: angle / 3, 3: angle / 2}
-        quats, verts = self.animator.set_keyframe(
-            self.dir, state.pos, self.weights, self.times, pikdict, frc, attl)
-        return quats, verts
+        #posed at the origin, Model.place moves it
+        pose = self.animator.set_keyframe(
+            self.dir, origin, self.weights, self.times, pikdict, frc, attl)
+        if len(self.poses) >= max_poses:
+            self.poses.clear()
+        self.poses[key] = pose
+        return pose
 
     def start_attack(self):
         self.metas[5].start_attack()
@@ -0,0 +1,134 @@
+"""compiles a collada model, graphics/name.dae, into graphics/name.daec with
+the flat arrays parsedae.parse_dae builds: vertices, normals, faces, joint
+matrices and hierarchy, skin and keyframes. the file is laid out as
+sections.py describes, with every section one wide, so each one is a plain
+array of doubles or ints (numpy.frombuffer reads them as they are).
+vertices are stored unscaled, load scales them like parse_dae"""
+from cStringIO import StringIO
+from array import array
+import parsedae
+import hashlib
+import mmap
+import os
+import sections
+
+magic = 'PGDAEC'
+version = 1
+
+#parse_dae multiplies vertices by 36 * scale
+unscaled = 1 / 36.
+
+
+class Node(object):
+    """joint of the skeleton, as much as AnimatedModel reads of it"""
+    def __init__(self, index, nodes):
+        super(Node, self).__init__()
+        self.index = index
+        self.len = len(nodes)
+        self.nodes = nodes
+
+
+def preorder(joint):
+    yield joint
+    for node in joint.nodes:
+        for child in preorder(node):
+            yield child
+
+
+def tree(flat, pos=0):
+    """joint at pos of the index, child count pairs and the position after
+    its subtree"""
+    index, count = flat[pos], flat[pos + 1]
+    pos += 2
+    nodes = []
+    for i in range(count):
+        node, pos = tree(flat, pos)
+        nodes.append(node)
+    return Node(index, nodes), pos
+
+
+def rows(flat, width):
+    return [flat[i:i + width].tolist() for i in range(0, len(flat), width)]
+
+
+def flatten(p_data):
+    """sections of the unscaled output of parse_dae"""
+    verts, norms, faces, joint_data, joints, skin, anims, scale = p_data
+    weights, vcount, bone_ids, weight_inds, inverse = skin
+    return {'vert': array('d', [n for vert in verts for n in vert]),
+            'norm': array('d', [n for norm in norms for n in norm]),
+            'fcol': array('d', [c for color, v, n in faces for c in color]),
+            'fcnt': array('i', [len(v) for color, v, n in faces]),
+            'fvrt': array('i', [i for color, v, n in faces for i in v]),
+            'fnrm': array('i', [i for color, v, n in faces for i in n]),
+            'jdat': array('d', [n for mat in joint_data for n in mat]),
+            'jtre': array('i', [n for joint in preorder(joints)
+                                for n in (joint.index, joint.len)]),
+            'swgt': array('d', weights),
+            'vcnt': array('i', vcount),
+            'bone': array('i', bone_ids),
+            'wind': array('i', weight_inds),
+            'invm': array('d', [n for mat in inverse for n in mat]),
+            'acnt': array('i', [len(anims)]),
+            'alen': array('i', [len(times) for anim in anims
+                                for times, mats in anim]),
+            'atim': array('d', [t for anim in anims
+                                for times, mats in anim for t in times]),
+            'amat': array('d', [n for anim in anims for times, mats in anim
+                                for mat in mats for n in mat])}
+
+
+def unflatten(data, scale):
+    """the output of parse_dae(path, scale) from the sections"""
+    scale = 36. * scale
+    verts = rows(array('d', [n * scale for n in data['vert']]), 3)
+    norms = rows(data['norm'], 3)
+    colors = rows(data['fcol'], 4)
+    faces, start = [], 0
+    for color, count in zip(colors, data['fcnt']):
+        faces.append((color, data['fvrt'][start:start + count].tolist(),
+                      data['fnrm'][start:start + count].tolist()))
+        start += count
+    joint_data = rows(data['jdat'], 16)
+    joints = tree(data['jtre'])[0]
+    skin = (data['swgt'].tolist(), data['vcnt'].tolist(),
+            data['bone'].tolist(), data['wind'].tolist(),
+            rows(data['invm'], 16))
+    times, mats = data['atim'], data['amat']
+    anims, tpos = [], 0
+    lens = iter(data['alen'])
+    for i in range(data['acnt'][0]):
+        anim = []
+        for j in range(len(joint_data)):
+            count = next(lens)
+            anim.append((times[tpos:tpos + count].tolist(),
+                         rows(mats[tpos * 16:(tpos + count) * 16], 16)))
+            tpos += count
+        anims.append(anim)
+    return verts, norms, faces, joint_data, joints, skin, anims, scale
+
+
+def load(path, scale=0.94):
+    """the model at path, a .dae, as parse_dae returns it. from path.daec
+    while it is up to date, otherwise parsed and written there"""
+    compiled = os.path.splitext(path)[0] + '.daec'
+    try:
+        with open(path, 'rb') as f:
+            source = f.read()
+        digest = hashlib.md5(source).digest()
+    except IOError:
+        #shipped without the dae
+        source, digest = None, None
+    try:
+        data = sections.read(compiled, digest, magic, version)
+    except (IOError, ValueError, mmap.error):
+        data = None
+    if data is None:
+        if source is None:
+            raise IOError('no model at %s' % path)
+        data = flatten(parsedae.parse_dae(StringIO(source), unscaled))
+        try:
+            sections.write(compiled, digest, data, magic, version)
+        except IOError:
+            pass
+    return unflatten(data, scale)
@@ -1,6 +1,6 @@
 from pyglet import graphics
 from pyglet import gl
-from collision.caabb import cAABB as AABB, Line
+from collision.caabb import cAABB as AABB
 from player.cvec2 import cvec2 as vec2
 
 font = 'Helvetica'
@@ -35,6 +35,8 @@ class Rect(AABB):
         self.ver_list.draw(gl.GL_QUADS)
 
     def on_update(self, x, y):
+        if self.ver_list is None:
+            return
         self.ver_list.vertices = [self.pos.x, self.pos.y, self.pos.x,
                                   self.pos.y + self.height,
                                   self.pos.x + self.width,
@@ -48,7 +50,9 @@ class Rect(AABB):
         self.color = color
 
     def remove(self):
-        self.ver_list.delete()
+        if self.ver_list is not None:
+            self.ver_list.delete()
+            self.ver_list = None
 
     def delete(self):
         self.remove()
@@ -70,50 +74,6 @@ class Rect(AABB):
         return rct
 
 
-class DrawaAbleLine(Line):
-    """docstring for DrawaAbleLine"""
-    def __init__(self, x, y, dx, dy, length=0, batch=None, color=(255, 255, 0),
-                 **kwargs):
-        super(DrawaAbleLine, self).__init__(x, y, dx, dy, length)
-        if length == 0:
-            self.length = 1000
-        else:
-            self.length = length
-        if not batch:
-            self.ver_list = graphics.vertex_list(2,
-                                                 ('v2f/stream', (x, y,
-                                                  x + dx * self.length,
-                                                  y + dy * self.length)),
-                                                 ('c3B', color * 2))
-        else:
-            self.ver_list = batch.add(2, gl.GL_LINES, None,
-                                      ('v2f/stream', (x, y,
-                                       x + self.unit.x * self.length,
-                                       y + self.unit.y * self.length)),
-                                      ('c3B', color * 2))
-
-    def on_update(self):
-        self.ver_list.vertices = [self.pos.x, self.pos.y,
-                                  self.pos.x + self.unit.x * self.length,
-                                  self.pos.y + self.unit.y * self.length]
-
-    def draw(self):
-        self.ver_list.draw(gl.GL_LINES)
-
-    def update_color(self, color):
-        self.ver_list.colors = list(color) * 2
-
-    def remove(self):
-        self.ver_list.delete()
-
-    def add(self, batch):
-        self.ver_list = batch.add(2, gl.GL_LINES, None,
-                                  ('v2f/stream', (self.pos.x, self.pos.y,
-                                   self.pos.x + self.unit.x * self.length,
-                                   self.pos.y + self.unit.y * self.length)),
-                                  ('c3B', self.color * 2))
-
-
 class TexQuad(object):
     """docstring for TexQuad"""
     def __init__(self, x, y, width, height, tex_coords):
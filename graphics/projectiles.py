@@ -0,0 +1,230 @@
+"""projectiles as the client draws them, in pools of one look each. a pool
+keeps its projectiles as a structure of arrays in slots that are reused,
+moves all of them at once and copies the vertices of the whole pool into
+its vertex list, one upload per pool and frame. free slots and the ones out
+of view are collapsed to a point instead of deleted. with numpy the arrays
+are numpy arrays, without it array.array and the pools loop"""
+from pyglet import gl
+from array import array
+from math import hypot
+import ctypes
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def floats(n, code='f'):
+    if np is not None:
+        return np.zeros(n, dtype=np.dtype(code))
+    return array(code, [0.]) * n
+
+
+def grown(arr, n):
+    if np is not None:
+        return np.concatenate((arr, np.zeros(n, dtype=arr.dtype)))
+    return arr + array(arr.typecode, [0.]) * n
+
+
+def address(arr):
+    if np is not None:
+        return arr.ctypes.data
+    return arr.buffer_info()[0]
+
+
+class Pool(object):
+    """slots of projectiles drawn with vertices each in mode. the arrays
+    named in fields and live have one double per slot, in floats rounding
+    could end a lifetime a frame early. the vertices are floats like the
+    vertex list"""
+    fields = ('x', 'y', 'time')
+    vertices = 4
+    mode = gl.GL_QUADS
+
+    def __init__(self, batch, color, capacity=16):
+        super(Pool, self).__init__()
+        self.batch = batch
+        self.color = list(color)
+        self.capacity = 0
+        self.free = []
+        self.ids = []
+        self.colors = []
+        self.vertex_list = None
+        for name in self.fields + ('live', ):
+            setattr(self, name, floats(0, 'd'))
+        self.verts = floats(0)
+        self.grow(capacity)
+
+    def grow(self, capacity):
+        """more slots, the vertex list is resized and keeps the colors"""
+        extra = capacity - self.capacity
+        for name in self.fields + ('live', ):
+            setattr(self, name, grown(getattr(self, name), extra))
+        self.verts = grown(self.verts, extra * self.vertices * 2)
+        self.ids.extend([None] * extra)
+        self.colors.extend([self.color] * extra)
+        #lowest slots first
+        self.free.extend(range(capacity - 1, self.capacity - 1, -1))
+        colors = [c for color in self.colors for c in color * self.vertices]
+        if self.vertex_list is None:
+            self.vertex_list = self.batch.add(
+                capacity * self.vertices, self.mode, None, 'v2f/stream',
+                ('c3B/dynamic', colors))
+        else:
+            self.vertex_list.resize(capacity * self.vertices)
+            self.vertex_list.colors = colors
+        self.capacity = capacity
+
+    def spawn(self, id, color=None, **values):
+        """a slot for the projectile id, with values for the fields"""
+        if not self.free:
+            self.grow(self.capacity * 2)
+        slot = self.free.pop()
+        for name in self.fields:
+            getattr(self, name)[slot] = values.get(name, 0.)
+        self.live[slot] = 1.
+        self.ids[slot] = id
+        self.tint(slot, list(color or self.color))
+        return slot
+
+    def tint(self, slot, color):
+        if self.colors[slot] != color:
+            self.colors[slot] = color
+            n = self.vertices * 3
+            self.vertex_list.colors[slot * n:(slot + 1) * n] = (
+                color * self.vertices)
+
+    def release(self, slot):
+        self.live[slot] = 0.
+        self.ids[slot] = None
+        n = self.vertices * 2
+        self.verts[slot * n:(slot + 1) * n] = floats(n)
+        self.free.append(slot)
+
+    def alive(self):
+        if np is not None:
+            return np.flatnonzero(self.live).tolist()
+        return [slot for slot in range(self.capacity) if self.live[slot]]
+
+    def expire(self, dt):
+        """counts down the time of every slot, frees the ones that ran out
+        and returns their ids"""
+        ids = []
+        if np is not None:
+            self.time -= dt
+            slots = np.flatnonzero(self.live * (self.time <= 0)).tolist()
+        else:
+            slots = []
+            for slot in self.alive():
+                self.time[slot] -= dt
+                if self.time[slot] <= 0:
+                    slots.append(slot)
+        for slot in slots:
+            ids.append(self.ids[slot])
+            self.release(slot)
+        return ids
+
+    def update(self, dt, view=None):
+        """one frame for all projectiles, returns the ids that are done"""
+        self.integrate(dt)
+        ids = self.expire(dt)
+        self.build(view)
+        ctypes.memmove(self.vertex_list.vertices, address(self.verts),
+                       len(self.verts) * 4)
+        return ids
+
+
+class QuadPool(Pool):
+    """rects of one size and color flying by their velocity, gravity pulls
+    them down"""
+    fields = ('x', 'y', 'vx', 'vy', 'time')
+
+    def __init__(self, batch, width, height, color, gravity=0., **kwargs):
+        self.width = width
+        self.height = height
+        self.gravity = gravity
+        super(QuadPool, self).__init__(batch, color, **kwargs)
+
+    def integrate(self, dt):
+        if np is not None:
+            if self.gravity:
+                self.vy -= self.gravity * dt
+            self.x += self.vx * dt
+            self.y += self.vy * dt
+            return
+        for slot in self.alive():
+            if self.gravity:
+                self.vy[slot] -= self.gravity * dt
+            self.x[slot] += self.vx[slot] * dt
+            self.y[slot] += self.vy[slot] * dt
+
+    def build(self, view):
+        """quads of the live rects within view, x, y, right, top"""
+        w, h = self.width, self.height
+        if np is not None:
+            x, y = self.x, self.y
+            shown = self.live
+            if view is not None:
+                shown = shown * ((x + w >= view[0]) & (x <= view[2]) &
+                                 (y + h >= view[1]) & (y <= view[3]))
+            left, bottom = x * shown, y * shown
+            right, top = (x + w) * shown, (y + h) * shown
+            quads = self.verts.reshape(-1, 8)
+            quads[:, 0] = quads[:, 2] = left
+            quads[:, 1] = quads[:, 7] = bottom
+            quads[:, 3] = quads[:, 5] = top
+            quads[:, 4] = quads[:, 6] = right
+            return
+        for slot in self.alive():
+            x, y = self.x[slot], self.y[slot]
+            if view is None or (x + w >= view[0] and x <= view[2] and
+                                y + h >= view[1] and y <= view[3]):
+                quad = (x, y, x, y + h, x + w, y + h, x + w, y)
+            else:
+                quad = (0., ) * 8
+            self.verts[slot * 8:slot * 8 + 8] = array('f', quad)
+
+    def place(self, slot, x, y):
+        self.x[slot], self.y[slot] = x, y
+
+
+class LinePool(Pool):
+    """lines of hitscan shots. a line with an owner starts at that player
+    and points where the player aims, follow(owner) gives x, y, mx, my.
+    the others move step along themselves every frame"""
+    fields = ('x', 'y', 'ux', 'uy', 'length', 'step', 'time', 'owner')
+    vertices = 2
+    mode = gl.GL_LINES
+
+    def __init__(self, batch, color, follow, **kwargs):
+        self.follow = follow
+        super(LinePool, self).__init__(batch, color, **kwargs)
+
+    def integrate(self, dt):
+        for slot in self.alive():
+            if self.owner[slot] >= 0:
+                x, y, mx, my = self.follow(int(self.owner[slot]))
+                mag = hypot(mx - x, my - y) or 1.
+                self.x[slot], self.y[slot] = x, y
+                self.ux[slot], self.uy[slot] = (mx - x) / mag, (my - y) / mag
+            elif np is None:
+                self.x[slot] += self.ux[slot] * self.step[slot]
+                self.y[slot] += self.uy[slot] * self.step[slot]
+        if np is not None:
+            self.x += self.ux * self.step
+            self.y += self.uy * self.step
+
+    def build(self, view):
+        """lines are short lived and drawn in or out of view"""
+        if np is not None:
+            lines = self.verts.reshape(-1, 4)
+            lines[:, 0] = self.x * self.live
+            lines[:, 1] = self.y * self.live
+            lines[:, 2] = (self.x + self.ux * self.length) * self.live
+            lines[:, 3] = (self.y + self.uy * self.length) * self.live
+            return
+        for slot in self.alive():
+            x, y, length = self.x[slot], self.y[slot], self.length[slot]
+            self.verts[slot * 4:slot * 4 + 4] = array('f', (
+                x, y, x + self.ux[slot] * length,
+                y + self.uy[slot] * length))
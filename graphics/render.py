@@ -4,9 +4,9 @@ from player.cvec2 import cvec2 as vec2
 from maps.map import DrawableMap
 from views import DrawablePlayer
 from network_utils import protocol_pb2 as proto
-from graphics.primitives import Rect, DrawaAbleLine, TexQuad
-from gameplay.weapons import spread, ProjContainer, weaponcolors
-from collision.caabb import Line
+from graphics.primitives import TexQuad
+from graphics.projectiles import QuadPool, LinePool
+from gameplay.weapons import spread, weaponcolors
 from shader import OffscreenBuffer as FBO, Shader, vector
 from matrix import Matrix
 
@@ -24,6 +24,7 @@ class Render(object):
         # scaling factors
         self.scale = vec2(window.width / 1360., window.height / 765.)
         self.players = {}
+        self.map = None
 
         #for rendering
         self.fbo = FBO(window.width, window.height)
@@ -37,10 +38,14 @@ class Render(object):
     def draw(self):
         with self.fbo:
             self.fbo.clear()
+            view = self.view()
             with self.camera as mvp:
+                if self.map:
+                    self.map.draw(view)
                 self.scene_batch.draw()
                 for player in self.players.itervalues():
-                    player.draw(mvp)
+                    if player.within(view):
+                        player.draw(mvp)
 
         #send texture data to shader
         for i in range(3):
@@ -63,7 +68,7 @@ class Render(object):
         elif taken:
             self.map.taken(map)
         elif add:
-            self.map = DrawableMap(map, self.scene_batch, self.scale)
+            self.map = DrawableMap(map, self.scale)
 
     def playerhook(self, player, remove=False, update=False, add=False):
         id = player.id
@@ -78,8 +83,14 @@ class Render(object):
 
     def update(self, dt):
         #self.model.update(dt, self.players[1].state)
+        view = self.view()
         for player in self.players.itervalues():
-            player.animate(dt)
+            player.animate(dt, view)
+
+    def view(self):
+        """the scene in view, with room for models and projectiles that
+        stick into it"""
+        return self.camera.visible(100 * self.scale.x)
 
     def weapon_check(self, id, weaponinfo):
         self.players[id].update_weapon(weaponinfo[1])
@@ -92,10 +103,12 @@ class Render(object):
 
 
 class ProjectileViewer(object):
+    """draws the projectiles the server announces and flies them until the
+    next correction. rects are kept in a QuadPool per look, hitscan lines
+    in a LinePool. projs maps a projectile id to its pool, its slots and
+    the time of its last update"""
 
-    """docstring for ProjectileViewer"""
-
-    def __init__(self, get_cent, batch, scale, rndhook=None):
+    def __init__(self, get_cent, batch, scale, rndhook=None, view=None):
         super(ProjectileViewer, self).__init__()
         self.projs = {}
         self.data = proto.Projectile()
@@ -104,6 +117,21 @@ class ProjectileViewer(object):
         self.scale = scale
         self.scalemag = self.scale.mag()
         self.renderhook = rndhook
+        #returns x, y, right, top of the scene in view
+        self.view = view
+        #type: pool, lifetime
+        explosion = QuadPool(batch, 250, 250, (255, 0, 150))
+        self.looks = {
+            proto.melee: (QuadPool(batch, 70, 70, (255, 0, 0)), 0.09),
+            proto.blaster: (QuadPool(batch, 10, 10, weaponcolors['w3']),
+                            10.1),
+            proto.gl: (QuadPool(batch, 15, 10, weaponcolors['w4'],
+                                gravity=1500), 2.6),
+            proto.explBlaster: (explosion, 0.06),
+            proto.explNade: (explosion, 0.06)}
+        self.lines = LinePool(batch, weaponcolors['w2'], self.follow)
+        self.pools = list(set(pool for pool, time in
+                              self.looks.itervalues())) + [self.lines]
 
     def process_proj(self, datagram):
         self.data.CopyFrom(datagram)
@@ -112,144 +140,85 @@ class ProjectileViewer(object):
             vel = vec2(self.data.velx, self.data.vely)
             pos = vec2(self.data.posx, self.data.posy)
             if ind in self.projs:
-                # self.projs[ind].update(*pos)
-                self.correct(pos * self.scale, vel * self.scale, ind)
+                #a correction may arrive after a newer bounce
+                if self.data.time >= self.projs[ind][2]:
+                    self.projs[ind][2] = self.data.time
+                    self.correct(pos * self.scale, vel * self.scale, ind)
+                return
+            if self.renderhook and self.data.type < 10:
+                self.renderhook(self.data.playerId)
+            if self.data.type in self.looks:
+                pool, time = self.looks[self.data.type]
+                slot = pool.spawn(ind, x=pos.x * self.scale.x,
+                                  y=pos.y * self.scale.y, vx=vel.x,
+                                  vy=vel.y, time=time)
+                self.projs[ind] = [pool, [slot], self.data.time]
+            elif self.data.type == proto.lg:
+                id = self.data.playerId
+                length = self.data.posx
+                color = (255, 0, 0) if self.data.posy else weaponcolors['w2']
+                x, y, mx, my = self.follow(id)
+                dr = vec2(mx - x, my - y)
+                drunit = dr / dr.mag()
+                length = (self.scale * drunit).mag() * length
+                slot = self.lines.spawn(
+                    ind, color, x=x, y=y, ux=drunit.x, uy=drunit.y,
+                    length=length, time=0.05, owner=id)
+                self.projs[ind] = [self.lines, [slot], self.data.time]
+            elif self.data.type == proto.sg:
+                id = self.data.playerId
+                color = (255, 0, 0) if self.data.posy else weaponcolors['w1']
+                x, y, mx, my = self.follow(id)
+                dr = vec2(mx - x, my - y)
+                dys = spread(dr.x, dr.y, angle=0.1, num=6)
+                slots = []
+                for dy in dys:
+                    un = vec2(dr.x, dy)
+                    un = un / un.mag()
+                    slots.append(self.lines.spawn(
+                        ind, color, x=x + un.x * 40, y=y + un.y * 40,
+                        ux=un.x, uy=un.y, length=100, step=50, time=0.05,
+                        owner=-1))
+                self.projs[ind] = [self.lines, slots, self.data.time]
             else:
-                if self.renderhook and self.data.type < 10:
-                    self.renderhook(self.data.playerId)
-                if self.data.type == proto.melee:
-                    self.projs[ind] = Rect(pos.x * self.scale.x,
-                                           pos.y * self.scale.y, width=70,
-                                           height=70,
-                                           color=(255, 0, 0), batch=self.batch)
-                    self.projs[ind].vel = vel
-                    self.projs[ind].time = 0.09
-                elif self.data.type == proto.blaster:
-                    self.projs[ind] = Rect(pos.x * self.scale.x,
-                                           pos.y * self.scale.y, width=10,
-                                           height=10,
-                                           color=weaponcolors['w3'],
-                                           batch=self.batch)
-                    self.projs[ind].vel = vel
-                    self.projs[ind].time = 10.1
-                elif self.data.type == proto.gl:
-                    self.projs[ind] = Rect(pos.x * self.scale.x,
-                                           pos.y * self.scale.y, width=15,
-                                           height=10,
-                                           color=weaponcolors['w4'],
-                                           batch=self.batch)
-                    self.projs[ind].vel = vel
-                    self.projs[ind].time = 2.6
-                elif self.data.type == proto.explBlaster:
-                    self.projs[ind] = Rect(pos.x * self.scale.x,
-                                           pos.y * self.scale.y, width=250,
-                                           height=250,
-                                           color=(255, 0, 150),
-                                           batch=self.batch)
-                    self.projs[ind].vel = vel
-                    self.projs[ind].time = 0.06
-                elif self.data.type == proto.explNade:
-                    self.projs[ind] = Rect(pos.x * self.scale.x,
-                                           pos.y * self.scale.y, width=250,
-                                           height=250,
-                                           color=(255, 0, 150),
-                                           batch=self.batch)
-                    self.projs[ind].vel = vel
-                    self.projs[ind].time = 0.06
-                elif self.data.type == proto.lg:
-                    id = self.data.playerId
-                    length = self.data.posx
-                    playerhit = self.data.posy
-                    center, mpos = self.get_center(id)
-                    center = vec2(*center + vec2(0, 18)) * self.scale
-                    mpos = vec2(*mpos) * self.scale
-                    dr = mpos - center
-                    drunit = dr / dr.mag()
-                    length = (self.scale * drunit).mag() * length
-                    line = DrawaAbleLine(center.x,
-                                         center.y, dr.x, dr.y,
-                                         length=length, batch=self.batch,
-                                         color=weaponcolors['w2'])
-                    if playerhit:
-                        line.update_color((255, 0, 0))
-                    line.time = 0.05
-                    line.id = id
-                    self.projs[ind] = line
-                elif self.data.type == proto.sg:
-                    id = self.data.playerId
-                    playerhit = self.data.posy
-                    center, mpos = self.get_center(id)
-                    center = vec2(*center + vec2(0, 18)) * self.scale
-                    mpos = vec2(*mpos) * self.scale
-                    dr = mpos - center
-                    dys = spread(dr.x, dr.y, angle=0.1, num=6)
-                    cont = ProjContainer(0.05, id)
-                    for dy in dys:
-                        un = vec2(dr.x, dy)
-                        un = un / un.mag()
-                        line = DrawaAbleLine(center.x + un.x * 40,
-                                             center.y + un.y * 40,
-                                             dr.x, dy, length=100,
-                                             batch=self.batch,
-                                             color=weaponcolors['w1'])
-                        if playerhit:
-                            line.update_color((255, 0, 0))
-                        cont.append(line)
-                    self.projs[ind] = cont
-                else:
-                    raise ValueError
+                raise ValueError
         else:
             try:
-                self.projs[ind].remove()
-                del self.projs[ind]
+                pool, slots, stamp = self.projs.pop(ind)
             except KeyError:
-                pass
+                return
+            for slot in slots:
+                pool.release(slot)
+
+    def follow(self, id):
+        """start and aim of the lines of player id, scaled"""
+        center, mpos = self.get_center(id)
+        sx, sy = self.scale
+        return (center.x * sx, (center.y + 18) * sy,
+                mpos[0] * sx, mpos[1] * sy)
 
     def update(self, dt):
-        todelete = []
-        for key, proj in self.projs.iteritems():
-            if isinstance(proj, Rect):
-                if proj.color == weaponcolors['w4']:
-                    proj.vel.y -= 1500 * dt
-                pos = proj.pos + proj.vel * dt
-                ##self.interpolate(key, pos)
-                proj.update(*pos)
-                proj.time -= dt
-                if proj.time <= 0:
-                    proj.remove()
-                    todelete.append(key)
-            elif isinstance(proj, Line):
-                proj.time -= dt
-                if proj.time <= 0:
-                    proj.remove()
-                    todelete.append(key)
-                center, mpos = self.get_center(proj.id)
-                center = vec2(*center + vec2(0, 18)) * self.scale
-                mpos = vec2(*mpos) * self.scale
-                proj.update(center.x, center.y, mpos[0], mpos[1])
-            elif isinstance(proj, ProjContainer):
-                proj.time -= dt
-                if proj.time <= 0:
-                    for p in proj:
-                        p.remove()
-                    todelete.append(key)
-                for p in proj:
-                    u = p.unit
-                    m = p.pos + u + u * 50
-                    p.update(p.pos.x + u.x * 50, p.pos.y + u.y * 50, m.x, m.y)
-        for key in todelete:
-            del self.projs[key]
+        view = self.view() if self.view else None
+        for pool in self.pools:
+            for id in pool.update(dt, view):
+                #the lines of a shotgun blast run out together
+                self.projs.pop(id, None)
 
     def draw(self):
         self.batch.draw()
 
     def correct(self, pos, vel, id):
-        self.projs[id].vel = vel
-        if (self.projs[id].pos - pos).mag() > 20 * self.scalemag:
-            self.projs[id].update(*pos)
+        pool, slots, stamp = self.projs[id]
+        slot = slots[0]
+        pool.vx[slot], pool.vy[slot] = vel
+        if (vec2(pool.x[slot], pool.y[slot]) - pos).mag() > (
+                20 * self.scalemag):
+            pool.place(slot, *pos)
         else:
             self.interpolate(id, pos)
 
     def interpolate(self, id, pos):
-        npos = (pos - self.projs[id].pos) * 0.3
-        self.projs[id].update(*(self.projs[id].pos + npos))
+        pool, slots, stamp = self.projs[id]
+        slot = slots[0]
+        x, y = pool.x[slot], pool.y[slot]
+        pool.place(slot, x + (pos.x - x) * 0.3, y + (pos.y - y) * 0.3)
@@ -3,9 +3,10 @@ uniform mat4 mvp;
 uniform vec4 quats[33];
 uniform vec4 vecs[33];
 uniform float scale;
+uniform vec4 color;
+uniform vec4 offset;
 layout(location = 0) in vec4 vert;
 layout(location = 1) in vec4 norm;
-layout(location = 2) in vec4 o_col;
 layout(location = 3) in vec4 weights;
 layout(location = 4) in int count;
 layout(location = 5) in vec4 bone_ids;
@@ -21,9 +22,10 @@ vec4 transform(in vec4 quat, in vec4 vec, in float scale, in vec4 o_pos){
 }
 
 void main(){
-    col = o_col;
+    col = color;
     int ct = count;
     ivec4 indices = ivec4(bone_ids);
+    float total = weights.x;
     new_pos = transform(
         quats[indices.x], vecs[indices.x], scale, vert) * weights.x;
     new_norm = transform(
@@ -34,6 +36,7 @@ void main(){
             quats[indices.y], vecs[indices.y], scale, vert) * weights.y;
         new_norm += transform(
             quats[indices.y], vecs[indices.y], 0, norm) * weights.y;
+        total += weights.y;
         ct = ct - 1;
     }
     if (ct > 0){
@@ -41,6 +44,7 @@ void main(){
             quats[indices.z], vecs[indices.z], scale, vert) * weights.z;
         new_norm += transform(
             quats[indices.z], vecs[indices.z], 0, norm) * weights.z;
+        total += weights.z;
         ct = ct - 1;
     }
     if (ct > 0){
@@ -48,7 +52,10 @@ void main(){
             quats[indices.w], vecs[indices.w], scale, vert) * weights.w;
         new_norm += transform(
             quats[indices.w], vecs[indices.w], 0, norm) * weights.w;
+        total += weights.w;
     }
+    //poses are at the origin, every bone moves by offset
+    new_pos.xyz += offset.xyz * total;
     new_pos.w = 1;
     if (norm.w == 0.5)
         new_norm.w = 0;
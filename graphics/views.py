@@ -5,6 +5,8 @@ from gameplay.weapons import weaponcolors
 
 weaponcolors = {int(key[1:]) + 1: [c / 255. for c in color] + [1.]
                 for key, color in weaponcolors.iteritems()}
+#seconds between poses of players out of view
+offscreen_step = 0.1
 
 
 class DrawablePlayer(object):
@@ -17,6 +19,8 @@ class DrawablePlayer(object):
         self.model = Model(path.join('graphics', 'metatest.dae'), fac.x)
         self.model.change_color([c / 255. for c in player.rect.color] + [1.])
         self.weapon = None
+        #time since the last pose
+        self.pending = 0.
         # self.scale(fac)
 
     def scale(self, fac):
@@ -32,8 +36,20 @@ class DrawablePlayer(object):
         self.state.mpos = state.mpos - state.pos - vec2(16, 54)
         self.state.pos = pos
 
-    def animate(self, dt):
-        self.model.update(dt, self.state)
+    def animate(self, dt, view=None):
+        """places the model every frame, poses it every frame while it is
+        within view and every offscreen_step otherwise"""
+        self.model.place(self.state.pos)
+        self.pending += dt
+        if (view is not None and not self.within(view) and
+                self.pending < offscreen_step):
+            return
+        self.model.update(self.pending, self.state)
+        self.pending = 0.
+
+    def within(self, view):
+        x, y = self.state.pos
+        return view[0] <= x <= view[2] and view[1] <= y <= view[3]
 
     def update_weapon(self, weapon):
         if weapon != self.weapon:
@@ -1,12 +1,14 @@
 from xml.etree import ElementTree as ET
-from collision.quadtree import QuadTree
+from collision.grid import StaticGrid
+from collision.caabb import cAABB
 from player.cvec2 import cvec2 as vec2
 from gameplay.items import *
 from gameplay.weapons import *
 from elements import Teleporter
-import copy
+import mapcompiler
 try:
     from graphics.primitives import *
+    from pyglet.graphics import Batch
 except:
     from collision.caabb import cAABB as Rect
 
@@ -16,8 +18,11 @@ class Map(object):
     def __init__(self, mapname, server=False, batch=None, renderhook=None):
         super(Map, self).__init__()
         self.name = mapname
+        #rects as drawn and the merged solids the collision uses
         self.rects = []
-        self.quad_tree = None
+        self.solids = []
+        self.bounds = None
+        self.grid = None
         self.server = server
         self.batch = batch
         self.Rect = Rect
@@ -28,178 +33,113 @@ class Map(object):
             pass
 
     def load(self, mapname):
-        tree = ET.parse(mapname)
-        root = tree.getroot()
-        rects = []
-
-        for child in root.getchildren():
-            if child.attrib['id'] == 'layer1':
-                for rect in child:
-                    atr = rect.attrib
-                    x = float(atr['x'])
-                    y = float(atr['y'])
-                    width = float(atr['width'])
-                    height = float(atr['height'])
-                    color = (51, 51, 51)
-                    rects.append(self.Rect(x, - y - height, width,
-                                 height, color, batch=self.batch))
-
-        max_x = max(rect.pos.x + rect.width for rect in rects)
-        max_y = max(rect.pos.y + rect.height for rect in rects)
-
-        self.quad_tree = QuadTree(0, self.Rect(0, 0, max_x, max_y),
-                                  server=self.server)
-        self.rects = rects
-        self.quad_tree.clear()
-        for rect in rects:
-            self.quad_tree.insert(rect)
-
-        self.spawns = []
-        for child in root.getchildren():
-            if child.attrib['id'] == 'layer2':
-                for recht in child:
-                    atr = recht.attrib
-                    x = float(atr['x'])
-                    y = float(atr['y'])
-                    height = float(atr['height'])
-                    self.spawns.append(Spawn(x, -y - height))
+        data = mapcompiler.load(mapname)
+        color = (51, 51, 51)
+        self.rects = [self.Rect(x, y, width, height, color, batch=self.batch)
+                      for x, y, width, height in data['rect']]
+        self.solids = [cAABB(*box) for box in data['soli']]
+        self.bounds = mapcompiler.bounds(self.solids)
+        #candidates for the sweeps of players and projectiles
+        self.grid = StaticGrid(self.solids,
+                               index=(data['gstr'], data['gitm']))
+
+        self.spawns = [Spawn(x, y) for x, y in data['spwn']]
 
         #armors
         self.ind = 0
-        for child in root.getchildren():
-            if child.attrib['id'] == 'armors':
-                for rect in child:
-                    atr = rect.attrib
-                    x = float(atr['x'])
-                    y = float(atr['y'])
-                    width = float(atr['width'])
-                    height = float(atr['height'])
-                    avalue = int(atr['armor'])
-                    color, maxarmor = armors[avalue]
-                    respawn = timers['armor']
-                    if self.server:
-                        armor = Armor(x=x, y=-y-height, width=width,
-                                      height=height, value=avalue,
+        for x, y, width, height, avalue in data['armr']:
+            avalue = int(avalue)
+            color, maxarmor = armors[avalue]
+            respawn = timers['armor']
+            if self.server:
+                armor = Armor(x=x, y=y, width=width,
+                              height=height, value=avalue,
+                              bonus=False, respawn=respawn,
+                              color=color, ind=self.ind,
+                              maxarmor=maxarmor, batch=self.batch)
+            else:
+                armor = DrawableArmor(x=x+6, y=y,
+                                      width=width-12,
+                                      height=height-12, value=avalue,
                                       bonus=False, respawn=respawn,
                                       color=color, ind=self.ind,
-                                      maxarmor=maxarmor, batch=self.batch)
-                    else:
-                        armor = DrawableArmor(x=x+6, y=-y-height,
-                                              width=width-12,
-                                              height=height-12, value=avalue,
-                                              bonus=False, respawn=respawn,
-                                              color=color, ind=self.ind,
-                                              maxarmor=maxarmor,
-                                              batch=self.batch)
-                    self.items.add(armor)
-                    self.ind += 1
+                                      maxarmor=maxarmor,
+                                      batch=self.batch)
+            self.items.add(armor)
+            self.ind += 1
 
         #healths
-        for child in root.getchildren():
-            if child.attrib['id'] == 'health':
-                for rect in child:
-                    atr = rect.attrib
-                    x = float(atr['x'])
-                    y = float(atr['y'])
-                    width = float(atr['width'])
-                    height = float(atr['height'])
-                    hvalue = int(atr['health'])
-                    color, maxhp = health[hvalue]
-                    respawn = timers['health']
-                    if self.server:
-                        health_ = Health(x=x, y=-y-height, width=width,
-                                         height=height, value=hvalue,
-                                         bonus=False, respawn=respawn,
-                                         color=color, ind=self.ind,
-                                         maxhp=maxhp, batch=self.batch)
-                    else:
-                        health_ = HealthBox(x+6, -y - height, width-12,
-                                            height-12,
-                                            color=color, batch=self.batch,
-                                            ind=self.ind)
-                    self.items.add(health_)
-                    self.ind += 1
+        for x, y, width, height, hvalue in data['hlth']:
+            hvalue = int(hvalue)
+            color, maxhp = health[hvalue]
+            respawn = timers['health']
+            if self.server:
+                health_ = Health(x=x, y=y, width=width,
+                                 height=height, value=hvalue,
+                                 bonus=False, respawn=respawn,
+                                 color=color, ind=self.ind,
+                                 maxhp=maxhp, batch=self.batch)
+            else:
+                health_ = HealthBox(x+6, y, width-12,
+                                    height-12,
+                                    color=color, batch=self.batch,
+                                    ind=self.ind)
+            self.items.add(health_)
+            self.ind += 1
 
         #weapons
-        for child in root.getchildren():
-            if child.attrib['id'] == 'weapons':
-                for rect in child:
-                    atr = rect.attrib
-                    x = float(atr['x'])
-                    y = float(atr['y'])
-                    width = float(atr['width'])
-                    height = float(atr['height'])
-                    weapstr = atr['weapon']
-                    color = weaponcolors[weapstr]
-                    respawn = timers['weapons']
-                    if self.server:
-                        w = allweapons[weapstr]
-                        w_ = w(0, 0, x=x, y=-y-height, width=width,
-                               height=height, respawn=respawn, color=color,
-                               ind=self.ind, batch=self.batch)
-                        self.items.add(w_)
-                    else:
-                        w_ = Triangle(x=x+6, y=-y-height, width=width-12,
-                                      height=height-12, color=color,
-                                      ind=self.ind,
-                                      batch=self.batch, keystr=weapstr)
-                        self.items.add(w_)
-                    self.ind += 1
+        for x, y, width, height, weapon in data['weap']:
+            weapstr = 'w%i' % weapon
+            color = weaponcolors[weapstr]
+            respawn = timers['weapons']
+            if self.server:
+                w = allweapons[weapstr]
+                w_ = w(0, 0, x=x, y=y, width=width,
+                       height=height, respawn=respawn, color=color,
+                       ind=self.ind, batch=self.batch)
+            else:
+                w_ = Triangle(x=x+6, y=y, width=width-12,
+                              height=height-12, color=color,
+                              ind=self.ind,
+                              batch=self.batch, keystr=weapstr)
+            self.items.add(w_)
+            self.ind += 1
 
         #ammo
-        for child in root.getchildren():
-            if child.attrib['id'] == 'ammo':
-                for rect in child:
-                    atr = rect.attrib
-                    x = float(atr['x'])
-                    y = float(atr['y'])
-                    width = float(atr['width'])
-                    height = float(atr['height'])
-                    weapstr = atr['weapon']
-                    color = weaponcolors[weapstr]
-                    max_ammo, ammoval = ammo_values[weapstr]
-                    respawn = timers['weapons']
-                    if self.server:
-                        w_ = Ammo(x=x, y=-y-height, width=width,
-                                  height=height, respawn=respawn, color=color,
-                                  ind=self.ind, batch=self.batch,
-                                  max_ammo=max_ammo, ammoval=ammoval,
-                                  keystring=weapstr)
-                        self.items.add(w_)
-                    else:
-                        w_ = AmmoTriangle(x=x+6, y=-y-height, width=width-12,
-                                          height=height-12, color=color,
-                                          ind=self.ind,
-                                          batch=self.batch, keystr=weapstr)
-                        self.items.add(w_)
-                    self.ind += 1
+        for x, y, width, height, weapon in data['ammo']:
+            weapstr = 'w%i' % weapon
+            color = weaponcolors[weapstr]
+            max_ammo, ammoval = ammo_values[weapstr]
+            respawn = timers['weapons']
+            if self.server:
+                w_ = Ammo(x=x, y=y, width=width,
+                          height=height, respawn=respawn, color=color,
+                          ind=self.ind, batch=self.batch,
+                          max_ammo=max_ammo, ammoval=ammoval,
+                          keystring=weapstr)
+            else:
+                w_ = AmmoTriangle(x=x+6, y=y, width=width-12,
+                                  height=height-12, color=color,
+                                  ind=self.ind,
+                                  batch=self.batch, keystr=weapstr)
+            self.items.add(w_)
+            self.ind += 1
 
         #tele
-        for child in root.getchildren():
-            if child.attrib['id'] == 'teles':
-                for rect in child:
-                    atr = rect.attrib
-                    x = float(atr['x'])
-                    y = float(atr['y'])
-                    width = float(atr['width'])
-                    height = float(atr['height'])
-                    destination = vec2(float(atr['dest_x']),
-                                       float(atr['dest_y']))
-                    dest_sign = int(atr['dest_sign'])
-                    color = (255, 255, 0)
-                    max_ammo, ammoval = ammo_values[weapstr]
-                    if self.server:
-                        w_ = Teleporter(x=x, y=-y-height, width=width,
+        for x, y, width, height, dest_x, dest_y, dest_sign in data['tele']:
+            destination = vec2(dest_x, dest_y)
+            color = (255, 255, 0)
+            if self.server:
+                w_ = Teleporter(x=x, y=y, width=width,
+                                height=height, color=color,
+                                ind=self.ind, destination=destination,
+                                dest_sign=int(dest_sign))
+            else:
+                w_ = DrawableTeleporter(x=x, y=y, width=width,
                                         height=height, color=color,
-                                        ind=self.ind, destination=destination,
-                                        dest_sign=dest_sign)
-                        self.items.add(w_)
-                    else:
-                        w_ = DrawableTeleporter(x=x, y=-y-height, width=width,
-                                                height=height, color=color,
-                                                batch=self.batch)
-                        self.items.add(w_)
-                    self.ind += 1
+                                        batch=self.batch)
+            self.items.add(w_)
+            self.ind += 1
 
     def draw(self):
         self.batch.draw()
@@ -208,21 +148,51 @@ class Map(object):
         self.items.fromserver(itemid, spawn)
 
 
+#side of the squares the drawn map is cut into, in scaled coordinates
+chunk = 512.
+
+
+def corner(obj):
+    try:
+        return obj.pos.x, obj.pos.y
+    except AttributeError:
+        return obj.x, obj.y
+
+
+def chunks(boxes, size=chunk):
+    """boxes as (x, y, width, height) grouped by the square of side size
+    their lower left corner is in. a list of the member indices and the
+    bounds of each group, which grow to what sticks out"""
+    cells = {}
+    for ind, (x, y, width, height) in enumerate(boxes):
+        cells.setdefault((x // size, y // size), []).append(ind)
+    groups = []
+    for key in sorted(cells):
+        members = [boxes[ind] for ind in cells[key]]
+        x = min(box[0] for box in members)
+        y = min(box[1] for box in members)
+        groups.append((cells[key], (
+            x, y, max(box[0] + box[2] for box in members) - x,
+            max(box[1] + box[3] for box in members) - y)))
+    return groups
+
+
 class DrawableMap(object):
-    """docstring for DrawableMap"""
-    def __init__(self, map, batch, fac):
+    """the rects and items of the map, scaled and cut into chunks with a
+    batch each. a grid over the bounds of the chunks finds the ones draw
+    has to submit"""
+    def __init__(self, map, fac):
         super(DrawableMap, self).__init__()
         self.items = map.items.items[:]
         self.rects = [rect.copy() for rect in map.rects]
-        self.batch = batch
         self.scale(fac)
+        self.cut()
 
     def scale(self, fac):
         for rect in self.rects:
             rect.pos *= fac
             rect.width *= fac.x
             rect.height *= fac.y
-            rect.add(self.batch)
         for ind, item in enumerate(self.items):
             try:
                 item.pos *= fac
@@ -231,10 +201,33 @@ class DrawableMap(object):
                 item.y *= fac.y
             item.width *= fac.x
             item.height *= fac.y
-            item.add(self.batch)
+
+    def cut(self):
+        """one batch per chunk, indexed by its bounds"""
+        objs = self.rects + self.items
+        self.batches = []
+        self.item_batches = [None] * len(self.items)
+        bounds = []
+        for members, box in chunks([corner(obj) + (obj.width, obj.height)
+                                    for obj in objs]):
+            batch = Batch()
+            for ind in members:
+                objs[ind].add(batch)
+                if ind >= len(self.rects):
+                    self.item_batches[ind - len(self.rects)] = batch
+            self.batches.append(batch)
+            bounds.append(cAABB(*box))
+        self.grid = StaticGrid(bounds, chunk)
+
+    def draw(self, view):
+        """draws the chunks overlapping view, x, y, right, top"""
+        n = self.grid.query(*view)
+        found = self.grid.found
+        for i in range(n):
+            self.batches[found[i]].draw()
 
     def spawn(self, id):
-        self.items[id].add(self.batch)
+        self.items[id].add(self.item_batches[id])
 
     def taken(self, id):
         self.items[id].remove()
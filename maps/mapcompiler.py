@@ -0,0 +1,139 @@
+"""compiles maps/*.svg into a binary file next to it, maps/name.mapc, with
+everything Map.load needs: the rects as drawn, the merged collision solids,
+spawns, items, teleporters and the cell index of the static grid. load
+maps the file and falls back to the svg, writing the file again, when it is
+missing, of another version or the svg changed.
+
+the file is laid out as sections.py describes, with magic PGMAPC. the rows
+are doubles, the cell index of the grid ints"""
+from xml.etree import ElementTree as ET
+from collision.caabb import cAABB
+from collision.grid import StaticGrid
+import hashlib
+import mmap
+import os
+import sections
+
+magic = 'PGMAPC'
+version = 1
+
+#svg layer, tag and attributes of the rows, in the order of Map.load
+layers = (('layer1', 'rect', ()),
+          ('layer2', 'spwn', ()),
+          ('armors', 'armr', ('armor', )),
+          ('health', 'hlth', ('health', )),
+          ('weapons', 'weap', ('weapon', )),
+          ('ammo', 'ammo', ('weapon', )),
+          ('teles', 'tele', ('dest_x', 'dest_y', 'dest_sign')))
+
+
+def join(boxes, axis):
+    """one pass over boxes as [x, y, width, height], joining the ones that
+    touch or overlap along axis and have the same span on the other axis.
+    a joined box takes the place of its first member"""
+    lines = {}
+    for ind, box in enumerate(boxes):
+        lines.setdefault((box[1 - axis], box[3 - axis]), []).append(ind)
+    dropped = set()
+    for inds in lines.itervalues():
+        inds.sort(key=lambda ind: boxes[ind][axis])
+        first = None
+        for ind in inds:
+            box = boxes[ind]
+            if first is None or box[axis] > (boxes[first][axis] +
+                                             boxes[first][axis + 2]):
+                first = ind
+                continue
+            run = boxes[first]
+            start = min(run[axis], box[axis])
+            end = max(run[axis] + run[axis + 2], box[axis] + box[axis + 2])
+            first, drop = min(first, ind), max(first, ind)
+            boxes[first][axis], boxes[first][axis + 2] = start, end - start
+            dropped.add(drop)
+    return [kept for ind, kept in enumerate(boxes) if ind not in dropped]
+
+
+def merge(boxes):
+    """collision solids as (x, y, width, height): axis aligned boxes on the
+    same rows or columns merged into maximal rectangles, until no two can
+    be merged. without merges the boxes come back in their order"""
+    boxes = [list(box) for box in boxes]
+    while True:
+        count = len(boxes)
+        boxes = join(join(boxes, 0), 1)
+        if len(boxes) == count:
+            return [tuple(box) for box in boxes]
+
+
+def bounds(rects):
+    """min_x, min_y, max_x, max_y of rects"""
+    return (min(rect.pos.x for rect in rects),
+            min(rect.pos.y for rect in rects),
+            max(rect.pos.x + rect.width for rect in rects),
+            max(rect.pos.y + rect.height for rect in rects))
+
+
+def value(atr, name):
+    if name == 'weapon':
+        #weapon keys are w0 to w4
+        return float(atr[name][1:])
+    return float(atr[name])
+
+
+def parse(source):
+    """rows of every section from the svg text, positions flipped to y up
+    like Map.load used. spawns only keep their position"""
+    root = ET.fromstring(source)
+    tags = dict((layer, (tag, extra)) for layer, tag, extra in layers)
+    data = dict((tag, []) for layer, tag, extra in layers)
+    for child in root:
+        if child.attrib.get('id') not in tags:
+            continue
+        tag, extra = tags[child.attrib['id']]
+        for rect in child:
+            atr = rect.attrib
+            x, y = float(atr['x']), float(atr['y'])
+            height = float(atr['height'])
+            if tag == 'spwn':
+                data[tag].append((x, -y - height))
+                continue
+            width = float(atr['width'])
+            data[tag].append((x, -y - height, width, height) +
+                             tuple(value(atr, name) for name in extra))
+    data['soli'] = merge(data['rect'])
+    return data
+
+
+def index(data):
+    """cell index of the static grid over the solids"""
+    grid = StaticGrid([cAABB(*box) for box in data['soli']])
+    data['gstr'], data['gitm'] = grid.index()
+
+
+def load(path):
+    """sections of the map at path, the svg. from path.mapc while it is up
+    to date, otherwise compiled from the svg and written there. raises
+    ET.ParseError if the svg is no map"""
+    compiled = os.path.splitext(path)[0] + '.mapc'
+    try:
+        with open(path, 'rb') as f:
+            source = f.read()
+        digest = hashlib.md5(source).digest()
+    except IOError:
+        #shipped without the svg
+        source, digest = None, None
+    try:
+        data = sections.read(compiled, digest, magic, version)
+    except (IOError, ValueError, mmap.error):
+        data = None
+    if data is not None:
+        return data
+    if source is None:
+        raise IOError('no map at %s' % path)
+    data = parse(source)
+    index(data)
+    try:
+        sections.write(compiled, digest, data, magic, version)
+    except IOError:
+        pass
+    return data
@@ -28,7 +28,7 @@ class GameScreen(Events):
         self.player = player.Player(renderhook=self.render.playerhook)
         self.proj_viewer = ProjectileViewer(
             self.send_center, batch=sc_batch, scale=self.render.scale,
-            rndhook=self.render.attack)
+            rndhook=self.render.attack, view=self.render.view)
         self.controls = {}
         self.controls_old = {}
         self.map = Map('blank')
@@ -65,9 +65,8 @@ class GameScreen(Events):
 
         self.update_keys()
         for plr in self.players.itervalues():
-            mapgen = [rect for rect in self.map.quad_tree.retrieve([],
-                      plr.rect)]
-            plr.predict(dt, mapgen)
+            plr.rect.update(*plr.state.pos)
+            plr.predict(dt, self.map.grid.retrieve([], plr.rect))
         self.on_update(dt)
 
     def update_physics(self, dt, state=False, input=False):
@@ -256,7 +255,14 @@ class GameScreen(Events):
         if self.rest_time >= timestep * 6:
             self.time += int(timestep * 1000000.)
             self.rest_time = 0
-            self.send_message('input', (proto.Input(), self.time))
+            #tell the server what we look at for interest management
+            inpt = proto.Input()
+            if self.isSpec > 0.5:
+                inpt.follow = self.isSpec
+            else:
+                inpt.follow = 0
+                inpt.mx, inpt.my = self.player.state.pos
+            self.send_message('input', (inpt, self.time))
 
     def draw(self):
         self.render.draw()
@@ -461,6 +467,5 @@ class GameScreen(Events):
     def get_rect(self):
         playerlist = [player.rect for player in self.players.itervalues()
                       if not player.state.isDead]
-        maplist = [rect for rect in self.map.quad_tree.retrieve([],
-                   self.player.rect)]
-        return playerlist + maplist
+        self.player.rect.update(*self.player.state.pos)
+        return self.map.grid.retrieve(playerlist, self.player.rect)
@@ -1,8 +1,10 @@
 import protocol_pb2 as proto
 from twisted.internet.protocol import DatagramProtocol
 from player.state import state
+from player.cmstate import cMState
 from player.cvec2 import cvec2 as vec2
 from reliable import AckManager
+from snapshot import SnapshotReceiver
 from player.options import Options
 
 
@@ -18,11 +20,14 @@ class Client(DatagramProtocol):
         self.input = proto.Input()
         self.id = None
         self.ackman = AckManager()
+        self.snapshots = SnapshotReceiver()
 
         self.listeners = {}
 
     def start_connection(self):
         # self.transport.connect(*self.host)
+        #the server may have been restarted
+        self.ackman.drop(self.host)
         opts = Options()
         self.message.Clear()
         self.message.type = proto.newPlayer
@@ -48,6 +53,7 @@ class Client(DatagramProtocol):
         self.connected = False
         self.id = None
         self.time = 0
+        self.snapshots.reset()
 
     def get_input(self, event, msg):
         #self.input, dt = msg
@@ -59,7 +65,11 @@ class Client(DatagramProtocol):
             self.input.time = time
             self.input.id = self.id
             self.message.input.CopyFrom(self.input)
-            msg_ = self.message.SerializeToString()
+            #acknowledge the newest complete snapshot as delta baseline
+            self.message.baseline = self.snapshots.baseline
+            #acknowledgements ride on the input
+            msg_ = (self.message.SerializeToString() +
+                    self.ackman.piggyback(self.host))
             self.transport.write(msg_, self.host)
         elif event == 'other':
             #only need one message for now, check git for other
@@ -70,29 +80,30 @@ class Client(DatagramProtocol):
 
     def datagramReceived(self, datagram, address):
         self.message.ParseFromString(datagram)
+        if self.message.HasField('ackLatest'):
+            self.ackman.receive_acks(self.message, address)
+        if (self.message.HasField('ack') and
+                not self.ackman.receive(self.message, address)):
+            #reliable message that was already processed
+            return
         if self.message.type == proto.connectResponse and not self.id:
             self.connected = True
             self.id = self.message.player.id
+            self.snapshots.reset()
             name = self.message.player.chat
             mapname = self.message.input.name
             gs = self.message.gameState
-            self.ackman.respond(self.message, address)
             self.send_message('on_connect', (self.id, mapname, name, gs))
+        elif self.message.type == proto.snapshot and self.connected:
+            for update in self.snapshots.receive(self.message):
+                self.player_update(update)
         elif self.message.type == proto.playerUpdate and self.connected:
-            ind = self.message.player.id
-            state = self.server_to_state(self.message.player)
-            time = self.message.player.time
-            inpt = self.message.input
-            weaponinfo = (self.message.player.ammo, self.message.player.weapon)
-            self.send_message('serverdata',
-                              (proto.playerUpdate, (ind, time, state, inpt,
-                               weaponinfo)))
+            self.player_update(self.message)
         elif self.message.type == proto.newPlayer and self.connected:
             ind = self.message.player.id
             name = self.message.player.chat
             gs = self.message.gameState
             colstring = self.message.input.name
-            self.ackman.respond(self.message, address)
             if gs == proto.goesSpec:
                 self.send_message('serverdata',
                                   (proto.newPlayer, (gs,
@@ -105,13 +116,10 @@ class Client(DatagramProtocol):
                                    name, state, time, colstring))))
         elif self.message.type == proto.disconnect and self.connected:
             ind = self.message.player.id
-            self.ackman.respond(self.message, address)
             self.send_message('serverdata', (proto.disconnect, ind))
         elif self.message.type == proto.projectile and self.connected:
             self.send_message('serverdata',
                               (proto.projectile, self.message.projectile))
-        elif self.message.type == proto.ackResponse:
-            self.ackman.receive_ack(self.message)
         elif self.message.type == proto.stateUpdate:
             ind = self.message.player.id
             stat = self.message.gameState
@@ -126,7 +134,6 @@ class Client(DatagramProtocol):
             elif stat == proto.isReady:
                 name = self.message.player.chat
                 ind = (ind, name)
-            self.ackman.respond(self.message, address)
             self.send_message('serverdata', (proto.stateUpdate,
                               (gt, (stat, ind))))
         elif self.message.type == proto.mapUpdate:
@@ -134,15 +141,26 @@ class Client(DatagramProtocol):
             itemid = self.message.input.id
             gt = self.message.gameTime
             spawn = self.message.input.right
-            self.ackman.respond(self.message, address)
             self.send_message('serverdata', (proto.mapUpdate,
                               (ind, itemid, gt, spawn)))
         elif self.message.type == proto.chat:
-            self.ackman.respond(self.message, address)
             ind = self.message.player.id
             chat = self.message.player.chat
             self.send_message('serverdata', (proto.chat, (ind, chat)))
 
+    def player_update(self, msg):
+        ind = msg.player.id
+        state = self.server_to_state(msg.player)
+        time = msg.player.time
+        #copy, the input gets modified by the prediction and the update
+        #has to stay intact as baseline for the following deltas
+        inpt = proto.Input()
+        inpt.CopyFrom(msg.input)
+        weaponinfo = (msg.player.ammo, msg.player.weapon)
+        self.send_message('serverdata',
+                          (proto.playerUpdate, (ind, time, state, inpt,
+                           weaponinfo)))
+
     def register(self, listener, events=None):
         self.listeners[listener] = events
 
@@ -162,8 +180,8 @@ class Client(DatagramProtocol):
         vel = vec2(data.velx, data. vely)
         hp = data.hp
         armor = data.armor
-        conds = proto.MState()
-        conds.CopyFrom(data.mState)
+        conds = cMState()
+        conds.from_proto(data.mState)
         return state(pos, vel, hp, armor, conds=conds)
 
     def register_ack(self):
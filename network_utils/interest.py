@@ -0,0 +1,77 @@
+from collision.caabb import cAABB as AABB
+from collision import sap
+from itertools import chain
+
+#half extents of the area a client can see, screen plus camera look ahead
+view_x = 1360 / 2. + 450
+view_y = 765 / 2. + 450
+#entities outside the view are sent every far_rate ticks
+far_rate = 10
+
+
+class InterestManager(object):
+    """area of interest filtering. once per tick every recipient gets the
+    set of players overlapping its view from the broadphase. entities
+    inside the view are sent every tick, everything else only every
+    far_rate ticks, staggered by recipient id. spectators get the view of
+    the player they follow, free flying spectators the one around their
+    camera. recipients without a known view get everything."""
+    def __init__(self, players, specs, broadphase):
+        super(InterestManager, self).__init__()
+        self.players = players
+        self.specs = specs
+        self.broadphase = broadphase
+        self.tick = 0
+        self.views = {}
+        self.near = {}
+
+    def update(self):
+        self.tick += 1
+        #the boxes of the last tick are moved instead of built again
+        views, self.views = self.views, {}
+        self.near.clear()
+        for id, recipient in chain(self.players.iteritems(),
+                                   self.specs.iteritems()):
+            view = self.view_of(id, recipient, views.get(id))
+            self.views[id] = view
+            if view is None:
+                self.near[id] = None
+                continue
+            near = set(player.id for player in
+                       self.broadphase.near([], view, sap.players, 0))
+            near.add(id)
+            self.near[id] = near
+
+    def view_of(self, id, recipient, view=None):
+        if id in self.players:
+            center = recipient.rect.center.x, recipient.rect.center.y
+        else:
+            inpt = recipient.input
+            if not inpt.HasField('follow'):
+                return None
+            if inpt.follow in self.players:
+                rect = self.players[inpt.follow].rect
+                center = rect.center.x, rect.center.y
+            else:
+                center = inpt.mx, inpt.my
+        if view is None:
+            view = AABB(0, 0, 2 * view_x, 2 * view_y)
+        view.update(center[0] - view_x, center[1] - view_y)
+        return view
+
+    def far(self, id):
+        return (self.tick + id) % far_rate == 0
+
+    def relevant(self, id):
+        """ids of the players sent to recipient id this tick, None for all"""
+        if self.far(id):
+            return None
+        return self.near.get(id)
+
+    def sees(self, id, pos):
+        """whether an entity at pos is sent to recipient id this tick"""
+        view = self.views.get(id)
+        if view is None or self.far(id):
+            return True
+        return (view.pos.x <= pos.x <= view.pos.x + view.width and
+                view.pos.y <= pos.y <= view.pos.y + view.height)
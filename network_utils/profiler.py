@@ -0,0 +1,108 @@
+from twisted.internet.protocol import Protocol, Factory
+from logging.handlers import RotatingFileHandler
+from timeit import default_timer as clock
+from collections import deque
+import protocol_pb2 as proto
+import logging
+import json
+
+#samples kept per histogram, 10 seconds of ticks at 40/s
+samples = 400
+
+
+class Histogram(object):
+    """durations of the last samples calls of something, in seconds"""
+    def __init__(self):
+        super(Histogram, self).__init__()
+        self.times = deque(maxlen=samples)
+        self.count = 0
+
+    def add(self, duration):
+        self.times.append(duration)
+        self.count += 1
+
+    def summary(self):
+        """count, p50, p99 and max of the window in microseconds"""
+        times = sorted(self.times)
+        if not times:
+            return {'count': self.count}
+        pick = lambda q: round(
+            times[min(int(q * len(times)), len(times) - 1)] * 10**6, 1)
+        return {'count': self.count, 'p50': pick(.5), 'p99': pick(.99),
+                'max': pick(1)}
+
+
+class TickProfiler(object):
+    """times the phases of a server tick and the datagram handlers per
+    message type. a tick starts with begin, every mark attributes the time
+    since the previous one to a phase and end records the whole tick.
+    ticks longer than the timestep are overruns, updates that had to drop
+    time because they fell behind by more than maxticks count as behind"""
+    def __init__(self, timestep):
+        super(TickProfiler, self).__init__()
+        self.timestep = timestep
+        self.phases = {}
+        self.messages = {}
+        self.tick = Histogram()
+        self.overruns = 0
+        self.behind = 0
+        self.start = self.last = 0
+
+    def begin(self):
+        self.start = self.last = clock()
+
+    def mark(self, phase):
+        now = clock()
+        if phase not in self.phases:
+            self.phases[phase] = Histogram()
+        self.phases[phase].add(now - self.last)
+        self.last = now
+
+    def end(self):
+        duration = clock() - self.start
+        self.tick.add(duration)
+        if duration > self.timestep:
+            self.overruns += 1
+
+    def measure(self, phase, duration):
+        if phase not in self.phases:
+            self.phases[phase] = Histogram()
+        self.phases[phase].add(duration)
+
+    def message(self, typ, duration):
+        if typ not in self.messages:
+            self.messages[typ] = Histogram()
+        self.messages[typ].add(duration)
+
+    def stats(self):
+        return {'tick': self.tick.summary(), 'overruns': self.overruns,
+                'behind': self.behind,
+                'phases': dict((name, hist.summary())
+                               for name, hist in self.phases.iteritems()),
+                'messages': dict((proto.MessageType.Name(typ), hist.summary())
+                                 for typ, hist in self.messages.iteritems())}
+
+
+def rolling_log(path, size=1 << 20, backups=3):
+    """logger writing to path, rotated after size bytes"""
+    log = logging.getLogger('server_stats')
+    log.setLevel(logging.INFO)
+    handler = RotatingFileHandler(path, maxBytes=size, backupCount=backups)
+    handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    log.addHandler(handler)
+    return log
+
+
+class StatsProtocol(Protocol):
+    """writes the stats as json to whoever connects and hangs up"""
+    def connectionMade(self):
+        self.transport.write(json.dumps(self.factory.stats(), indent=1,
+                                        sort_keys=True) + '\n')
+        self.transport.loseConnection()
+
+
+class StatsFactory(Factory):
+    protocol = StatsProtocol
+
+    def __init__(self, stats):
+        self.stats = stats
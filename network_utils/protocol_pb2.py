@@ -19,7 +19,7 @@ _sym_db = _symbol_database.Default()
 DESCRIPTOR = _descriptor.FileDescriptor(
   name='protocol.proto',
   package='mygame_protocol',
-  serialized_pb=_b('\n\x0eprotocol.proto\x12\x0fmygame_protocol\"\x84\x02\n\x07Message\x12*\n\x04type\x18\x01 \x02(\x0e\x32\x1c.mygame_protocol.MessageType\x12\'\n\x06player\x18\x02 \x01(\x0b\x32\x17.mygame_protocol.Player\x12%\n\x05input\x18\x03 \x01(\x0b\x32\x16.mygame_protocol.Input\x12/\n\nprojectile\x18\x04 \x01(\x0b\x32\x1b.mygame_protocol.Projectile\x12-\n\tgameState\x18\x07 \x01(\x0e\x32\x1a.mygame_protocol.GameState\x12\x0b\n\x03\x61\x63k\x18\x05 \x01(\x05\x12\x10\n\x08gameTime\x18\x06 \x01(\x02\"\xeb\x01\n\x06Player\x12\n\n\x02id\x18\x06 \x01(\x05\x12\x0c\n\x04posx\x18\x02 \x01(\x02\x12\x0c\n\x04posy\x18\x03 \x01(\x02\x12\x0c\n\x04velx\x18\x04 \x01(\x02\x12\x0c\n\x04vely\x18\x05 \x01(\x02\x12\'\n\x06mState\x18\x07 \x01(\x0b\x32\x17.mygame_protocol.MState\x12\n\n\x02hp\x18\x08 \x01(\x05\x12\r\n\x05\x61rmor\x18\t \x01(\x05\x12\x0c\n\x04time\x18\n \x01(\x04\x12\x0c\n\x04\x63hat\x18\x0b \x01(\t\x12\x0c\n\x04\x61mmo\x18\x0c \x01(\x05\x12/\n\x06weapon\x18\r \x01(\x0e\x32\x1f.mygame_protocol.ProjectileType\"\xbc\x01\n\x05Input\x12\x0c\n\x04time\x18\x01 \x01(\x04\x12\n\n\x02id\x18\x07 \x01(\x05\x12\r\n\x05right\x18\x02 \x01(\x08\x12\x0c\n\x04left\x18\x03 \x01(\x08\x12\n\n\x02up\x18\x04 \x01(\x08\x12\x0c\n\x04name\x18\x06 \x01(\t\x12\n\n\x02mx\x18\x08 \x01(\x02\x12\n\n\x02my\x18\t \x01(\x02\x12\x0b\n\x03\x61tt\x18\n \x01(\x08\x12\x0c\n\x04\x64own\x18\x0b \x01(\x08\x12/\n\x06switch\x18\x0c \x01(\x0e\x32\x1f.mygame_protocol.ProjectileType\"\xeb\x01\n\x06MState\x12\x10\n\x08onGround\x18\x01 \x01(\x08\x12\x11\n\tascending\x18\x02 \x01(\x08\x12\x0f\n\x07landing\x18\x03 \x01(\x08\x12\x0f\n\x07\x63\x61nJump\x18\x04 \x01(\x08\x12\x12\n\ndescending\x18\x05 \x01(\x08\x12\x10\n\x08isFiring\x18\x06 \x01(\x08\x12\x13\n\x0bonRightWall\x18\x07 \x01(\x08\x12\x12\n\nonLeftWall\x18\x08 \x01(\x08\x12\x0e\n\x06isDead\x18\t \x01(\x08\x12\x0c\n\x04hold\x18\n \x01(\x08\x12-\n\tdirection\x18\x0b \x01(\x0e\x32\x1a.mygame_protocol.Direction\"\xc9\x01\n\nProjectile\x12-\n\x04type\x18\x01 \x02(\x0e\x32\x1f.mygame_protocol.ProjectileType\x12\x10\n\x08playerId\x18\x02 \x01(\x05\x12\x0e\n\x06projId\x18\x03 \x01(\x05\x12\x0c\n\x04posx\x18\x04 \x01(\x02\x12\x0c\n\x04posy\x18\x05 \x01(\x02\x12\x0c\n\x04velx\x18\x06 \x01(\x02\x12\x0c\n\x04vely\x18\x07 \x01(\x02\x12\x10\n\x08toDelete\x18\x08 \x01(\x08\x12\r\n\x05\x61ngle\x18\t \x01(\x02\x12\x11\n\tplayerHit\x18\n \x01(\x08\"w\n\nWeaponStat\x12\x10\n\x08playerId\x18\x01 \x01(\x05\x12.\n\x05wType\x18\x02 \x01(\x0e\x32\x1f.mygame_protocol.ProjectileType\x12\r\n\x05\x66ired\x18\x03 \x01(\x05\x12\x0b\n\x03hit\x18\x04 \x01(\x05\x12\x0b\n\x03\x64mg\x18\x05 \x01(\x05\",\n\tScoreStat\x12\x10\n\x08playerId\x18\x01 \x01(\x05\x12\r\n\x05score\x18\x02 \x01(\x05\"^\n\x05Stats\x12)\n\x05sStat\x18\x01 \x03(\x0b\x32\x1a.mygame_protocol.ScoreStat\x12*\n\x05wStat\x18\x02 \x03(\x0b\x32\x1b.mygame_protocol.WeaponStat*\xb8\x01\n\x0bMessageType\x12\x10\n\x0cplayerUpdate\x10\x00\x12\r\n\tnewPlayer\x10\x01\x12\x0e\n\ndisconnect\x10\x02\x12\x08\n\x04\x63hat\x10\x03\x12\r\n\tmapUpdate\x10\x04\x12\x0e\n\nprojectile\x10\x05\x12\x0f\n\x0bstateUpdate\x10\x06\x12\x0f\n\x0b\x61\x63kResponse\x10\t\x12\t\n\x05input\x10\x07\x12\r\n\tmapChange\x10\x08\x12\x13\n\x0f\x63onnectResponse\x10\n*n\n\x0eProjectileType\x12\r\n\tno_switch\x10\x00\x12\t\n\x05melee\x10\x01\x12\x0b\n\x07\x62laster\x10\x04\x12\x0f\n\x0b\x65xplBlaster\x10\x0b\x12\x06\n\x02lg\x10\x03\x12\x06\n\x02sg\x10\x02\x12\x06\n\x02gl\x10\x05\x12\x0c\n\x08\x65xplNade\x10\x0c*\x94\x01\n\tGameState\x12\n\n\x06warmUp\x10\x00\x12\x0e\n\ninProgress\x10\x01\x12\n\n\x06isDead\x10\x02\x12\n\n\x06spawns\x10\x03\x12\x0b\n\x07isReady\x10\x04\x12\x0c\n\x08goesSpec\x10\x05\x12\r\n\twantsJoin\x10\x06\x12\r\n\tcountDown\x10\x07\x12\x0c\n\x08gameOver\x10\x08\x12\x0c\n\x08overTime\x10\t*2\n\tDirection\x12\x08\n\x04\x64own\x10\x00\x12\x06\n\x02up\x10\x01\x12\x08\n\x04left\x10\x02\x12\t\n\x05right\x10\x03')
+  serialized_pb=_b('\n\x0eprotocol.proto\x12\x0fmygame_protocol\"\x93\x03\n\x07Message\x12*\n\x04type\x18\x01 \x02(\x0e\x32\x1c.mygame_protocol.MessageType\x12\'\n\x06player\x18\x02 \x01(\x0b\x32\x17.mygame_protocol.Player\x12%\n\x05input\x18\x03 \x01(\x0b\x32\x16.mygame_protocol.Input\x12/\n\nprojectile\x18\x04 \x01(\x0b\x32\x1b.mygame_protocol.Projectile\x12-\n\tgameState\x18\x07 \x01(\x0e\x32\x1a.mygame_protocol.GameState\x12\x0b\n\x03\x61\x63k\x18\x05 \x01(\x05\x12\x10\n\x08gameTime\x18\x06 \x01(\x02\x12(\n\x06\x62undle\x18\x08 \x03(\x0b\x32\x18.mygame_protocol.Message\x12\x10\n\x08sequence\x18\t \x01(\r\x12\x10\n\x08\x62\x61seline\x18\n \x01(\r\x12\x0c\n\x04part\x18\x0b \x01(\r\x12\r\n\x05parts\x18\x0c \x01(\r\x12\x11\n\tackLatest\x18\r \x01(\r\x12\x0f\n\x07\x61\x63kBits\x18\x0e \x01(\x07\"\xeb\x01\n\x06Player\x12\n\n\x02id\x18\x06 \x01(\x05\x12\x0c\n\x04posx\x18\x02 \x01(\x02\x12\x0c\n\x04posy\x18\x03 \x01(\x02\x12\x0c\n\x04velx\x18\x04 \x01(\x02\x12\x0c\n\x04vely\x18\x05 \x01(\x02\x12\'\n\x06mState\x18\x07 \x01(\x0b\x32\x17.mygame_protocol.MState\x12\n\n\x02hp\x18\x08 \x01(\x05\x12\r\n\x05\x61rmor\x18\t \x01(\x05\x12\x0c\n\x04time\x18\n \x01(\x04\x12\x0c\n\x04\x63hat\x18\x0b \x01(\t\x12\x0c\n\x04\x61mmo\x18\x0c \x01(\x05\x12/\n\x06weapon\x18\r \x01(\x0e\x32\x1f.mygame_protocol.ProjectileType\"\xcc\x01\n\x05Input\x12\x0c\n\x04time\x18\x01 \x01(\x04\x12\n\n\x02id\x18\x07 \x01(\x05\x12\r\n\x05right\x18\x02 \x01(\x08\x12\x0c\n\x04left\x18\x03 \x01(\x08\x12\n\n\x02up\x18\x04 \x01(\x08\x12\x0c\n\x04name\x18\x06 \x01(\t\x12\n\n\x02mx\x18\x08 \x01(\x02\x12\n\n\x02my\x18\t \x01(\x02\x12\x0b\n\x03\x61tt\x18\n \x01(\x08\x12\x0c\n\x04\x64own\x18\x0b \x01(\x08\x12/\n\x06switch\x18\x0c \x01(\x0e\x32\x1f.mygame_protocol.ProjectileType\x12\x0e\n\x06\x66ollow\x18\r \x01(\x05\"\xeb\x01\n\x06MState\x12\x10\n\x08onGround\x18\x01 \x01(\x08\x12\x11\n\tascending\x18\x02 \x01(\x08\x12\x0f\n\x07landing\x18\x03 \x01(\x08\x12\x0f\n\x07\x63\x61nJump\x18\x04 \x01(\x08\x12\x12\n\ndescending\x18\x05 \x01(\x08\x12\x10\n\x08isFiring\x18\x06 \x01(\x08\x12\x13\n\x0bonRightWall\x18\x07 \x01(\x08\x12\x12\n\nonLeftWall\x18\x08 \x01(\x08\x12\x0e\n\x06isDead\x18\t \x01(\x08\x12\x0c\n\x04hold\x18\n \x01(\x08\x12-\n\tdirection\x18\x0b \x01(\x0e\x32\x1a.mygame_protocol.Direction\"\xd7\x01\n\nProjectile\x12-\n\x04type\x18\x01 \x02(\x0e\x32\x1f.mygame_protocol.ProjectileType\x12\x10\n\x08playerId\x18\x02 \x01(\x05\x12\x0e\n\x06projId\x18\x03 \x01(\x05\x12\x0c\n\x04posx\x18\x04 \x01(\x02\x12\x0c\n\x04posy\x18\x05 \x01(\x02\x12\x0c\n\x04velx\x18\x06 \x01(\x02\x12\x0c\n\x04vely\x18\x07 \x01(\x02\x12\x10\n\x08toDelete\x18\x08 \x01(\x08\x12\r\n\x05\x61ngle\x18\t \x01(\x02\x12\x11\n\tplayerHit\x18\n \x01(\x08\x12\x0c\n\x04time\x18\x0b \x01(\x02\"w\n\nWeaponStat\x12\x10\n\x08playerId\x18\x01 \x01(\x05\x12.\n\x05wType\x18\x02 \x01(\x0e\x32\x1f.mygame_protocol.ProjectileType\x12\r\n\x05\x66ired\x18\x03 \x01(\x05\x12\x0b\n\x03hit\x18\x04 \x01(\x05\x12\x0b\n\x03\x64mg\x18\x05 \x01(\x05\",\n\tScoreStat\x12\x10\n\x08playerId\x18\x01 \x01(\x05\x12\r\n\x05score\x18\x02 \x01(\x05\"^\n\x05Stats\x12)\n\x05sStat\x18\x01 \x03(\x0b\x32\x1a.mygame_protocol.ScoreStat\x12*\n\x05wStat\x18\x02 \x03(\x0b\x32\x1b.mygame_protocol.WeaponStat*\xc6\x01\n\x0bMessageType\x12\x10\n\x0cplayerUpdate\x10\x00\x12\r\n\tnewPlayer\x10\x01\x12\x0e\n\ndisconnect\x10\x02\x12\x08\n\x04\x63hat\x10\x03\x12\r\n\tmapUpdate\x10\x04\x12\x0e\n\nprojectile\x10\x05\x12\x0f\n\x0bstateUpdate\x10\x06\x12\x0f\n\x0b\x61\x63kResponse\x10\t\x12\t\n\x05input\x10\x07\x12\r\n\tmapChange\x10\x08\x12\x13\n\x0f\x63onnectResponse\x10\n\x12\x0c\n\x08snapshot\x10\x0b*n\n\x0eProjectileType\x12\r\n\tno_switch\x10\x00\x12\t\n\x05melee\x10\x01\x12\x0b\n\x07\x62laster\x10\x04\x12\x0f\n\x0b\x65xplBlaster\x10\x0b\x12\x06\n\x02lg\x10\x03\x12\x06\n\x02sg\x10\x02\x12\x06\n\x02gl\x10\x05\x12\x0c\n\x08\x65xplNade\x10\x0c*\x94\x01\n\tGameState\x12\n\n\x06warmUp\x10\x00\x12\x0e\n\ninProgress\x10\x01\x12\n\n\x06isDead\x10\x02\x12\n\n\x06spawns\x10\x03\x12\x0b\n\x07isReady\x10\x04\x12\x0c\n\x08goesSpec\x10\x05\x12\r\n\twantsJoin\x10\x06\x12\r\n\tcountDown\x10\x07\x12\x0c\n\x08gameOver\x10\x08\x12\x0c\n\x08overTime\x10\t*2\n\tDirection\x12\x08\n\x04\x64own\x10\x00\x12\x06\n\x02up\x10\x01\x12\x08\n\x04left\x10\x02\x12\t\n\x05right\x10\x03')
 )
 _sym_db.RegisterFileDescriptor(DESCRIPTOR)
 
@@ -73,11 +73,15 @@ _MESSAGETYPE = _descriptor.EnumDescriptor(
       name='connectResponse', index=10, number=10,
       options=None,
       type=None),
+    _descriptor.EnumValueDescriptor(
+      name='snapshot', index=11, number=11,
+      options=None,
+      type=None),
   ],
   containing_type=None,
   options=None,
-  serialized_start=1433,
-  serialized_end=1617,
+  serialized_start=1606,
+  serialized_end=1804,
 )
 _sym_db.RegisterEnumDescriptor(_MESSAGETYPE)
 
@@ -123,8 +127,8 @@ _PROJECTILETYPE = _descriptor.EnumDescriptor(
   ],
   containing_type=None,
   options=None,
-  serialized_start=1619,
-  serialized_end=1729,
+  serialized_start=1806,
+  serialized_end=1916,
 )
 _sym_db.RegisterEnumDescriptor(_PROJECTILETYPE)
 
@@ -178,8 +182,8 @@ _GAMESTATE = _descriptor.EnumDescriptor(
   ],
   containing_type=None,
   options=None,
-  serialized_start=1732,
-  serialized_end=1880,
+  serialized_start=1919,
+  serialized_end=2067,
 )
 _sym_db.RegisterEnumDescriptor(_GAMESTATE)
 
@@ -209,8 +213,8 @@ _DIRECTION = _descriptor.EnumDescriptor(
   ],
   containing_type=None,
   options=None,
-  serialized_start=1882,
-  serialized_end=1932,
+  serialized_start=2069,
+  serialized_end=2119,
 )
 _sym_db.RegisterEnumDescriptor(_DIRECTION)
 
@@ -226,6 +230,7 @@ ackResponse = 9
 input = 7
 mapChange = 8
 connectResponse = 10
+snapshot = 11
 no_switch = 0
 melee = 1
 blaster = 4
@@ -307,6 +312,55 @@ _MESSAGE = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       options=None),
+    _descriptor.FieldDescriptor(
+      name='bundle', full_name='mygame_protocol.Message.bundle', index=7,
+      number=8, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='sequence', full_name='mygame_protocol.Message.sequence', index=8,
+      number=9, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='baseline', full_name='mygame_protocol.Message.baseline', index=9,
+      number=10, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='part', full_name='mygame_protocol.Message.part', index=10,
+      number=11, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='parts', full_name='mygame_protocol.Message.parts', index=11,
+      number=12, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='ackLatest', full_name='mygame_protocol.Message.ackLatest', index=12,
+      number=13, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='ackBits', full_name='mygame_protocol.Message.ackBits', index=13,
+      number=14, type=7, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
   ],
   extensions=[
   ],
@@ -319,7 +373,7 @@ _MESSAGE = _descriptor.Descriptor(
   oneofs=[
   ],
   serialized_start=36,
-  serialized_end=296,
+  serialized_end=439,
 )
 
 
@@ -425,8 +479,8 @@ _PLAYER = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=299,
-  serialized_end=534,
+  serialized_start=442,
+  serialized_end=677,
 )
 
 
@@ -514,6 +568,13 @@ _INPUT = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       options=None),
+    _descriptor.FieldDescriptor(
+      name='follow', full_name='mygame_protocol.Input.follow', index=11,
+      number=13, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
   ],
   extensions=[
   ],
@@ -525,8 +586,8 @@ _INPUT = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=537,
-  serialized_end=725,
+  serialized_start=680,
+  serialized_end=884,
 )
 
 
@@ -625,8 +686,8 @@ _MSTATE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=728,
-  serialized_end=963,
+  serialized_start=887,
+  serialized_end=1122,
 )
 
 
@@ -707,6 +768,13 @@ _PROJECTILE = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       options=None),
+    _descriptor.FieldDescriptor(
+      name='time', full_name='mygame_protocol.Projectile.time', index=10,
+      number=11, type=2, cpp_type=6, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
   ],
   extensions=[
   ],
@@ -718,8 +786,8 @@ _PROJECTILE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=966,
-  serialized_end=1167,
+  serialized_start=1125,
+  serialized_end=1340,
 )
 
 
@@ -776,8 +844,8 @@ _WEAPONSTAT = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1169,
-  serialized_end=1288,
+  serialized_start=1342,
+  serialized_end=1461,
 )
 
 
@@ -813,8 +881,8 @@ _SCORESTAT = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1290,
-  serialized_end=1334,
+  serialized_start=1463,
+  serialized_end=1507,
 )
 
 
@@ -850,8 +918,8 @@ _STATS = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=1336,
-  serialized_end=1430,
+  serialized_start=1509,
+  serialized_end=1603,
 )
 
 _MESSAGE.fields_by_name['type'].enum_type = _MESSAGETYPE
@@ -859,6 +927,7 @@ _MESSAGE.fields_by_name['player'].message_type = _PLAYER
 _MESSAGE.fields_by_name['input'].message_type = _INPUT
 _MESSAGE.fields_by_name['projectile'].message_type = _PROJECTILE
 _MESSAGE.fields_by_name['gameState'].enum_type = _GAMESTATE
+_MESSAGE.fields_by_name['bundle'].message_type = _MESSAGE
 _PLAYER.fields_by_name['mState'].message_type = _MSTATE
 _PLAYER.fields_by_name['weapon'].enum_type = _PROJECTILETYPE
 _INPUT.fields_by_name['switch'].enum_type = _PROJECTILETYPE
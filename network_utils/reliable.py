@@ -1,43 +1,226 @@
 import protocol_pb2 as proto
+from collections import deque
+
+#bounds and start value of the retransmission timeout
+min_rto = .1
+max_rto = 2.
+init_rto = .5
+#retransmissions before a message is given up
+retries = 5
+#width of a timer wheel slot in seconds
+resolution = 1 / 60.
+#sequences acknowledged in addition to the latest one
+window = 32
+#time an acknowledgement waits for outgoing traffic to ride on
+ack_delay = .03
 
 
 class AckManager(object):
-    """docstring for AckManager"""
+    """sends messages reliably. every peer has its own sequence numbers,
+    received ones are tracked in a window so duplicates are dropped. the
+    window is acknowledged as latest sequence plus a bitfield of the
+    previous ones, appended to regular traffic or sent on its own if
+    there is none for ack_delay.
+
+    unacknowledged messages are kept in a timer wheel by the slot they are
+    due in, update only touches the slots that passed and acknowledgements
+    remove messages from their slot. the timeout adapts to the round trip
+    time and variance of each peer, measured on messages that were not
+    retransmitted, and doubles with every retransmission of a message.
+
+    at most window messages per peer are unacknowledged, so all of them can
+    be acknowledged in the bitfield. more are queued until acks make room."""
     def __init__(self):
         super(AckManager, self).__init__()
+        #(address, sequence): [msg, address, time, count, slot]
         self.acks = {}
-        self.ack = 0
+        #address: last sequence sent
+        self.sequences = {}
+        self.time = 0
+        #slot: keys of the messages due in that slot
+        self.wheel = {}
+        self.slot = 0
+        #address: [srtt, rttvar]
+        self.peers = {}
+        #address: keys of the messages waiting for that peer
+        self.pending = {}
+        #address: [latest, bits] of the received sequences
+        self.windows = {}
+        #address: time since when acknowledgements are owed
+        self.owed = {}
+        #address: serialized messages waiting for room in the window
+        self.queued = {}
+        self.retransmits = 0
+        self.expired = 0
+        self.inflight = 0
+        self.duplicates = 0
+        self.ack_datagrams = 0
 
     def receive_send(self, func):
         self.send = func
 
     def send_rel(self, msg, address):
-        self.ack += 1
-        msg.ack = self.ack
+        msg.ClearField('ack')
+        msg.ClearField('ackLatest')
+        msg.ClearField('ackBits')
         msg_string = msg.SerializeToString()
+        if (address in self.queued or
+                len(self.pending.get(address, ())) >= window):
+            self.queued.setdefault(address, deque()).append(msg_string)
+            return
+        self.transmit(msg_string, address)
+
+    def transmit(self, msg_string, address):
+        seq = self.sequences.get(address, 0) + 1
+        self.sequences[address] = seq
+        numbered = proto.Message()
+        numbered.ack = seq
+        msg_string += numbered.SerializePartialToString()
         self.send(msg_string, address)
-        self.acks[self.ack] = [msg_string, address, 0, 0]
+        key = address, seq
+        self.acks[key] = [msg_string, address, self.time, 0, 0]
+        self.inflight += len(msg_string)
+        self.pending.setdefault(address, set()).add(key)
+        self.schedule(key, self.rto(address))
+
+    def schedule(self, key, timeout):
+        slot = max(int((self.time + timeout) / resolution), self.slot + 1)
+        self.acks[key][4] = slot
+        self.wheel.setdefault(slot, set()).add(key)
 
     def update(self, dt):
-        for data in self.acks.itervalues():
-            data[2] += dt
-            if data[2] > .5:
-                msg, address, time, count = data
+        self.time += dt
+        slot = int(self.time / resolution)
+        while self.slot < slot:
+            self.slot += 1
+            for key in self.wheel.pop(self.slot, ()):
+                data = self.acks[key]
+                msg, address, time, count, due = data
+                if count >= retries:
+                    print 'del ack %i' % key[1]
+                    self.remove(key)
+                    self.expired += 1
+                    continue
                 self.send(msg, address)
-                data[2] = 0
                 data[3] += 1
-        for key, data in self.acks.items():
-            if data[3] > 5:
-                print 'del ack %i' % key
-                del self.acks[key]
-
-    def receive_ack(self, data):
-        ack = data.ack
-        if ack in self.acks:
-            del self.acks[ack]
-
-    def respond(self, msg, address):
-        newmsg = proto.Message()
-        newmsg.type = proto.ackResponse
-        newmsg.ack = msg.ack
-        self.send(newmsg.SerializeToString(), address)
+                self.retransmits += 1
+                self.schedule(key,
+                              min(self.rto(address) * 2 ** data[3], max_rto))
+        for address, since in self.owed.items():
+            if self.time - since >= ack_delay:
+                self.send_ack(address)
+
+    def send_ack(self, address):
+        """the acknowledgements owed to address in a message of their own"""
+        msg = proto.Message()
+        msg.type = proto.ackResponse
+        self.send(msg.SerializeToString() + self.piggyback(address), address)
+        self.ack_datagrams += 1
+
+    def receive(self, msg, address):
+        """records a reliable message, False if it is a duplicate"""
+        seq = msg.ack
+        self.owed.setdefault(address, self.time)
+        if address not in self.windows:
+            self.windows[address] = [seq, 0]
+            return True
+        win = self.windows[address]
+        latest, bits = win
+        if seq > latest:
+            shift = seq - latest
+            if shift > window:
+                win[1] = 0
+            else:
+                win[1] = (bits << shift | 1 << shift - 1) & (1 << window) - 1
+            win[0] = seq
+            return True
+        offset = latest - seq
+        if offset and offset <= window and not bits >> offset - 1 & 1:
+            win[1] = bits | 1 << offset - 1
+            return True
+        self.duplicates += 1
+        return False
+
+    def piggyback(self, address):
+        """acknowledgements owed to address as serialized fields to append
+        to an outgoing message, empty if there are none"""
+        if address not in self.owed:
+            return ''
+        del self.owed[address]
+        latest, bits = self.windows[address]
+        msg = proto.Message()
+        msg.ackLatest = latest
+        msg.ackBits = bits
+        return msg.SerializePartialToString()
+
+    def receive_acks(self, msg, address):
+        latest, bits = msg.ackLatest, msg.ackBits
+        self.acknowledge((address, latest))
+        offset = 1
+        while bits:
+            if bits & 1:
+                self.acknowledge((address, latest - offset))
+            bits >>= 1
+            offset += 1
+
+    def acknowledge(self, key):
+        if key in self.acks:
+            msg, address, time, count, slot = self.remove(key)
+            #only unambiguous samples, karn's algorithm
+            if not count:
+                self.measure(address, self.time - time)
+
+    def remove(self, key):
+        data = self.acks.pop(key)
+        self.inflight -= len(data[0])
+        bucket = self.wheel.get(data[4])
+        if bucket is not None:
+            bucket.discard(key)
+        pending = self.pending[data[1]]
+        pending.discard(key)
+        if not pending:
+            del self.pending[data[1]]
+        if data[1] in self.queued:
+            self.flush(data[1])
+        return data
+
+    def flush(self, address):
+        queue = self.queued[address]
+        while queue and len(self.pending.get(address, ())) < window:
+            self.transmit(queue.popleft(), address)
+        if not queue:
+            del self.queued[address]
+
+    def measure(self, address, rtt):
+        if address not in self.peers:
+            self.peers[address] = [rtt, rtt / 2]
+        else:
+            peer = self.peers[address]
+            peer[1] = .75 * peer[1] + .25 * abs(peer[0] - rtt)
+            peer[0] = .875 * peer[0] + .125 * rtt
+
+    def rto(self, address):
+        if address not in self.peers:
+            return init_rto
+        srtt, rttvar = self.peers[address]
+        return min(max(srtt + 4 * rttvar, min_rto), max_rto)
+
+    def drop(self, address):
+        """forgets a peer, the messages still waiting for it and what was
+        received from it. sequences keep counting so a reconnecting peer
+        does not mistake new messages for duplicates. acks still owed to it
+        are sent first, or the peer keeps resending what it is owed for"""
+        if address in self.owed:
+            self.send_ack(address)
+        self.peers.pop(address, None)
+        self.windows.pop(address, None)
+        self.queued.pop(address, None)
+        for key in list(self.pending.get(address, ())):
+            self.remove(key)
+
+    def stats(self):
+        return {'inflight': len(self.acks), 'inflight_bytes': self.inflight,
+                'queued': sum(len(q) for q in self.queued.itervalues()),
+                'retransmits': self.retransmits, 'expired': self.expired,
+                'duplicates': self.duplicates,
+                'ack_datagrams': self.ack_datagrams}
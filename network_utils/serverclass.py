@@ -6,7 +6,14 @@ from datetime import datetime
 from gameplay.weapons import ProjectileManager
 from gameplay.gamestate import GamestateManager
 from itertools import chain
+from collections import deque
+from network_utils import timestep
 from reliable import AckManager
+from snapshot import SnapshotManager
+from interest import InterestManager
+from profiler import TickProfiler, clock
+from collision.sap import SweepAndPrune
+from collision import sap
 
 
 class GameServer(DatagramProtocol):
@@ -16,46 +23,63 @@ class GameServer(DatagramProtocol):
         self.players = {}
         self.players_pack = {}
         self.specs = {}
+        #connected players and specs by address, and their names
+        self.sessions = {}
+        self.names = set()
         self.map = Map('phrantic', server=True)
+        #players in game and the pickup items, for contacts between them
+        self.broadphase = SweepAndPrune()
+        for item in self.map.items.items:
+            self.broadphase.add(item, item, sap.items)
         self.ackman = AckManager()
+        self.snapshots = SnapshotManager(self.ackman)
+        self.interest = InterestManager(self.players, self.specs,
+                                        self.broadphase)
         self.gamestate = GamestateManager(self.allgen, self.ackman,
                                           self.players, self.map.spawns,
-                                          self.map.items, self.spec_player)
+                                          self.map.items, self.spec_player,
+                                          self.broadphase)
         self.projectiles = ProjectileManager(self.players, self.map,
                                              self.gamestate.damage_player,
-                                             self.allgen)
-        self.mxdt = .03
+                                             self.allgen,
+                                             self.interest.sees,
+                                             self.broadphase)
+        #longest input gap that gets simulated, in sub steps of timestep
+        self.maxgap = .25
+        #queued inputs tolerated before a backlog is worked off faster
+        self.inputlag = 3
+        #ticks per update before the server gives up on catching up
+        self.maxticks = 5
+        self.rest_time = 0
+        self.profiler = TickProfiler(timestep)
         print 'server initialized'
 
     def datagramReceived(self, datagram, address):
+        start = clock()
         data = proto.Message()
         data.ParseFromString(datagram)
+        self.dispatch(data, address)
+        self.profiler.message(data.type, clock() - start)
+
+    def dispatch(self, data, address):
+        if data.HasField('ackLatest'):
+            self.ackman.receive_acks(data, address)
+        if data.HasField('ack') and not self.ackman.receive(data, address):
+            #reliable message that was already processed
+            return
         if data.type == proto.newPlayer:
-            self.ackman.respond(data, address)
             if self.not_online(address):
                 pl_id = self.get_id()
                 self.init_player(data, address, pl_id)
         elif data.type == proto.playerUpdate and self.isplayer(data, address):
-            self.players[data.input.id].timer = 0
-            #self.get_input(data.input)
-            self.players[data.input.id].input = data.input
-            dt = data.input.time - self.players[data.input.id].time
-            if dt > 0:
-                dt = (dt / 1000000.)
-                dt = dt if dt < self.mxdt else self.mxdt
-                id = data.input.id
-                # update movement
-                #self.players[id].update(dt, self.rectgen(data.input.id))
-                self.gamestate.update_player(dt, id, self.rectgen(id))
-                self.players[id].time = data.input.time
-                self.player_to_pack(id)
+            player = self.sessions[address]
+            player.timer = 0
+            self.ack_snapshot(player, data)
+            #simulated in the next tick
+            player.inputs.append(data.input)
         elif data.type == proto.disconnect and self.isonline(data, address):
-            self.ackman.respond(data, address)
             self.disc_player(data.input.id)
-        elif data.type == proto.ackResponse:
-            self.ackman.receive_ack(data)
         elif data.type == proto.stateUpdate and self.isonline(data, address):
-            self.ackman.respond(data, address)
             if data.gameState == proto.wantsJoin:
                 if self.gamestate.join(data):
                     self.join_player(data.player.id)
@@ -65,10 +89,28 @@ class GameServer(DatagramProtocol):
             elif data.gameState == proto.isReady:
                 self.gamestate.ready_up(data)
         elif data.type == proto.chat:
-            self.ackman.respond(data, address)
             self.gamestate.rec_chat(data, address)
+        if data.HasField('ack') and self.not_online(address):
+            #acked and forgotten, e.g. a resent disconnect after disc_player
+            self.ackman.drop(address)
 
     def update(self, dt):
+        self.rest_time += dt
+        ticks = 0
+        while self.rest_time >= timestep and ticks < self.maxticks:
+            self.tick(timestep)
+            self.rest_time -= timestep
+            ticks += 1
+        if self.rest_time >= timestep:
+            self.profiler.behind += 1
+        self.rest_time %= timestep
+        start = clock()
+        self.ackman.update(dt)
+        self.profiler.measure('ackman', clock() - start)
+
+    def tick(self, dt):
+        prof = self.profiler
+        prof.begin()
         keys = []
         for key, player in self.players.iteritems():
             player.timer += dt
@@ -81,19 +123,60 @@ class GameServer(DatagramProtocol):
                 keys.append(key)
         for key in keys:
             self.disc_player(key)
+        #spawns and teleports only set the state
+        for player in self.players.itervalues():
+            player.rect.update(*player.state.pos)
+        self.broadphase.update()
+        prof.mark('timeouts')
+        self.interest.update()
+        prof.mark('interest')
+        self.run_inputs()
+        prof.mark('inputs')
         self.projectiles.update(dt)
+        prof.mark('projectiles')
         self.gamestate.update(dt)
+        prof.mark('gamestate')
         self.send_all()
-        self.ackman.update(dt)
+        prof.mark('send_all')
+        prof.end()
+
+    def stats(self):
+        stats = self.profiler.stats()
+        stats['ackman'] = self.ackman.stats()
+        stats['players'] = len(self.players)
+        stats['specs'] = len(self.specs)
+        return stats
+
+    def run_inputs(self):
+        """one queued input per player and tick, two while more than
+        inputlag are queued so bursts are worked off without spikes"""
+        for id, player in self.players.items():
+            count = 2 if len(player.inputs) > self.inputlag else 1
+            while count and player.inputs and id in self.players:
+                inpt = player.inputs.popleft()
+                if inpt.time > player.time:
+                    self.run_input(id, inpt)
+                    count -= 1
+
+    def run_input(self, id, inpt):
+        player = self.players[id]
+        player.input = inpt
+        if player.time:
+            dt = min((inpt.time - player.time) / 1000000., self.maxgap)
+        else:
+            dt = timestep
+        #gaps from lost inputs are simulated in steps like the client does
+        steps = int(dt / timestep + .999)
+        for i in range(steps):
+            self.gamestate.update_player(dt / steps, id, self.rectgen(id))
+        player.time = inpt.time
+        player.rect.update(*player.state.pos)
+        self.broadphase.move(player)
+        self.player_to_pack(id)
 
     def send_all(self):
-        for player_ in self.allgen():
-            for idx_, pack in self.players_pack.iteritems():
-                msg = proto.Message()
-                msg.type = proto.playerUpdate
-                msg.player.CopyFrom(pack)
-                msg.input.CopyFrom(self.players[idx_].input)
-                self.transport.write(msg.SerializeToString(), player_.address)
+        self.snapshots.send_all(self.allgen(), self.players_pack, self.players,
+                                self.interest.relevant)
 
     #find next available id
     def get_id(self):
@@ -103,24 +186,26 @@ class GameServer(DatagramProtocol):
         return idx
 
     def isplayer(self, data, address):
-        id = data.input.id
-        for id in self.players:
-            if address == self.players[id].address and id in self.players_pack:
-                return id
-        for id in self.specs:
-            if address == self.specs[id].address:
-                self.specs[id].timer = 0
+        player = self.sessions.get(address)
+        if player is None:
+            return False
+        if player.id in self.players_pack:
+            return player.id
+        if player.id in self.specs:
+            player.timer = 0
+            #spectators send their view
+            player.input = data.input
+            self.ack_snapshot(player, data)
         return False
 
+    #newest snapshot the client holds completely, used as delta baseline
+    def ack_snapshot(self, player, data):
+        if data.baseline > player.baseline:
+            player.baseline = data.baseline
+
     def isonline(self, data, address):
-        id = data.input.id
-        if id in self.players:
-            if self.players[id].address == address:
-                return True
-        elif id in self.specs:
-            if self.specs[id].address == address:
-                return True
-        return False
+        player = self.sessions.get(address)
+        return player is not None and player.id == data.input.id
 
     def player_to_pack(self, idx):
         pp = self.players_pack[idx]
@@ -131,7 +216,7 @@ class GameServer(DatagramProtocol):
         pp.hp = self.players[idx].state.hp
         pp.armor = self.players[idx].state.armor
         pp.time = self.players[idx].time
-        pp.mState.CopyFrom(self.players[idx].state.conds)
+        self.players[idx].state.conds.to_proto(pp.mState)
         pp.ammo, pp.weapon = self.players[idx].weapons.pack_ammo_weapon()
 
     def get_input(self, data):
@@ -153,10 +238,10 @@ class GameServer(DatagramProtocol):
         #check if name already exists
         name = data.player.chat
         i = 1
-        namegen = chain(self.players.itervalues(), self.specs.itervalues())
-        while name in [p.name for p in namegen]:
+        while name in self.names:
             name = data.player.chat + '_' + str(i)
             i += 1
+        self.names.add(name)
         player = Player(True, self.projectiles.add_projectile, pl_id)
         player.timer = 0
         player.address = address
@@ -166,7 +251,11 @@ class GameServer(DatagramProtocol):
                         player.name, str(pl_id),
                         'joined the server', str(address)))
         player.time = 0
+        player.baseline = 0
+        player.views = {}
+        player.inputs = deque(maxlen=20)
         self.specs[pl_id] = player
+        self.sessions[address] = player
         tosendplayer = proto.Player()
         tosendplayer.id = pl_id
         tosendplayer.chat = player.name
@@ -235,10 +324,16 @@ class GameServer(DatagramProtocol):
         self.gamestate.send_current_gs(address)
 
     def disc_player(self, id):
+        player = self.players.get(id, self.specs.get(id))
+        if player is not None:
+            del self.sessions[player.address]
+            self.ackman.drop(player.address)
+            self.names.discard(player.name)
         if id in self.players:
             print ' '.join((str(datetime.now()), self.players[id].name,
                             'disconnected'))
             self.gamestate.leave(id)
+            self.broadphase.remove(self.players[id])
             del self.players[id], self.players_pack[id]
         elif id in self.specs:
             print ' '.join((str(datetime.now()), self.specs[id].name,
@@ -256,7 +351,12 @@ class GameServer(DatagramProtocol):
     def join_player(self, id):
         self.players[id] = self.specs[id]
         del self.specs[id]
+        self.players[id].inputs.clear()
+        self.players[id].time = 0
         self.gamestate.spawn(self.players[id])
+        self.players[id].rect.update(*self.players[id].state.pos)
+        self.broadphase.add(self.players[id], self.players[id].rect,
+                            sap.players)
         #self.players[id].spawn(100, 300)
         self.players_pack[id] = proto.Player()
         self.players_pack[id].id = id
@@ -267,14 +367,17 @@ class GameServer(DatagramProtocol):
         self.specs[id] = self.players[id]
         self.specs[id].ready = False
         self.gamestate.leave(id)
+        self.broadphase.remove(self.players[id])
         del self.players[id], self.players_pack[id]
 
     def rectgen(self, idx=-1):
-        playergen = [player.rect for key, player in self.players.iteritems()
-                     if key != idx and not player.state.isDead]
-        mapgen = [rect for rect in self.map.quad_tree.retrieve([],
-                  self.players[idx].rect)]
-        return playergen + mapgen
+        player = self.players[idx]
+        #the rect lags behind spawns and teleports until the next update
+        player.rect.update(*player.state.pos)
+        near = self.broadphase.near([], player.rect, sap.players,
+                                    exclude=player)
+        playergen = [other.rect for other in near if not other.state.isDead]
+        return self.map.grid.retrieve(playergen, player.rect)
 
     def allgen(self):
         playergen = (player for player in self.players.itervalues())
@@ -282,7 +385,4 @@ class GameServer(DatagramProtocol):
         return chain(playergen, specgen)
 
     def not_online(self, address):
-        for p in self.allgen():
-            if address == p.address:
-                return False
-        return True
+        return address not in self.sessions
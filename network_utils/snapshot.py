@@ -0,0 +1,229 @@
+import protocol_pb2 as proto
+
+#payload budget per datagram, stays below the usual path mtu
+mtu = 1200
+#number of past snapshots that can serve as baseline
+history = 32
+
+
+def varint(value):
+    """base 128 varint as used by protobuf for tags and lengths"""
+    out = []
+    while value > 0x7f:
+        out.append(chr(0x80 | value & 0x7f))
+        value >>= 7
+    out.append(chr(value))
+    return ''.join(out)
+
+#key for one length delimited entry of Message.bundle
+bundle_key = varint(
+    proto.Message.DESCRIPTOR.fields_by_name['bundle'].number << 3 | 2)
+
+
+def diff(msg, base, out):
+    """sets every field of msg that differs from base on out"""
+    for field, value in msg.ListFields():
+        if base.HasField(field.name) and getattr(base, field.name) == value:
+            continue
+        if field.message_type:
+            getattr(out, field.name).CopyFrom(value)
+        else:
+            setattr(out, field.name, value)
+
+
+def patch(msg, delta):
+    """applies a delta written by diff to msg"""
+    for field, value in delta.ListFields():
+        if field.message_type:
+            getattr(msg, field.name).CopyFrom(value)
+        else:
+            setattr(msg, field.name, value)
+
+
+def delta_entry(entry, base):
+    """playerUpdate message with only the fields that changed since base,
+    None if nothing changed"""
+    delta = proto.Message()
+    delta.type = proto.playerUpdate
+    delta.player.id = entry.player.id
+    diff(entry.player, base.player, delta.player)
+    diff(entry.input, base.input, delta.input)
+    if len(delta.player.ListFields()) == 1 and not delta.HasField('input'):
+        return None
+    return delta
+
+
+def patch_entry(entry, delta):
+    patch(entry.player, delta.player)
+    patch(entry.input, delta.input)
+
+
+class SnapshotManager(object):
+    """sends each recipient the player updates of a tick bundled into as few
+    datagrams as the mtu allows. recipients acknowledge snapshots with their
+    inputs, updates are then delta compressed against what the recipient
+    holds in the last acknowledged snapshot. players filtered out by the
+    interest management keep the state of the baseline for that recipient.
+    encoded entries are shared between recipients with the same knowledge of
+    a player, without a usable baseline full entries are sent."""
+    def __init__(self, ackman):
+        super(SnapshotManager, self).__init__()
+        self.send = None
+        self.ackman = ackman
+        self.sequence = 0
+        self.history = {}
+
+    def receive_send(self, func):
+        self.send = func
+
+    def update(self, players_pack, players):
+        self.sequence += 1
+        current = {}
+        for idx, pack in players_pack.iteritems():
+            entry = proto.Message()
+            entry.type = proto.playerUpdate
+            entry.player.CopyFrom(pack)
+            entry.input.CopyFrom(players[idx].input)
+            current[idx] = entry
+        self.history[self.sequence] = current
+        self.history.pop(self.sequence - history, None)
+        return current
+
+    def encode(self, entry, source):
+        """entry as delta against the state of sequence source, 0 for a full
+        entry. None if nothing changed"""
+        if source:
+            entry = delta_entry(entry, self.history[source][entry.player.id])
+            if entry is None:
+                return None
+        data = entry.SerializeToString()
+        return ''.join((bundle_key, varint(len(data)), data))
+
+    def header(self, baseline, part, parts):
+        msg = proto.Message()
+        msg.type = proto.snapshot
+        msg.sequence = self.sequence
+        msg.baseline = baseline
+        msg.part = part
+        msg.parts = parts
+        return msg.SerializeToString()
+
+    def bundle(self, entries, baseline):
+        budget = mtu - len(self.header(baseline, 0, 1))
+        groups = [[]]
+        size = 0
+        for entry in entries:
+            if size + len(entry) > budget and groups[-1]:
+                groups.append([])
+                size = 0
+            groups[-1].append(entry)
+            size += len(entry)
+        return [''.join([self.header(baseline, i, len(groups))] + group)
+                for i, group in enumerate(groups)]
+
+    def select(self, current, base, near, encoded):
+        """entries for a recipient holding base that gets the players in
+        near, and the sequence of the state it then holds of each player"""
+        view = {}
+        entries = []
+        for idx, entry in current.iteritems():
+            if near is not None and idx not in near:
+                if idx in base:
+                    view[idx] = base[idx]
+                continue
+            view[idx] = self.sequence
+            source = base.get(idx, 0)
+            if source not in self.history:
+                source = 0
+            key = source, idx
+            if key not in encoded:
+                encoded[key] = self.encode(entry, source)
+            if encoded[key] is not None:
+                entries.append(encoded[key])
+        return view, entries
+
+    def send_all(self, recipients, players_pack, players, relevant):
+        """relevant(recipient id) gives the ids of the players sent to that
+        recipient this tick, None for all of them"""
+        #sequences stay contiguous so clients can count lost snapshots
+        if not players_pack:
+            return
+        current = self.update(players_pack, players)
+        encoded = {}
+        #recipients with the same baseline view that get all players share
+        #the result, and so the view object in the following ticks
+        shared = {}
+        empty = {}
+        for player in recipients:
+            baseline = player.baseline
+            base = player.views.get(baseline)
+            if base is None:
+                baseline, base = 0, empty
+            near = relevant(player.id)
+            key = (baseline, id(base)) if near is None else None
+            if key in shared:
+                view, datagrams = shared[key]
+            else:
+                view, entries = self.select(current, base, near, encoded)
+                datagrams = self.bundle(entries, baseline)
+                if key is not None:
+                    shared[key] = view, datagrams
+            player.views[self.sequence] = view
+            player.views.pop(self.sequence - history, None)
+            #acknowledgements of reliable messages ride on the snapshot
+            acks = self.ackman.piggyback(player.address)
+            for datagram in datagrams:
+                self.send(datagram + acks, player.address)
+                acks = ''
+
+
+class SnapshotReceiver(object):
+    """client side of the SnapshotManager. rebuilds full player updates from
+    the deltas and keeps the complete snapshots as baselines, the newest one
+    is acknowledged to the server."""
+    def __init__(self):
+        super(SnapshotReceiver, self).__init__()
+        self.reset()
+
+    def reset(self):
+        self.baseline = 0
+        self.snapshots = {}
+        self.pending = {}
+
+    def receive(self, msg):
+        """returns the updated entries of a snapshot datagram"""
+        seq, baseline = msg.sequence, msg.baseline
+        if seq <= self.baseline or (baseline and
+                                    baseline not in self.snapshots):
+            return []
+        if seq not in self.pending:
+            self.pending[seq] = (set(), dict(self.snapshots.get(baseline, {})))
+        parts, entries = self.pending[seq]
+        if msg.part in parts:
+            return []
+        parts.add(msg.part)
+        base = self.snapshots.get(baseline, {})
+        updated = []
+        for delta in msg.bundle:
+            ind = delta.player.id
+            entry = proto.Message()
+            if ind in base:
+                entry.CopyFrom(base[ind])
+            else:
+                entry.type = proto.playerUpdate
+            patch_entry(entry, delta)
+            entries[ind] = entry
+            updated.append(entry)
+        if len(parts) == msg.parts:
+            self.complete(seq)
+        return updated
+
+    def complete(self, seq):
+        self.snapshots[seq] = self.pending[seq][1]
+        self.baseline = seq
+        for key in self.snapshots.keys():
+            if key <= seq - history:
+                del self.snapshots[key]
+        for key in self.pending.keys():
+            if key <= seq:
+                del self.pending[key]
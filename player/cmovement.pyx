@@ -0,0 +1,181 @@
+# distutils: extra_compile_args = -ffp-contract=off
+#no fused multiply add, it would round differently than python
+from player.cvec2 cimport cvec2, new_cvec2
+from player.cmstate cimport (cMState, ON_GROUND, LANDING, CAN_JUMP,
+                             ON_RIGHT_WALL, ON_LEFT_WALL, HOLD)
+from libc.math cimport fabs
+
+
+cdef inline float get(cvec2 vec, bint axis):
+    return vec.y if axis else vec.x
+
+
+cdef inline void put(cvec2 vec, bint axis, double value):
+    if axis:
+        vec.y = value
+    else:
+        vec.x = value
+
+
+cdef inline int sign_of(double num):
+    if num > 0:
+        return 1
+    elif num < 0:
+        return -1
+    return 0
+
+
+cdef class cMovement:
+    """Movement compiled, velocity, sweep, step and conditions of the player
+    in one call. every expression is evaluated in the order and precision
+    of movement.PyMovement, doubles where python computes and floats where
+    cvec2 stores, so both step the same bit for bit"""
+    cdef public cvec2 pos, vel
+    cdef public double gravity, normal_accel, boost_accel, turn_multplier
+    cdef public double jump_vel, max_vel, wall_boost, angle, friction
+    cdef public int curr_sign
+
+    def __init__(self, float x, float y):
+        self.pos = cvec2(x, y)
+        self.vel = cvec2(0, 0)
+        self.gravity = 1900.
+        self.normal_accel = 1000.
+        self.boost_accel = 20.
+        self.turn_multplier = 8.
+        self.jump_vel = 700.
+        self.max_vel = 500.
+        self.wall_boost = 650.
+        self.angle = 0
+        self.friction = 15
+        self.curr_sign = 0
+
+    cpdef advance(self, double dt, state, input, rect, rectgen):
+        """one physics step of the player with rect: velocity from the
+        input, sweep against the map, step and conditions"""
+        cdef cvec2 pos
+        self.compute_vel(dt, state, input)
+        rect.vel = self.vel
+        pos = state.pos
+        rect.update(pos.x, pos.y)
+        return self.collide(dt, rectgen, state, rect)
+
+    def step(self, dt, cvec2 pos):
+        cdef float tx = dt.x, ty = dt.y
+        self.pos = new_cvec2(pos.x + <float>(self.vel.x * tx),
+                             pos.y + <float>(self.vel.y * ty))
+        return self.pos, self.vel
+
+    def get_vel(self, double dt, state, input):
+        self.compute_vel(dt, state, input)
+        return self.vel
+
+    def sign_of(self, double num):
+        return sign_of(num)
+
+    def resolve_coll(self, pos, vel):
+        self.pos, self.vel = pos, vel
+
+    cdef compute_vel(self, double dt, state, input):
+        cdef cvec2 vel = state.vel
+        cdef cMState conds = state.conds
+        cdef int dir = conds.direction
+        cdef int mult_sign = -1 if dir % 2 else 1
+        cdef bint vert = dir < 2, hori = dir > 1
+        cdef bint up = input.up
+        cdef double avel, v
+        cdef int sign
+        self.vel = vel
+        avel = fabs(get(vel, hori))
+        if state.isDead:
+            put(vel, hori, get(vel, hori) -
+                get(vel, hori) * dt * self.friction * 0.5)
+            conds.bits &= ~HOLD
+            sign = 0
+        elif input.right and not input.left:
+            sign = mult_sign if dir < 2 else -mult_sign
+        elif input.left and not input.right:
+            sign = -mult_sign if dir < 2 else mult_sign
+        else:
+            if conds.bits & ON_GROUND:
+                put(vel, hori, get(vel, hori) -
+                    get(vel, hori) * dt * self.friction)
+            else:
+                put(vel, hori, get(vel, hori) -
+                    get(vel, hori) * dt * self.friction / 5. * 0)
+            sign = 0
+            conds.bits &= ~HOLD
+        self.curr_sign = sign_of(get(vel, hori))
+        if (get(vel, hori) * <double>sign >= self.max_vel or
+                (conds.bits & ON_RIGHT_WALL and sign < 0) or
+                (conds.bits & ON_LEFT_WALL and sign > 0)):
+            v = 0
+        else:
+            v = self.normal_accel
+        if self.curr_sign * sign < 0:
+            v *= self.turn_multplier
+        if conds.bits & ON_GROUND and avel > self.max_vel:
+            put(vel, hori, self.max_vel * self.curr_sign)
+        v *= not conds.bits & HOLD
+        if sign:
+            put(vel, hori, get(vel, hori) + v * dt * sign)
+
+        put(vel, vert, get(vel, vert) - self.gravity * dt * mult_sign)
+
+        if not state.isDead:
+            if (conds.bits & (LANDING | ON_GROUND) and
+                    conds.bits & CAN_JUMP and up):
+                put(vel, vert, self.jump_vel * mult_sign)
+                conds.ascend()
+            elif (conds.bits & (ON_RIGHT_WALL | ON_LEFT_WALL) and
+                    conds.bits & CAN_JUMP and up):
+                self.walljump(conds, sign)
+        if not up:
+            conds.bits |= CAN_JUMP
+            if get(vel, vert) * mult_sign > 0:
+                put(vel, vert, get(vel, vert) -
+                    get(vel, vert) * dt * self.friction * 2)
+
+    cdef walljump(self, cMState conds, int sign):
+        if conds.bits & ON_LEFT_WALL and sign == 1:
+            self.vel.x = self.wall_boost
+            conds.ascend()
+        elif conds.bits & ON_RIGHT_WALL and sign == -1:
+            self.vel.x = -self.wall_boost
+            conds.ascend()
+        else:
+            return
+        self.vel.x += self.jump_vel * 1.4
+        self.turn_multplier = 1
+
+    cdef collide(self, double dt, rectgen, state, rect):
+        cdef double xt, yt, xt_ent, yt_ent
+        cdef float xnorm, ynorm, tx, ty
+        cdef cvec2 pos = state.pos, vel = self.vel
+        cdef cMState conds = state.conds
+        cdef int dir = conds.direction
+        cdef int mult_sign = -1 if dir % 2 else 1
+        cdef bint vert = dir < 2
+        #earliest contacts along both axes
+        xt, xnorm, yt_ent, yt, ynorm, xt_ent = rect.sweep_all(rectgen, dt)
+        if xnorm and ynorm:
+            if yt_ent == yt and xt > yt:
+                xnorm = 0
+                xt = dt
+            elif xt_ent == xt and yt > xt:
+                ynorm = 0
+                yt = dt
+        tx, ty = xt, yt
+
+        #step
+        self.pos = new_cvec2(pos.x + <float>(vel.x * tx),
+                             pos.y + <float>(vel.y * ty))
+        state.pos, state.vel = self.pos, vel
+        vel.x *= xnorm == 0.
+        vel.y *= ynorm == 0.
+
+        #conditions
+        if (ynorm if vert else xnorm) * mult_sign < 0:
+            conds.ground()
+        elif get(vel, vert) * mult_sign < 0:
+            conds.descend()
+        return state
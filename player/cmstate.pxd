@@ -0,0 +1,25 @@
+#bits of the movement conditions, in the order of the fields of MState
+cdef enum:
+    ON_GROUND = 1 << 0
+    ASCENDING = 1 << 1
+    LANDING = 1 << 2
+    CAN_JUMP = 1 << 3
+    DESCENDING = 1 << 4
+    IS_FIRING = 1 << 5
+    ON_RIGHT_WALL = 1 << 6
+    ON_LEFT_WALL = 1 << 7
+    IS_DEAD = 1 << 8
+    HOLD = 1 << 9
+
+
+cdef class cMState:
+    cdef public unsigned int bits
+    cdef public int direction
+
+    cdef void set(self, unsigned int bit, bint value)
+    cpdef ascend(self)
+    cpdef descend(self)
+    cpdef ground(self)
+    cpdef wall(self, bint right)
+    cpdef leave_wall(self)
+    cpdef cMState copy(self)
@@ -0,0 +1,147 @@
+names = ('onGround', 'ascending', 'landing', 'canJump', 'descending',
+         'isFiring', 'onRightWall', 'onLeftWall', 'isDead', 'hold')
+
+
+cdef class cMState:
+    """movement conditions of a player as the bits of an int. the flags
+    read and write like the fields of proto.MState, which is only filled
+    when a snapshot is packed. the transitions of state.set_cond are
+    methods, so the physics step does not compare strings"""
+
+    def __init__(self, unsigned int bits=CAN_JUMP, int direction=0):
+        self.bits = bits
+        self.direction = direction
+
+    def __repr__(self):
+        return 'cMState(%s)' % ', '.join(
+            name for i, name in enumerate(names) if self.bits & 1 << i)
+
+    cdef void set(self, unsigned int bit, bint value):
+        if value:
+            self.bits |= bit
+        else:
+            self.bits &= ~bit
+
+    property onGround:
+        def __get__(self):
+            return self.bits & ON_GROUND != 0
+
+        def __set__(self, bint value):
+            self.set(ON_GROUND, value)
+
+    property ascending:
+        def __get__(self):
+            return self.bits & ASCENDING != 0
+
+        def __set__(self, bint value):
+            self.set(ASCENDING, value)
+
+    property landing:
+        def __get__(self):
+            return self.bits & LANDING != 0
+
+        def __set__(self, bint value):
+            self.set(LANDING, value)
+
+    property canJump:
+        def __get__(self):
+            return self.bits & CAN_JUMP != 0
+
+        def __set__(self, bint value):
+            self.set(CAN_JUMP, value)
+
+    property descending:
+        def __get__(self):
+            return self.bits & DESCENDING != 0
+
+        def __set__(self, bint value):
+            self.set(DESCENDING, value)
+
+    property isFiring:
+        def __get__(self):
+            return self.bits & IS_FIRING != 0
+
+        def __set__(self, bint value):
+            self.set(IS_FIRING, value)
+
+    property onRightWall:
+        def __get__(self):
+            return self.bits & ON_RIGHT_WALL != 0
+
+        def __set__(self, bint value):
+            self.set(ON_RIGHT_WALL, value)
+
+    property onLeftWall:
+        def __get__(self):
+            return self.bits & ON_LEFT_WALL != 0
+
+        def __set__(self, bint value):
+            self.set(ON_LEFT_WALL, value)
+
+    property isDead:
+        def __get__(self):
+            return self.bits & IS_DEAD != 0
+
+        def __set__(self, bint value):
+            self.set(IS_DEAD, value)
+
+    property hold:
+        def __get__(self):
+            return self.bits & HOLD != 0
+
+        def __set__(self, bint value):
+            self.set(HOLD, value)
+
+    cpdef ascend(self):
+        self.bits |= ASCENDING
+        self.bits &= ~(ON_GROUND | LANDING | CAN_JUMP | ON_RIGHT_WALL |
+                       ON_LEFT_WALL | DESCENDING)
+
+    cpdef descend(self):
+        self.bits |= DESCENDING
+        self.bits &= ~(ASCENDING | ON_GROUND | LANDING)
+
+    cpdef ground(self):
+        """lands first, the next contact puts the player on the ground"""
+        if self.bits & ON_GROUND:
+            return
+        if not self.bits & LANDING:
+            self.bits |= LANDING
+            self.bits &= ~(DESCENDING | ASCENDING)
+        else:
+            self.bits |= ON_GROUND
+            self.bits &= ~LANDING
+
+    cpdef wall(self, bint right):
+        cdef unsigned int bit = ON_RIGHT_WALL if right else ON_LEFT_WALL
+        if not self.bits & bit:
+            self.bits &= ~CAN_JUMP
+        self.bits |= bit
+        self.bits &= ~(ASCENDING | DESCENDING)
+
+    cpdef leave_wall(self):
+        self.bits &= ~(ON_RIGHT_WALL | ON_LEFT_WALL)
+
+    cpdef cMState copy(self):
+        return cMState(self.bits, self.direction)
+
+    def to_proto(self, msg):
+        """writes the conditions to the MState msg, only the flags that are
+        set"""
+        cdef int i
+        msg.Clear()
+        for i in range(len(names)):
+            if self.bits & 1 << i:
+                setattr(msg, names[i], True)
+        if self.direction:
+            msg.direction = self.direction
+        msg.SetInParent()
+
+    def from_proto(self, msg):
+        """reads the conditions from the MState msg"""
+        cdef int i
+        self.bits = 0
+        for i in range(len(names)):
+            if getattr(msg, names[i]):
+                self.bits |= 1 << i
+        self.direction = msg.direction
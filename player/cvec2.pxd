@@ -1,2 +1,18 @@
 cdef class cvec2:
     cdef public float x, y
+
+    cpdef cvec2 set(self, float x, float y)
+    cpdef cvec2 iadd(self, cvec2 vec)
+    cpdef cvec2 isub(self, cvec2 vec)
+    cpdef cvec2 iadd_scaled(self, cvec2 vec, double num)
+    cpdef cvec2 iadd_mul(self, cvec2 vec, cvec2 scale)
+    cpdef cvec2 isub_mul(self, cvec2 vec, cvec2 scale)
+    cpdef cvec2 copy(self)
+
+
+cdef inline cvec2 new_cvec2(float x, float y):
+    """cvec2(x, y) without the python call, from the free list"""
+    cdef cvec2 vec = cvec2.__new__(cvec2)
+    vec.x = x
+    vec.y = y
+    return vec
@@ -1,6 +1,29 @@
+# distutils: extra_compile_args = -ffp-contract=off
+#no fused multiply add, it would round differently than python
+cimport cython
 from libc.math cimport sqrt
 
+#built with COUNT_ALLOCATIONS=1, see build_libs.py, the vectors count
+#themselves for bench.py garbage. other builds count nothing
+IF COUNT_ALLOCATIONS:
+    cdef unsigned long created = 0
+
+    def allocations():
+        """number of cvec2 created so far"""
+        return created
+
+
+@cython.freelist(256)
 cdef class cvec2:
+    """2d vector of floats. the operators return new vectors, the methods
+    set, iadd, isub, iadd_scaled, iadd_mul and isub_mul change the vector in
+    place and return it, rounding like the operators do. other modules
+    cimport them, and new_cvec2 from cvec2.pxd, to skip python dispatch"""
+
+    IF COUNT_ALLOCATIONS:
+        def __cinit__(self):
+            global created
+            created += 1
 
     def __init__(self, float x, float y):
         self.x = x
@@ -29,19 +52,19 @@ cdef class cvec2:
         return ', '.join((str(self.x), str(self.y)))
 
     def __sub__(self, cvec2 vec):
-        return cvec2(self.x - vec.x, self.y - vec.y)
+        return new_cvec2(self.x - vec.x, self.y - vec.y)
 
     def __add__(self, cvec2 vec):
-        return cvec2(self.x + vec.x, self.y + vec.y)
+        return new_cvec2(self.x + vec.x, self.y + vec.y)
 
     def __mul__(self, num):
         if isinstance(num, float) or isinstance(num, int):
-            return cvec2(self.x * num, self.y * num)
+            return new_cvec2(self.x * num, self.y * num)
         elif isinstance(num, cvec2):
-            return cvec2(self.x * num.x, self.y * num.y)
+            return new_cvec2(self.x * num.x, self.y * num.y)
 
     def __div__(self, float num):
-        return cvec2(self.x / num, self.y / num)
+        return new_cvec2(self.x / num, self.y / num)
 
     def __richcmp__(self, cvec2 other, int op):
         if op == 2:
@@ -58,7 +81,45 @@ cdef class cvec2:
             raise TypeError
 
     def __pow__(self, num, mod):
-        return cvec2(self.x * self.x, self.y * self.y)
+        return new_cvec2(self.x * self.x, self.y * self.y)
+
+    cpdef cvec2 set(self, float x, float y):
+        self.x = x
+        self.y = y
+        return self
+
+    cpdef cvec2 iadd(self, cvec2 vec):
+        """self + vec in place"""
+        self.x = self.x + vec.x
+        self.y = self.y + vec.y
+        return self
+
+    cpdef cvec2 isub(self, cvec2 vec):
+        """self - vec in place"""
+        self.x = self.x - vec.x
+        self.y = self.y - vec.y
+        return self
+
+    cpdef cvec2 iadd_scaled(self, cvec2 vec, double num):
+        """self + vec * num in place"""
+        self.x = self.x + <float>(vec.x * num)
+        self.y = self.y + <float>(vec.y * num)
+        return self
+
+    cpdef cvec2 iadd_mul(self, cvec2 vec, cvec2 scale):
+        """self + vec * scale in place"""
+        self.x = self.x + vec.x * scale.x
+        self.y = self.y + vec.y * scale.y
+        return self
+
+    cpdef cvec2 isub_mul(self, cvec2 vec, cvec2 scale):
+        """self - vec * scale in place"""
+        self.x = self.x - vec.x * scale.x
+        self.y = self.y - vec.y * scale.y
+        return self
+
+    cpdef cvec2 copy(self):
+        return new_cvec2(self.x, self.y)
 
     def mag(self):
         """magnitude of the vector"""
@@ -66,4 +127,4 @@ cdef class cvec2:
 
     def normalize(self):
         cdef float mag = self.mag()
-        return cvec2(self.x / mag, self.y / mag)
+        return new_cvec2(self.x / mag, self.y / mag)
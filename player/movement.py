@@ -1,11 +1,12 @@
 from cvec2 import cvec2 as vec2
 from network_utils import protocol_pb2 as proto
+import os
 
 
-class Movement(object):
-    """docstring for Movement"""
+class PyMovement(object):
+    """movement in python, the reference for the compiled cMovement"""
     def __init__(self, x, y):
-        super(Movement, self).__init__()
+        super(PyMovement, self).__init__()
         self.pos = vec2(x, y)
         self.vel = vec2(0, 0)
         self.gravity = 1900.
@@ -18,6 +19,13 @@ class Movement(object):
         self.angle = 0
         self.friction = 15
 
+    def advance(self, dt, state, input, rect, rectgen):
+        """one physics step of the player with rect: velocity from the
+        input, sweep against the map, step and conditions"""
+        rect.vel = self.get_vel(dt, state, input)
+        rect.update(*state.pos)
+        return self.collide(dt, rectgen, state, rect)
+
     def step(self, dt, pos):
         self.pos = pos + self.vel * dt
         return self.pos, self.vel
@@ -76,7 +84,7 @@ class Movement(object):
                   or conds.onLeftWall) and conds.canJump and input.up:
                 self.walljump(state, conds, sign)
         if not input.up:
-            state.set_cond('canJump')
+            conds.canJump = True
             # todo
             if self.vel[vert] * mult_sign > 0:
                 self.vel[vert] -= self.vel[vert] * dt * self.friction * 2
@@ -84,15 +92,15 @@ class Movement(object):
     def jump(self, state, sign, vert, mult_sign):
         # todo: jump
         self.vel[vert] = self.jump_vel * mult_sign
-        state.set_cond('ascending')
+        state.conds.ascend()
 
     def walljump(self, state, conds, sign):
         if conds.onLeftWall and sign == 1:
             self.vel.x = self.wall_boost
-            state.set_cond('ascending')
+            conds.ascend()
         elif conds.onRightWall and sign == -1:
             self.vel.x = -self.wall_boost
-            state.set_cond('ascending')
+            conds.ascend()
         else:
             return
         self.vel.x += self.jump_vel * 1.4
@@ -107,3 +115,74 @@ class Movement(object):
 
     def resolve_coll(self, pos, vel):
         self.pos, self.vel = pos, vel
+
+    def collide(self, dt, rectgen, state, rect):
+        #earliest contacts along both axes
+        xt, xnorm, yt_ent, yt, ynorm, xt_ent = rect.sweep_all(rectgen, dt)
+
+        """if xnorm:
+            # check for stair
+            stairoffset = 10
+            testr = self.rect.copy()
+            testr.update(testr.pos.x, testr.pos.y + stairoffset)
+            first = testr.sweep(rct, dt)
+            if not first:
+                testr.update(testr.pos.x + testr.sign_of(testr.vel.x) * 30,
+                             testr.pos.y)
+                testr.vel.x = 0
+                second = testr.sweep(rct, float('Inf'))
+                if second and testr.vel.y != 0:
+                    s1 = testr.vel.y * second[1]
+                    s = stairoffset + s1
+                    t = s / testr.vel.y
+                    if not abs(t) == float('Inf'):
+                        yt = t
+                        xnorm = 0
+                        ynorm = -1"""
+        if xnorm and ynorm:
+            if yt_ent == yt and xt > yt:
+                xnorm = 0
+                xt = dt
+            elif xt_ent == xt and yt > xt:
+                ynorm = 0
+                yt = dt
+
+        dt = vec2(xt, yt)
+        norm = vec2(xnorm, ynorm)
+        return self.resolve_sweep(norm, dt, state)
+
+    def resolve_sweep(self, normal, dt, state):
+        state.pos, state.vel = self.step(dt, state.pos)
+        state.vel.x *= normal.x == 0.
+        state.vel.y *= normal.y == 0.
+        """if normal.y < 0:
+            state.set_cond('onGround')
+            elif normal.x > 0:
+                    state.set_cond('onRightWall')
+            elif normal.x < 0:
+                    state.set_cond('onLeftWall')
+        elif normal.y == 0.:# and normal.y == 0.:
+            self.determine_state(state)"""
+        self.determine_state(state, normal)
+        return state
+
+    def determine_state(self, state, normal):
+        dir = state.conds.direction
+        mult_sign = (-1 if dir % 2 else 1)
+        vert = dir < 2
+        if normal[vert] * mult_sign < 0:
+            state.conds.ground()
+        elif state.vel[vert] * mult_sign < 0:
+            state.conds.descend()
+
+
+#the compiled kernel steps the same bit for bit, python is the fallback.
+#PYMOVEMENT=1 in the environment selects python even when it is built
+try:
+    from cmovement import cMovement
+except ImportError:
+    cMovement = None
+if cMovement is None or os.environ.get('PYMOVEMENT', '0') != '0':
+    Movement = PyMovement
+else:
+    Movement = cMovement
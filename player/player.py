@@ -31,6 +31,8 @@ class Player(Events):
         self.set_color(Options()['color'])
         self.rect = self.Rect(0, 0, pext.x, pext.y, self.color, isplayer=True,
                               batch=batch)
+        #stands in for rect when predicting moves
+        self.predrect = self.rect.copy()
         # input will be assigned by windowmanager class
         self.input = proto.Input()
         self.listeners = {}
@@ -43,17 +45,12 @@ class Player(Events):
             state = self.state
         if not input:
             input = self.input
-        self.rect.vel = self.move.get_vel(dt, state, input)
-        self.rect.update(*state.pos)
-        state = self.collide(dt, rectgen, state)
+        state = self.move.advance(dt, state, input, self.rect, rectgen)
         self.weapons.update(dt, state, input)
         self.state.update(dt, state)
 
     def predict_step(self, dt, rectgen, state, input):
-        newrect = self.rect.copy()
-        newrect.vel = self.move.get_vel(dt, state, input)
-        newrect.update(*state.pos)
-        state = self.collide(dt, rectgen, state, newrect)
+        state = self.move.advance(dt, state, input, self.predrect, rectgen)
         state.mpos = vec2(self.input.mx, self.input.my)
         state.id = self.id
         if self.renderhook:
@@ -91,9 +88,7 @@ class Player(Events):
             self.renderhook(self.state, update=True)
 
     def predict(self, dt, rectgen):
-        self.rect.vel = self.move.get_vel(dt, self.state, self.input)
-        self.rect.update(*self.state.pos)
-        self.collide(dt, rectgen, self.state)
+        self.move.advance(dt, self.state, self.input, self.rect, rectgen)
         self.weapons.update(dt, self.state, self.input)
         self.state.id = self.id
         self.state.mpos = vec2(self.input.mx, self.input.my)
@@ -103,82 +98,6 @@ class Player(Events):
     def draw(self):
         self.rect.draw()
 
-    def collide(self, dt, rectgen, state, external_rect=None):
-        if not external_rect:
-            all_cols = [self.rect.sweep(obj, dt) for obj in rectgen]
-        else:
-            all_cols = [external_rect.sweep(obj, dt) for obj in rectgen]
-        cols = [coldata for coldata in all_cols if coldata]
-        try:
-            xt = min(col[1] for col in cols if col[0].x != 0)
-            xnorm, yt_ent = [(col[0].x, col[2]) for col in cols
-                             if col[1] == xt and col[0].x != 0][0]
-        except ValueError:
-            xt = dt
-            xnorm = 0.
-        try:
-            yt = min(col[1] for col in cols if col[0].y != 0)
-            ynorm, xt_ent = [(col[0].y, col[2]) for col in cols
-                             if col[1] == yt and col[0].y != 0][0]
-        except ValueError:
-            yt = dt
-            ynorm = 0.
-
-        """if xnorm:
-            # check for stair
-            stairoffset = 10
-            testr = self.rect.copy()
-            testr.update(testr.pos.x, testr.pos.y + stairoffset)
-            first = testr.sweep(rct, dt)
-            if not first:
-                testr.update(testr.pos.x + testr.sign_of(testr.vel.x) * 30,
-                             testr.pos.y)
-                testr.vel.x = 0
-                second = testr.sweep(rct, float('Inf'))
-                if second and testr.vel.y != 0:
-                    s1 = testr.vel.y * second[1]
-                    s = stairoffset + s1
-                    t = s / testr.vel.y
-                    if not abs(t) == float('Inf'):
-                        yt = t
-                        xnorm = 0
-                        ynorm = -1"""
-        if xnorm and ynorm:
-            if yt_ent == yt and xt > yt:
-                xnorm = 0
-                xt = dt
-            elif xt_ent == xt and yt > xt:
-                ynorm = 0
-                yt = dt
-
-        dt = vec2(xt, yt)
-        norm = vec2(xnorm, ynorm)
-        return self.resolve_sweep(norm, dt, state)
-
-    def resolve_sweep(self, normal, dt, state):
-        state.pos, state.vel = self.move.step(dt, state.pos)
-        state.vel.x *= normal.x == 0.
-        state.vel.y *= normal.y == 0.
-        """if normal.y < 0:
-            state.set_cond('onGround')
-            elif normal.x > 0:
-                    state.set_cond('onRightWall')
-            elif normal.x < 0:
-                    state.set_cond('onLeftWall')
-        elif normal.y == 0.:# and normal.y == 0.:
-            self.determine_state(state)"""
-        self.determine_state(state, normal)
-        return state
-
-    def determine_state(self, state, normal):
-        dir = state.conds.direction
-        mult_sign = (-1 if dir % 2 else 1)
-        vert = dir < 2
-        if normal[vert] * mult_sign < 0:
-            state.set_cond('onGround')
-        elif state.vel[vert] * mult_sign < 0:
-            state.set_cond('descending')
-
     def spawn(self, x, y, other=False):
         self.state.pos = vec2(x, y)
         self.state.vel = vec2(0, 0)
@@ -1,5 +1,5 @@
-from network_utils import protocol_pb2 as proto
 from cvec2 import cvec2 as vec2
+from cmstate import cMState
 
 
 class state(object):
@@ -12,8 +12,7 @@ class state(object):
         self.isDead = isDead
         self.frozen = False
         if not conds:
-            self.conds = proto.MState()
-            self.conds.canJump = True
+            self.conds = cMState()
         else:
             self.conds = conds
         self.hudhook = False
@@ -21,42 +20,18 @@ class state(object):
 
     def set_cond(self, condname):
         if condname == 'ascending':
-            self.conds.ascending = True
-            self.conds.onGround = False
-            self.conds.landing = False
-            self.conds.canJump = False
-            self.conds.onRightWall = False
-            self.conds.onLeftWall = False
-            self.conds.descending = False
+            self.conds.ascend()
         elif condname == 'canJump':
             self.conds.canJump = True
         elif condname == 'onGround':
-            if not self.conds.onGround:
-                if not self.conds.landing:
-                    self.conds.landing = True
-                    self.conds.descending = False
-                    self.conds.ascending = False
-                else:
-                    self.conds.onGround = True
-                    self.conds.landing = False
+            self.conds.ground()
         elif condname == 'descending':
-            self.conds.ascending = False
-            self.conds.descending = True
-            self.conds.onGround = False
-            self.conds.landing = False
+            self.conds.descend()
         elif condname == 'onRightWall':
-            if not self.conds.onRightWall:
-                self.conds.canJump = False
-            self.conds.onRightWall = True
-            self.conds.ascending = False
-            self.conds.descending = False
+            self.conds.wall(True)
             self.wall = self.wall_t
         elif condname == 'onLeftWall':
-            if not self.conds.onLeftWall:
-                self.conds.canJump = False
-            self.conds.onLeftWall = True
-            self.conds.ascending = False
-            self.conds.descending = False
+            self.conds.wall(False)
             self.wall = self.wall_t
         elif condname == 'hold':
             self.conds.hold = True
@@ -65,8 +40,7 @@ class state(object):
         self.wall -= dt
         if self.wall < 0:
             self.wall = 0
-            self.conds.onRightWall = False
-            self.conds.onLeftWall = False
+            self.conds.leave_wall()
         if not stat.pos == self.pos:
             self.pos = vec2(*stat.pos)
         if not stat.vel == self.vel:
@@ -86,10 +60,8 @@ class state(object):
         self.chksm = self.hp + self.armor
 
     def copy(self):
-        conds = proto.MState()
-        conds.CopyFrom(self.conds)
         return state(vec2(*self.pos), vec2(*self.vel), self.hp, self.armor,
-                     conds, self.isDead)
+                     self.conds.copy(), self.isDead)
 
     def hook_hud(self, hudhook):
         self.hudhook = hudhook
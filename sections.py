@@ -0,0 +1,67 @@
+"""binary files of named sections of rows, the compiled maps and models.
+
+layout, little endian: magic, version, md5 of the source, number of
+sections, then per section its tag, typecode, row width and row count
+followed by the rows as doubles ('d') or ints ('i'). every format has a
+magic and version of its own"""
+from array import array
+import mmap
+import struct
+
+header = struct.Struct('<6sH16sI')
+section = struct.Struct('<4scBI')
+
+
+def write(path, digest, data, magic, version):
+    """data, tags to arrays or lists of rows of doubles, to path"""
+    sections = []
+    for tag in sorted(data):
+        rows = data[tag]
+        if isinstance(rows, array):
+            flat, width = rows, 1
+        else:
+            width = len(rows[0]) if rows else 1
+            flat = array('d', [num for row in rows for num in row])
+        sections.append(section.pack(tag, flat.typecode, width,
+                                     len(flat) / width) + flat.tostring())
+    with open(path, 'wb') as f:
+        f.write(header.pack(magic, version, digest, len(sections)))
+        for sect in sections:
+            f.write(sect)
+
+
+def read(path, digest, magic, version):
+    """sections of the file at path, None unless it has magic and version
+    and was compiled from the source with digest. int sections and
+    sections one wide come back as flat arrays"""
+    with open(path, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            #empty file
+            return None
+    try:
+        magic_, version_, digest_, count = header.unpack_from(mm, 0)
+        if (magic_, version_) != (magic, version) or (
+                digest and digest_ != digest):
+            return None
+        data, offset = {}, header.size
+        for i in range(count):
+            tag, code, width, rows = section.unpack_from(mm, offset)
+            offset += section.size
+            flat = array(code)
+            size = flat.itemsize * width * rows
+            if offset + size > len(mm):
+                return None
+            flat.fromstring(mm[offset:offset + size])
+            offset += size
+            if code == 'i' or width == 1:
+                data[tag] = flat
+            else:
+                data[tag] = [tuple(flat[j:j + width])
+                             for j in range(0, len(flat), width)]
+        return data
+    except struct.error:
+        return None
+    finally:
+        mm.close()
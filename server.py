@@ -3,7 +3,9 @@ selectreactor.install()
 from twisted.internet import reactor
 from twisted.internet.task import LoopingCall
 from network_utils import serverclass
+from network_utils.profiler import rolling_log, StatsFactory
 from time import time
+import json
 
 t = [time()]
 main = serverclass.GameServer()
@@ -20,4 +22,9 @@ lc.start(1 / 60.)
 reactor.listenUDP(8961, main)
 main.projectiles.receive_send(main.transport.write)
 main.ackman.receive_send(main.transport.write)
+main.snapshots.receive_send(main.transport.write)
+#tick timings every 10 seconds, and on demand with nc 127.0.0.1 8962
+log = rolling_log('server_stats.log')
+LoopingCall(lambda: log.info(json.dumps(main.stats()))).start(10, now=False)
+reactor.listenTCP(8962, StatsFactory(main.stats), interface='127.0.0.1')
 reactor.run()